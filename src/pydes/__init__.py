@@ -1,14 +1,17 @@
 from .atomic import Atomic, StateConstant, StateVariable
 from .channel import InputChannel, MultiInputChannel, MultiOutputChannel, OutputChannel
 from .core import random
+from .population import AtomicArray, StateColumn
 
 __all__ = (
     "random",
     "Atomic",
+    "AtomicArray",
     "InputChannel",
     "OutputChannel",
     "MultiInputChannel",
     "MultiOutputChannel",
+    "StateColumn",
     "StateConstant",
     "StateVariable",
 )
@@ -1,4 +1,6 @@
-from typing import Any, Callable
+from collections.abc import Callable
+from functools import cache
+from typing import Any, ClassVar
 
 from pydantic import Field
 from pydantic_core import PydanticUndefined
@@ -11,6 +13,7 @@ __all__ = (
     "StateVariable",
     "StateConstant",
     "Atomic",
+    "unchecked",
 )
 
 Unset: Any = PydanticUndefined
@@ -39,6 +42,37 @@ def StateConstant(
 
 
 class Atomic(Model):
+    # the time advance last computed, None once a field it reads is assigned
+    __slots__ = ("_advance",)
+
+    time_advance_fields: ClassVar[frozenset[str] | None] = None
+    """The fields `time_advance` reads, if declared
+
+    The kernel then reuses the last time advance until one of them is
+    assigned, and leaves a model whose next time is unchanged in place in
+    the scheduler. Models that keep the default `time_advance` are passive
+    and declare no fields. A declared field mutated in place rather than
+    assigned must be followed by `invalidate_time_advance`. A `time_advance`
+    that reads `time` or has side effects, such as random draws, cannot
+    declare its fields.
+    """
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any):
+        super().__pydantic_init_subclass__(**kwargs)
+        # a declaration covers the `time_advance` of its class and above
+        mro = cls.__mro__
+        owner = next(c for c in mro if "time_advance" in vars(c))
+        declarer = next(c for c in mro if "time_advance_fields" in vars(c))
+        if mro.index(declarer) > mro.index(owner) or declarer is Atomic:
+            cls.time_advance_fields = frozenset() if owner is Atomic else None
+        if cls.time_advance_fields and not hasattr(cls.__setattr__, "tracked"):
+            type.__setattr__(cls, "__setattr__", _tracked(cls.__setattr__))
+
+    def invalidate_time_advance(self):
+        """Have the kernel call `time_advance` again at the next transition"""
+        object.__setattr__(self, "_advance", None)
+
     def time_advance(self) -> Time:
         """Override this function to implement custom time advance
 
@@ -83,3 +117,74 @@ class Atomic(Model):
         Default Implementation returns empty map representing no output
         """
         return {}
+
+    def validate_state(self):
+        """Validate every field at once, e.g. before taking a checkpoint
+
+        Needed for models running `unchecked`, whose assignments inside the
+        transition functions skip validation.
+        """
+        validated = type(self).model_validate(self.__dict__)
+        self.__dict__.update(validated.__dict__)
+
+
+@cache
+def unchecked[A: Atomic](cls: type[A]) -> type[A]:
+    """Return a subclass of `cls` whose attribute assignment is unvalidated
+
+    Assigning state in the transition functions of an `Atomic` normally runs
+    pydantic's assignment validation. The returned subclass writes attributes
+    directly instead, and is meant for production runs of models that were
+    validated at construction: swap an instance over with
+    `model.__class__ = unchecked(type(model))`. Frozen fields are not
+    enforced either. Instances pickle as the original `cls`.
+    """
+
+    def __reduce__(self: A):
+        return _rebuild, (cls, self.__getstate__())
+
+    return type(cls)(
+        cls.__name__,
+        (cls,),
+        {
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+            "__setattr__": _tracked(_setattr(cls))
+            if cls.time_advance_fields
+            else _setattr(cls),
+            "__reduce__": __reduce__,
+        },
+    )
+
+
+def _setattr(cls: type[Atomic]) -> Callable[[Any, str, Any], None]:
+    """An unvalidated `__setattr__` that keeps private attributes private"""
+    private = cls.__private_attributes__
+
+    def __setattr__(self: Atomic, name: str, value: Any):
+        if name in private:
+            self.__pydantic_private__[name] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    return __setattr__
+
+
+def _tracked(
+    setattr: Callable[[Any, str, Any], None]
+) -> Callable[[Any, str, Any], None]:
+    """Wrap `setattr` to drop the cached time advance of declared fields"""
+
+    def __setattr__(self: Atomic, name: str, value: Any):
+        if (fields := self.time_advance_fields) and name in fields:
+            object.__setattr__(self, "_advance", None)
+        setattr(self, name, value)
+
+    __setattr__.tracked = True
+    return __setattr__
+
+
+def _rebuild[A: Atomic](cls: type[A], state: dict[str, Any]) -> A:
+    model = cls.__new__(cls)
+    model.__setstate__(state)
+    return model
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from abc import ABC
+from abc import ABC, abstractmethod
 from collections.abc import Mapping
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from uuid import UUID
-from weakref import WeakValueDictionary
+from weakref import ref
 
+from pydantic import ConfigDict
 from pydantic.dataclasses import dataclass
 from typing_extensions import ClassVar, Self
 
-from pydes.model import Model
+from pydes.core import Time
+
+if TYPE_CHECKING:
+    from pydes.model import Model
 
 __all__ = (
     "InputChannel",
@@ -19,23 +23,96 @@ __all__ = (
 )
 
 
-@dataclass(frozen=True)
+@dataclass(
+    frozen=True, eq=False, slots=True, config=ConfigDict(arbitrary_types_allowed=True)
+)
 class Port:
-    output: OutputChannelDescriptor
-    input: InputChannelDescriptor
+    """A link from a sending channel to a receiving channel
+
+    Between models these are an output and an input channel. Couplings into
+    or out of a `Coupled` model link an input to an input (external input
+    coupling) or an output to an output (external output coupling).
+    """
+
+    output: ChannelDescriptor
+    input: ChannelDescriptor
 
 
 class ChannelDescriptor(ABC):
+    # every model instance binds its own copy of each channel, so keep them
+    # small; all slots live here since only one base may declare any
+    __slots__ = ("name", "lookahead", "forward", "port", "ports", "_owner")
+
     direction: ClassVar[bool]
     name: str
-    owner: Model
+    lookahead: Time
+    forward: tuple[Port, ...] | list[Port]
+    _owner: ref[Model]
+
+    def __init__(self, lookahead: Time = 0):
+        """`lookahead` is a lower bound on the delay between an external
+        transition of the owner and its next output on this channel, which
+        lets parallel runs advance partitions without waiting on each other.
+        """
+        self.lookahead = lookahead
 
     def __set_name__(self, objtype: type[Model], name: str):
         self.name = name
 
     def __get__(self, obj: Model | None, objtype: type[Model] | None = None) -> Any:
-        if obj is not None:
-            self.owner = obj
+        if obj is None:
+            return self
+        return self.bind(obj)
+
+    @property
+    def owner(self) -> Model:
+        return self._owner()
+
+    def bind(self, obj: Model) -> Self:
+        """Return the channel instance belonging to `obj`
+
+        Channels are declared once per class, but every model instance needs
+        its own connections, so a copy of the descriptor is bound to each
+        owner on first access and kept in the owner's `_channels`.
+        """
+        try:
+            return obj._channels[self.name]
+        except AttributeError:
+            object.__setattr__(obj, "_channels", {})
+        except KeyError:
+            pass
+        channel = obj._channels[self.name] = object.__new__(type(self))
+        channel.name = self.name
+        channel.lookahead = self.lookahead
+        channel._owner = ref(obj)
+        # couplings passing through a coupled model's own channel
+        channel.forward = ()
+        channel._init_bound()
+        return channel
+
+    def _init_bound(self):
+        pass
+
+    @abstractmethod
+    def connected(self) -> list[Port]:
+        """The ports attached on this channel's own side"""
+        ...
+
+    def connect(self, other: Any):
+        if not isinstance(other, ChannelDescriptor):
+            raise ValueError(f"Invalid object pair for linking: {self} <> {other}")
+        port = self._connect(other)
+        self._attach(port, other)
+        other._attach(port, self)
+
+    @abstractmethod
+    def _attach(self, port: Port, peer: ChannelDescriptor):
+        ...
+
+    def _own_side(self, port: Port) -> bool:
+        # inputs receive and outputs send on their own side, the other side of
+        # a coupled model's channel faces its components
+        return (port.input if self.direction else port.output) is self
 
     def _connect(self, other: Any) -> Port:
         match self, other:
@@ -43,74 +120,98 @@ class ChannelDescriptor(ABC):
                 port = Port(other, self)
             case OutputChannelDescriptor(), InputChannelDescriptor():
                 port = Port(self, other)
+            case InputChannelDescriptor(), InputChannelDescriptor() if (
+                other.owner.parent is self.owner
+            ):
+                port = Port(self, other)
+            case InputChannelDescriptor(), InputChannelDescriptor() if (
+                self.owner.parent is other.owner
+            ):
+                port = Port(other, self)
+            case OutputChannelDescriptor(), OutputChannelDescriptor() if (
+                self.owner.parent is other.owner
+            ):
+                port = Port(self, other)
+            case OutputChannelDescriptor(), OutputChannelDescriptor() if (
+                other.owner.parent is self.owner
+            ):
+                port = Port(other, self)
             case _:
                 raise ValueError(f"Invalid object pair for linking: {self} <> {other}")
         return port
 
 
 class InputChannelDescriptor(ChannelDescriptor):
+    __slots__ = ()
     direction: ClassVar[bool] = True
 
 
 class OutputChannelDescriptor(ChannelDescriptor):
+    __slots__ = ()
     direction: ClassVar[bool] = False
 
 
 class SinglePortChannelDescriptor(ChannelDescriptor):
-    port: Port
+    __slots__ = ()
+    port: Port | None
 
-    def __get__(self, obj: Model | None, objtype: type[Model] | None = None) -> Port:
-        super().__get__(obj, objtype)
-        return self.port
+    def __get__(self, obj: Model | None, objtype: type[Model] | None = None) -> Any:
+        if obj is None:
+            return self
+        try:
+            return obj._channels[self.name].port
+        except (AttributeError, KeyError):
+            return self.bind(obj).port
 
-    def connect(self, other: Any):
-        match other:
-            case SinglePortChannelDescriptor():
-                self.port = other.port = self._connect(other)
-            case MultiPortChannelDescriptor():
-                self.port = other.ports[self.owner.id] = self._connect(other)
-            case _:
-                raise ValueError(f"Invalid object pair for linking: {self} <> {other}")
+    def _init_bound(self):
+        self.port = None
+
+    def connected(self) -> list[Port]:
+        return [] if self.port is None else [self.port]
+
+    def _attach(self, port: Port, peer: ChannelDescriptor):
+        if self._own_side(port):
+            self.port = port
+        else:
+            self.forward = [*self.forward, port]
 
 
 class MultiPortChannelDescriptor(ChannelDescriptor):
-    ports: WeakValueDictionary[UUID, Port]
+    __slots__ = ()
+    ports: dict[UUID, Port]
 
-    def __get__(self, obj: Model | None, objtype: type[Model] | None = None) -> Self:
-        super().__get__(obj, objtype)
-        return self
+    def _init_bound(self):
+        self.ports = {}
 
     def __getitem__(self, key: UUID | Model) -> Port:
-        if isinstance(key, Model):
+        if not isinstance(key, UUID):
             key = key.id
         return self.ports[key]
 
-    def connect(self, other: Any):
-        match other:
-            case SinglePortChannelDescriptor():
-                self.ports[other.owner.id] = other.port = self._connect(other)
-            case MultiPortChannelDescriptor():
-                self.ports[other.owner.id] = other.ports[self.owner.id] = self._connect(
-                    other
-                )
-            case _:
-                raise ValueError(f"Invalid object pair for linking: {self} <> {other}")
+    def connected(self) -> list[Port]:
+        return list(self.ports.values())
+
+    def _attach(self, port: Port, peer: ChannelDescriptor):
+        if self._own_side(port):
+            self.ports[peer.owner.id] = port
+        else:
+            self.forward = [*self.forward, port]
 
 
 class InputChannel(SinglePortChannelDescriptor, InputChannelDescriptor):
-    ...
+    __slots__ = ()
 
 
 class MultiInputChannel(MultiPortChannelDescriptor, InputChannelDescriptor):
-    ...
+    __slots__ = ()
 
 
 class OutputChannel(SinglePortChannelDescriptor, OutputChannelDescriptor):
-    ...
+    __slots__ = ()
 
 
 class MultiOutputChannel(MultiPortChannelDescriptor, OutputChannelDescriptor):
-    ...
+    __slots__ = ()
 
 
 type Inputs[V] = Mapping[Port, V]
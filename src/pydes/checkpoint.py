@@ -0,0 +1,355 @@
+"""Memory-mapped checkpoints of a running node
+
+`save_checkpoint` writes the state of every model of a `Node`, its clock and
+its routing table into a single file, class by class and `chunk_size` models
+at a time, so that saving never holds more than a chunk of encoded state.
+Fields holding a float, int or bool, and the models' event times, are stored
+as NumPy columns, one per field and chunk of each class, except for ints
+that do not fit in 64 bits. The remaining state of each model is packed with
+the codec into a blob.
+
+`load_checkpoint` maps the file rather than reading it: a model is only
+built when first accessed, from its columns and blob, and references to
+other models are resolved, and built, on demand. `Checkpoint.node` builds
+the models, or a subset of them, chunk by chunk, couples them again and
+schedules them where the checkpoint left off.
+
+Couplings through `Coupled` models are restored as direct connections
+between the atomic models at either end, and the hierarchy itself is not
+saved.
+
+File layout: the magic bytes, the arrays and blobs each aligned to 64 bytes,
+then a JSON footer locating them, followed by the footer's length.
+"""
+import json
+import mmap
+import struct
+from bisect import bisect_right
+from collections.abc import Iterable
+from os import PathLike
+from pathlib import Path
+from typing import Any, BinaryIO, Self
+from uuid import UUID
+
+import numpy as np
+
+from pydes.atomic import Atomic
+from pydes.codec import Codec
+from pydes.node import Node
+from pydes.registry import Registry
+from pydes.scheduler import Scheduler
+from pydes.utils import SimulationTime
+
+__all__ = (
+    "Checkpoint",
+    "load_checkpoint",
+    "save_checkpoint",
+)
+
+MAGIC = b"PYDESCK1"
+ALIGN = 64
+COLUMNS = {float: np.dtype("<f8"), int: np.dtype("<i8"), bool: np.dtype("?")}
+# the event times are columns of every class
+TIMES = ("time.last", "time.next")
+# fields not saved per model, the hierarchy and the event times
+SKIPPED = frozenset({"parent", "time"})
+
+
+def _columns(cls: type) -> dict[str, np.dtype]:
+    columns = {name: np.dtype("<f8") for name in TIMES}
+    for name, annotation in Codec.fields(cls).items():
+        if name not in SKIPPED and (dtype := COLUMNS.get(annotation)) is not None:
+            columns[name] = dtype
+    return columns
+
+
+class _Writer:
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    def write(self, data: bytes | np.ndarray) -> int:
+        """Append `data` at the next aligned offset, returns the offset"""
+        offset = self.file.tell()
+        if padding := -offset % ALIGN:
+            self.file.write(b"\0" * padding)
+            offset += padding
+        self.file.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+        return offset
+
+
+def save_checkpoint(node: Node, path: str | PathLike, chunk_size: int = 1 << 16):
+    """Write the models, clock and routing of `node` to `path`
+
+    The state of every model is validated first, so that an unchecked run
+    cannot save values the columns or the codec would misrepresent.
+    """
+    node.validate()
+    codec = Codec()
+    groups: dict[str, list[Atomic]] = {}
+    for model in node.models:
+        groups.setdefault(codec.register(type(model)), []).append(model)
+    classes, ids = [], []
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        writer = _Writer(file)
+        for tag, models in groups.items():
+            columns = _columns(codec.classes[tag])
+            chunks = []
+            for start in range(0, len(models), chunk_size):
+                chunk = models[start : start + chunk_size]
+                ids.extend(model.id.bytes for model in chunk)
+                chunks.append(_write_chunk(writer, codec, chunk, columns))
+            classes.append(
+                {
+                    "tag": tag,
+                    "count": len(models),
+                    "columns": {name: dtype.str for name, dtype in columns.items()},
+                    "chunks": chunks,
+                }
+            )
+
+        # the routing table by model position, with a table of channel names
+        index = {
+            model: i for i, model in enumerate(m for ms in groups.values() for m in ms)
+        }
+        names: dict[str, int] = {}
+        ports = []
+        for port, receivers in node.routes.items():
+            sender = index[port.output.owner]
+            output = names.setdefault(port.output.name, len(names))
+            for receiver, key in receivers:
+                if (i := index.get(receiver)) is not None:
+                    ports.append(
+                        (
+                            sender,
+                            output,
+                            i,
+                            names.setdefault(key.input.name, len(names)),
+                        )
+                    )
+        ids_array = np.array(ids, "S16")
+        footer = {
+            "time": node.time,
+            "events": node.events,
+            "count": len(ids),
+            "chunk_size": chunk_size,
+            "classes": classes,
+            "ids": writer.write(ids_array),
+            # sorted by id, for lookups by binary search
+            "order": writer.write(np.argsort(ids_array, kind="stable").astype("<i8")),
+            "channels": list(names),
+            "ports": writer.write(np.array(ports, "<i4").reshape(-1, 4)),
+            "port_count": len(ports),
+        }
+        data = json.dumps(footer).encode()
+        writer.write(data)
+        file.write(struct.pack("<Q", len(data)))
+
+
+def _write_chunk(
+    writer: _Writer, codec: Codec, models: list[Atomic], columns: dict[str, np.dtype]
+) -> dict[str, Any]:
+    states = [model.__getstate__() for model in models]
+    arrays = {
+        "time.last": np.array([model.time.last for model in models], "<f8"),
+        "time.next": np.array([model.time.next for model in models], "<f8"),
+    }
+    for name, dtype in columns.items():
+        if name in arrays:
+            continue
+        try:
+            arrays[name] = np.array(
+                [state["__dict__"][name] for state in states], dtype
+            )
+        except OverflowError:
+            # ints beyond 64 bits go into the blobs of this chunk
+            pass
+    ends, blobs = [], []
+    size = 0
+    for state in states:
+        rest = {
+            name: value
+            for name, value in state["__dict__"].items()
+            if name not in arrays and name not in SKIPPED
+        }
+        blob = codec.encode(
+            [rest, state["__pydantic_private__"], state["__pydantic_fields_set__"]]
+        )
+        blobs.append(blob)
+        size += len(blob)
+        ends.append(size)
+    return {
+        "rows": len(models),
+        "columns": {name: writer.write(array) for name, array in arrays.items()},
+        "ends": writer.write(np.array(ends, "<i8")),
+        "blobs": writer.write(b"".join(blobs)),
+    }
+
+
+class _References:
+    """Resolves the references in blobs to models of the checkpoint, building them"""
+
+    def __init__(self, checkpoint: "Checkpoint"):
+        self.checkpoint = checkpoint
+
+    def __getitem__(self, id: UUID) -> Atomic:
+        return self.checkpoint.lookup(id)
+
+
+class Checkpoint:
+    """A checkpoint mapped from a file, see `load_checkpoint`
+
+    Indexing builds the model at that position on first access; the models
+    of each class are stored together, in the order the node held them.
+    Classes that cannot be imported by name, e.g. those defined locally, must
+    be given in `classes`.
+    """
+
+    path: Path
+    time: float
+    events: int
+    ids: np.ndarray
+    starts: list[int]
+    """The position of the first model of each class"""
+
+    def __init__(self, path: str | PathLike, classes: Iterable[type] = ()):
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a checkpoint")
+        (length,) = struct.unpack("<Q", self.buffer[-8:])
+        footer = self.footer = json.loads(self.buffer[-8 - length : -8])
+        self.time, self.events = footer["time"], footer["events"]
+        self.classes = footer["classes"]
+        self.starts = np.cumsum([0] + [c["count"] for c in self.classes]).tolist()
+        self.ids = self.array(footer["ids"], "S16", footer["count"])
+        self.order = self.array(footer["order"], "<i8", footer["count"])
+        self.codec = Codec(_References(self), classes)
+        self.types = [self.codec.locate(c["tag"]) for c in self.classes]
+        self.models: dict[int, Atomic] = {}
+
+    def array(self, offset: int, dtype: Any, count: int) -> np.ndarray:
+        return np.frombuffer(self.buffer, dtype, count, offset)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> Atomic:
+        if (model := self.models.get(i)) is None:
+            c = bisect_right(self.starts, i) - 1
+            chunk, row = divmod(i - self.starts[c], self.footer["chunk_size"])
+            model = self.build(c, chunk, [row])[0]
+        return model
+
+    def index(self, id: UUID) -> int:
+        """The position of the model with `id`"""
+        key = id.bytes
+        if (i := int(np.searchsorted(self.ids, key, sorter=self.order))) < len(
+            self.ids
+        ):
+            position = int(self.order[i])
+            # compared as raw bytes, numpy strips trailing zero bytes from items
+            if self.ids[position : position + 1].tobytes() == key:
+                return position
+        raise KeyError(id)
+
+    def lookup(self, id: UUID) -> Atomic:
+        """The model with `id`"""
+        return self[self.index(id)]
+
+    def build(self, c: int, k: int, rows: Iterable[int]) -> list[Atomic]:
+        """The models at `rows` of chunk `k` of class `c`, built if not yet"""
+        info, cls = self.classes[c], self.types[c]
+        chunk = info["chunks"][k]
+        first = self.starts[c] + k * self.footer["chunk_size"]
+        count = chunk["rows"]
+        columns = {
+            name: self.array(offset, info["columns"][name], count)
+            for name, offset in chunk["columns"].items()
+        }
+        ends = self.array(chunk["ends"], "<i8", count)
+        base = chunk["blobs"]
+        models = []
+        for row in rows:
+            if (model := self.models.get(first + row)) is not None:
+                models.append(model)
+                continue
+            # registered before decoding, so that references back to it resolve
+            model = self.models[first + row] = cls.__new__(cls)
+            start = base + (int(ends[row - 1]) if row else 0)
+            rest, private, fields_set = self.codec.decode(
+                self.buffer[start : base + ends[row]]
+            )
+            state = {name: column[row].item() for name, column in columns.items()}
+            times = SimulationTime.__new__(SimulationTime)
+            times.last, times.next = state.pop("time.last"), state.pop("time.next")
+            model.__setstate__(
+                {
+                    # the hierarchy is not saved, restored models are top level
+                    "__dict__": {**state, "time": times, "parent": None, **rest},
+                    "__pydantic_extra__": None,
+                    "__pydantic_fields_set__": fields_set,
+                    "__pydantic_private__": private,
+                }
+            )
+            models.append(model)
+        return models
+
+    def node(
+        self,
+        indices: Iterable[int] | None = None,
+        scheduler: Scheduler | None = None,
+        checked: bool = True,
+        threads: int = 1,
+        registry: Registry | None = None,
+    ) -> Node:
+        """A node of the models at `indices`, all by default, coupled and scheduled
+
+        Only couplings between the restored models are made again.
+        """
+        if indices is None:
+            models = []
+            for c, info in enumerate(self.classes):
+                for k, chunk in enumerate(info["chunks"]):
+                    models += self.build(c, k, range(chunk["rows"]))
+            selected = None
+        else:
+            selected = sorted(set(indices))
+            models = [self[i] for i in selected]
+        footer = self.footer
+        channels = footer["channels"]
+        ports = self.array(footer["ports"], "<i4", 4 * footer["port_count"]).reshape(
+            -1, 4
+        )
+        if selected is not None:
+            mask = np.isin(ports[:, 0], selected) & np.isin(ports[:, 2], selected)
+            ports = ports[mask]
+        for sender, output, receiver, input in ports.tolist():
+            self[sender].channel(channels[output]).connect(
+                self[receiver].channel(channels[input])
+            )
+        node = Node(
+            models, scheduler, checked=checked, threads=threads, registry=registry
+        )
+        node.time, node.events = self.time, self.events
+        node.scheduler.reschedule(node.models)
+        return node
+
+    def close(self):
+        # views of the mapping must go before it can be closed
+        self.ids = self.order = None
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_checkpoint(path: str | PathLike, classes: Iterable[type] = ()) -> Checkpoint:
+    """Map the checkpoint written to `path`, models are built on first access"""
+    return Checkpoint(path, classes)
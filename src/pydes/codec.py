@@ -0,0 +1,405 @@
+"""Schema compiled msgpack encoding of pydantic models and dataclasses
+
+Every model or dataclass is packed as a msgpack extension holding an array
+of its field values in declaration order, prefixed with a short class tag,
+so instances carry neither field names nor `__pydantic_fields_set__` and the
+like. The encoder and decoder of each class are compiled once from its field
+definitions: UUID fields become 16 raw bytes, typed containers and optionals
+of them are converted element-wise, and everything else is left to msgpack
+with extension types for the values it cannot represent natively.
+
+Nested objects whose class sets `serialize_by_reference` are packed as their
+`id` only, which keeps the links between models from dragging the whole
+hierarchy into every snapshot; decoding resolves them through the models
+given to the codec. Instances of other classes defining `__setstate__` are
+packed as their tag and `__getstate__()`, and values neither msgpack nor the
+codec supports are rejected rather than pickled.
+"""
+import dataclasses
+import types
+import typing
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from collections.abc import Set as AbstractSet
+from importlib import import_module
+from typing import Annotated, Any, TypeAliasType, Union
+from uuid import UUID
+
+import msgpack
+import numpy as np
+from pydantic import BaseModel
+
+__all__ = (
+    "Codec",
+    "EXT_USER",
+)
+
+EXT_MODEL = 0
+EXT_UUID = 1
+EXT_REFERENCE = 2
+EXT_TUPLE = 3
+EXT_SET = 4
+EXT_FROZENSET = 5
+EXT_ARRAY = 6
+EXT_MISSING = 7
+EXT_INT = 8
+EXT_STATE = 9
+# extension codes from here on are free for subclasses
+EXT_USER = 16
+
+type Encoder = Callable[[Any], Any]
+type Decoder = Callable[[Any], Any]
+
+# a field left unset, e.g. a model name that is built on access
+_MISSING = object()
+_MISSING_EXT = msgpack.ExtType(EXT_MISSING, b"")
+
+
+def _tag(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _original(cls: type) -> type:
+    """The class `unchecked` or a `Profiler` derived `cls` from under the same tag"""
+    tag = _tag(cls)
+    return next(base for base in reversed(cls.__mro__) if _tag(base) == tag)
+
+
+def _unwrap(annotation: Any) -> Any:
+    while True:
+        if isinstance(annotation, TypeAliasType):
+            annotation = annotation.__value__
+        elif typing.get_origin(annotation) is Annotated:
+            annotation = typing.get_args(annotation)[0]
+        else:
+            return annotation
+
+
+def _fields(cls: type) -> dict[str, Any]:
+    """The field names of a model or dataclass mapped to their annotations"""
+    if issubclass(cls, BaseModel):
+        return {name: info.annotation for name, info in cls.model_fields.items()}
+    if (fields := getattr(cls, "__pydantic_fields__", None)) is not None:
+        return {name: info.annotation for name, info in fields.items()}
+    return {field.name: field.type for field in dataclasses.fields(cls)}
+
+
+class Codec:
+    """Encodes values with msgpack, compiling an encoder per model class
+
+    References packed for classes with `serialize_by_reference` are resolved
+    through `models` when decoding, a reference cannot be decoded without it.
+    Classes are located by their tag, those that cannot be imported by it,
+    e.g. classes defined locally, are located among `classes` and the classes
+    this codec encoded; the latest class registered under a tag wins.
+    Subclasses can support more types by extending `default` and `ext_hook`
+    with codes from `EXT_USER` on.
+    """
+
+    models: Mapping[UUID, Any] | None
+    classes: dict[str, type]
+    encoders: dict[type, Encoder]
+    decoders: dict[type, Decoder]
+
+    def __init__(
+        self, models: Mapping[UUID, Any] | None = None, classes: Iterable[type] = ()
+    ):
+        self.models = models
+        self.classes = {}
+        self.encoders = {}
+        self.decoders = {}
+        for cls in classes:
+            self.register(cls)
+
+    def register(self, cls: type) -> str:
+        """Make `cls` locatable when decoding, returns the tag it is packed with
+
+        A class `unchecked` or a `Profiler` derived from another is registered
+        as the original one.
+        """
+        cls = _original(cls)
+        self.classes[tag := _tag(cls)] = cls
+        return tag
+
+    def locate(self, tag: str) -> type:
+        """The class packed with `tag`"""
+        module, _, qualname = tag.partition(":")
+        try:
+            obj: Any = import_module(module)
+            for name in qualname.split("."):
+                obj = getattr(obj, name)
+            return obj
+        except (ImportError, AttributeError):
+            pass
+        try:
+            return self.classes[tag]
+        except KeyError:
+            raise TypeError(f"cannot locate class {tag}") from None
+
+    @staticmethod
+    def fields(cls: type) -> dict[str, Any]:
+        """The field annotations of a model or dataclass, unwrapped, in packing order"""
+        return {name: _unwrap(annotation) for name, annotation in _fields(cls).items()}
+
+    def encode(self, obj: Any) -> bytes:
+        return self.pack(self.model(obj))
+
+    def decode(self, data: bytes) -> Any:
+        return self.unpack(data)
+
+    def encode_batch(self, objs: Iterable[Any]) -> bytes:
+        """Encode `objs` one after another into a single buffer"""
+        packer = msgpack.Packer(
+            default=self.default, strict_types=True, autoreset=False
+        )
+        for obj in objs:
+            packer.pack(self.model(obj))
+        return packer.bytes()
+
+    def decode_batch(self, data: bytes) -> list[Any]:
+        unpacker = msgpack.Unpacker(ext_hook=self.ext_hook, strict_map_key=False)
+        unpacker.feed(data)
+        return list(unpacker)
+
+    def model(self, obj: Any) -> Any:
+        """Pack a model or dataclass in full, even if it is serialized by reference"""
+        cls = type(obj)
+        if (encoder := self.encoders.get(cls)) is None:
+            if not (issubclass(cls, BaseModel) or dataclasses.is_dataclass(cls)):
+                return obj
+            encoder = self.encoders[cls] = self.compile_encoder(cls)
+        return msgpack.ExtType(EXT_MODEL, self.pack(encoder(obj)))
+
+    def default(self, obj: Any) -> Any:
+        """Pack the values msgpack does not support natively"""
+        if isinstance(obj, UUID):
+            return msgpack.ExtType(EXT_UUID, obj.bytes)
+        if getattr(type(obj), "serialize_by_reference", False):
+            return msgpack.ExtType(EXT_REFERENCE, obj.id.bytes)
+        if isinstance(obj, BaseModel) or dataclasses.is_dataclass(obj):
+            return self.model(obj)
+        if isinstance(obj, tuple):
+            return msgpack.ExtType(EXT_TUPLE, self.pack(list(obj)))
+        if isinstance(obj, frozenset):
+            return msgpack.ExtType(EXT_FROZENSET, self.pack(list(obj)))
+        if isinstance(obj, set):
+            return msgpack.ExtType(EXT_SET, self.pack(list(obj)))
+        if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+            array = np.ascontiguousarray(obj)
+            return msgpack.ExtType(
+                EXT_ARRAY,
+                self.pack([array.dtype.str, list(array.shape), array.tobytes()]),
+            )
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if type(obj) is int:
+            # beyond 64 bits, e.g. the state of a bit generator
+            size = obj.bit_length() // 8 + 1
+            return msgpack.ExtType(EXT_INT, obj.to_bytes(size, signed=True))
+        if hasattr(type(obj), "__setstate__"):
+            tag = self.register(type(obj))
+            return msgpack.ExtType(EXT_STATE, self.pack([tag, obj.__getstate__()]))
+        # subclasses of builtins end up here too, as strict types are used
+        raise TypeError(f"cannot encode {type(obj).__qualname__} objects")
+
+    def ext_hook(self, code: int, data: bytes) -> Any:
+        if code == EXT_MODEL:
+            tag, *values = self.unpack(data)
+            # by class, a tag is taken over by the latest class defined under it
+            cls = self.locate(tag)
+            if (decoder := self.decoders.get(cls)) is None:
+                decoder = self.decoders[cls] = self.compile_decoder(cls)
+            return decoder(values)
+        if code == EXT_UUID:
+            return UUID(bytes=data)
+        if code == EXT_REFERENCE:
+            id = UUID(bytes=data)
+            if self.models is None:
+                raise ValueError(f"cannot resolve the reference to {id} without models")
+            return self.models[id]
+        if code == EXT_TUPLE:
+            return tuple(self.unpack(data))
+        if code == EXT_SET:
+            return set(self.unpack(data))
+        if code == EXT_FROZENSET:
+            return frozenset(self.unpack(data))
+        if code == EXT_ARRAY:
+            dtype, shape, buffer = self.unpack(data)
+            return np.frombuffer(buffer, dtype).reshape(shape).copy()
+        if code == EXT_MISSING:
+            return _MISSING
+        if code == EXT_INT:
+            return int.from_bytes(data, signed=True)
+        if code == EXT_STATE:
+            tag, state = self.unpack(data)
+            cls = self.locate(tag)
+            obj = cls.__new__(cls)
+            obj.__setstate__(state)
+            return obj
+        raise ValueError(f"unknown msgpack extension type {code}")
+
+    def pack(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=self.default, strict_types=True)
+
+    def unpack(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=self.ext_hook, strict_map_key=False)
+
+    def compile_encoder(self, cls: type) -> Encoder:
+        """Build the function packing an instance of `cls` as a list"""
+        tag = self.register(cls)
+        fields = [
+            (name, self.field_encoder(annotation))
+            for name, annotation in _fields(cls).items()
+        ]
+        private = bool(getattr(cls, "__private_attributes__", None))
+
+        if not issubclass(cls, BaseModel):
+
+            def encode_dataclass(obj: Any) -> list:
+                values: list[Any] = [tag]
+                for name, encode in fields:
+                    value = getattr(obj, name)
+                    values.append(value if encode is None else encode(value))
+                return values
+
+            return encode_dataclass
+
+        def encode_model(obj: BaseModel) -> list:
+            state = obj.__dict__
+            values: list[Any] = [tag]
+            for name, encode in fields:
+                if (value := state.get(name, _MISSING)) is _MISSING:
+                    values.append(_MISSING_EXT)
+                else:
+                    values.append(value if encode is None else encode(value))
+            if private:
+                values.append(obj.__pydantic_private__)
+            return values
+
+        return encode_model
+
+    def compile_decoder(self, cls: type) -> Decoder:
+        """Build the function recreating an instance of `cls` from its values
+
+        Instances are restored like unpickling would, without validation.
+        """
+        fields = [
+            (name, self.field_decoder(annotation))
+            for name, annotation in _fields(cls).items()
+        ]
+        private = bool(getattr(cls, "__private_attributes__", None))
+
+        if not issubclass(cls, BaseModel):
+
+            def decode_dataclass(values: list) -> Any:
+                obj = cls.__new__(cls)
+                for (name, decode), value in zip(fields, values):
+                    object.__setattr__(
+                        obj, name, value if decode is None else decode(value)
+                    )
+                return obj
+
+            return decode_dataclass
+
+        def decode_model(values: list) -> BaseModel:
+            state = {
+                name: value if decode is None else decode(value)
+                for (name, decode), value in zip(fields, values)
+                if value is not _MISSING
+            }
+            obj = cls.__new__(cls)
+            obj.__setstate__(
+                {
+                    "__dict__": state,
+                    "__pydantic_extra__": None,
+                    "__pydantic_fields_set__": set(state),
+                    "__pydantic_private__": values[len(fields)] if private else None,
+                }
+            )
+            return obj
+
+        return decode_model
+
+    def field_encoder(self, annotation: Any) -> Encoder | None:
+        """Compile the encoder of a field, None where msgpack handles the value"""
+        annotation = _unwrap(annotation)
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if annotation is UUID:
+            return _uuid_bytes
+        if origin in (Union, types.UnionType):
+            if (option := _optional(args)) is None:
+                return None
+            if (encode := self.field_encoder(option)) is None:
+                return None
+            return lambda value: None if value is None else encode(value)
+        if origin in (list, Sequence, tuple, set, frozenset, AbstractSet) and args:
+            if origin is tuple and args[-1] is not Ellipsis:
+                encoders = [self.field_encoder(arg) for arg in args]
+                if not any(encoders):
+                    return list
+                return lambda value: [
+                    item if encode is None else encode(item)
+                    for encode, item in zip(encoders, value)
+                ]
+            if (encode := self.field_encoder(args[0])) is None:
+                # lists are native, other collections are packed as lists
+                return None if origin in (list, Sequence) else list
+            return lambda value: [encode(item) for item in value]
+        if origin in (dict, Mapping) and len(args) == 2:
+            keys, values = self.field_encoder(args[0]), self.field_encoder(args[1])
+            if keys is None and values is None:
+                return None
+            keys, values = keys or _identity, values or _identity
+            return lambda value: {keys(k): values(v) for k, v in value.items()}
+        return None
+
+    def field_decoder(self, annotation: Any) -> Decoder | None:
+        """Compile the inverse of `field_encoder`"""
+        annotation = _unwrap(annotation)
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if annotation is UUID:
+            return _uuid_from_bytes
+        if origin in (Union, types.UnionType):
+            if (option := _optional(args)) is None:
+                return None
+            if (decode := self.field_decoder(option)) is None:
+                return None
+            return lambda value: None if value is None else decode(value)
+        if origin in (list, Sequence, tuple, set, frozenset, AbstractSet) and args:
+            collection = {tuple: tuple, frozenset: frozenset}.get(origin, list)
+            if origin in (set, AbstractSet):
+                collection = set
+            if origin is tuple and args[-1] is not Ellipsis:
+                decoders = [self.field_decoder(arg) for arg in args]
+                return lambda value: tuple(
+                    item if decode is None else decode(item)
+                    for decode, item in zip(decoders, value)
+                )
+            if (decode := self.field_decoder(args[0])) is None:
+                return None if origin in (list, Sequence) else collection
+            return lambda value: collection(decode(item) for item in value)
+        if origin in (dict, Mapping) and len(args) == 2:
+            keys, values = self.field_decoder(args[0]), self.field_decoder(args[1])
+            if keys is None and values is None:
+                return None
+            keys, values = keys or _identity, values or _identity
+            return lambda value: {keys(k): values(v) for k, v in value.items()}
+        return None
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _uuid_bytes(value: UUID) -> bytes:
+    return value.bytes
+
+
+def _uuid_from_bytes(value: bytes) -> UUID:
+    return UUID(bytes=value)
+
+
+def _optional(args: tuple) -> Any:
+    """The type of an optional, or None for any other union"""
+    if len(args) == 2 and type(None) in args:
+        return args[0] if args[1] is type(None) else args[1]
+    return None
@@ -1,6 +1,6 @@
-import pickle
+from collections.abc import Mapping
 from math import inf
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 from uuid import UUID
 
 from annotated_types import Ge
@@ -8,6 +8,8 @@ from numpy.random import PCG64DXSM, Generator
 from pydantic import BaseModel, ConfigDict, Field
 from typing_extensions import Self
 
+from pydes.codec import Codec
+
 type Time = Annotated[float, Ge(0)]
 
 
@@ -22,12 +24,22 @@ def new_id():
     return UUID(bytes=random.bytes(16))
 
 
+def model_id():
+    return new_id()
+
+
+codec = Codec()
+
+
 def serialize(model: Any) -> bytes:
-    return pickle.dumps(model)
+    return codec.encode(model)
 
 
-def deserialize(data: bytes) -> Any:
-    return pickle.loads(data)
+def deserialize(data: bytes, models: Mapping[UUID, Any] | None = None) -> Any:
+    """Decode `data`, resolving the models it references among `models`"""
+    if models is None:
+        return codec.decode(data)
+    return Codec(models, codec.classes.values()).decode(data)
 
 
 class Serializable(BaseModel):
@@ -35,12 +47,17 @@ class Serializable(BaseModel):
         extra="forbid",
     )
 
+    # nested instances are serialized as their `id` rather than in full
+    serialize_by_reference: ClassVar[bool] = False
+
     def model_serialize(self):
         return serialize(self)
 
     @classmethod
-    def model_deserialize(cls, data: bytes) -> Self:
-        return deserialize(data)
+    def model_deserialize(
+        cls, data: bytes, models: Mapping[UUID, Any] | None = None
+    ) -> Self:
+        return deserialize(data, models)
 
 
 class Mutable(Serializable):
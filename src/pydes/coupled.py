@@ -1,7 +1,67 @@
-from collections.abc import Set
+from collections.abc import Iterable, Iterator, Set
 
+from pydantic import model_validator
+
+from pydes.atomic import Atomic
+from pydes.channel import OutputChannelDescriptor, Port
 from pydes.model import Model
 
+__all__ = (
+    "Coupled",
+    "Routes",
+    "flatten",
+    "build_routes",
+)
+
+type Routes = dict[Port, list[tuple[Atomic, Port]]]
+
 
 class Coupled(Model):
     components: Set[Model]
+
+    @model_validator(mode="after")
+    def adopt_components(self):
+        for component in self.components:
+            component.parent = self
+        return self
+
+
+def flatten(models: Iterable[Model]) -> Iterator[Atomic]:
+    """Iterate over the atomic models of a (nested) hierarchy"""
+    for model in models:
+        if isinstance(model, Coupled):
+            yield from flatten(model.components)
+        else:
+            yield model
+
+
+def resolve(port: Port) -> Iterator[tuple[Atomic, Port]]:
+    """Follow `port` through coupled models to the atomic inputs it reaches
+
+    Yields the receiving model together with the port it receives on, i.e.
+    the key its `external_transition` inputs are looked up by.
+    """
+    channel = port.input
+    if not isinstance(channel.owner, Coupled):
+        yield channel.owner, port
+        return
+    # a coupled input continues into its components, a coupled output
+    # continues out to whatever the coupled model is connected to
+    for port in channel.forward if channel.direction else channel.connected():
+        yield from resolve(port)
+
+
+def build_routes(models: Iterable[Atomic]) -> Routes:
+    """Precompile the routing table of a flattened model hierarchy
+
+    Maps every output port of `models` directly to its atomic receivers, so
+    that delivering a message costs a single lookup whatever the depth of
+    the hierarchy it crosses.
+    """
+    routes: Routes = {}
+    for model in models:
+        for channel in model.channels():
+            if isinstance(channel, OutputChannelDescriptor):
+                for port in channel.connected():
+                    routes[port] = list(resolve(port))
+    return routes
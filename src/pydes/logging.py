@@ -1,7 +1,17 @@
-import logging
+"""The package logger, silent unless the application configures logging
 
-from rich.logging import RichHandler
+Per-event diagnostics belong in a binary trace, see `pydes.trace`.
+"""
+import logging
 
 log = logging.getLogger(__spec__.parent)
-log.setLevel(logging.DEBUG)
-log.addHandler(RichHandler())
+log.addHandler(logging.NullHandler())
+
+
+def rich_logging(level: int = logging.INFO):
+    """Print the package's log records through a `RichHandler`"""
+    # rich is only imported once pretty output is asked for
+    from rich.logging import RichHandler
+
+    log.setLevel(level)
+    log.addHandler(RichHandler())
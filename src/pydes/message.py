@@ -1,10 +1,23 @@
 from typing import Any
 from uuid import UUID
 
-from .core import Immutable
+from .core import Field, Immutable, Time
 
 
 class Message(Immutable):
     destination: UUID
-    timestamp: int
+    timestamp: int | Time
     content: Any
+    port: int = Field(
+        default=0,
+        description="Index of the receiving port in the routing table shared by all"
+        " processes",
+    )
+    sequence: int = Field(
+        default=0,
+        description="Identifies the message among all those sent during a run",
+    )
+    negative: bool = Field(
+        default=False,
+        description="An anti-message, cancelling the message with the same sequence",
+    )
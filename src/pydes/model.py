@@ -1,17 +1,37 @@
 from __future__ import annotations
 
 from abc import ABC
+from collections.abc import Iterator
+from functools import cache
+from typing import Any, ClassVar
 from uuid import UUID
 
-from pydantic import ConfigDict, Field, model_validator
+from pydantic import (
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    SerializationInfo,
+    SerializerFunctionWrapHandler,
+    model_serializer,
+    model_validator,
+)
 
-from pydes.channel import InputChannel, OutputChannel
+from pydes.channel import ChannelDescriptor
 from pydes.core import Mutable, model_id
+from pydes.streams import Stream
 from pydes.utils import SimulationTime
 
 
 class Model(Mutable, ABC):
-    model_config = ConfigDict(ignored_types=(InputChannel, OutputChannel))
+    # bound channels and the index assigned by a `Registry` are kept outside
+    # of `__dict__` so that they are not part of the model's state when
+    # dumping, copying or pickling
+    __slots__ = ("_channels", "_index")
+
+    model_config = ConfigDict(ignored_types=(ChannelDescriptor,))
+
+    # models refer to each other (parents, components, receivers) by identity
+    serialize_by_reference: ClassVar[bool] = True
 
     id: UUID = Field(default_factory=model_id, frozen=True)
     time: SimulationTime = Field(default_factory=SimulationTime, frozen=True)
@@ -20,20 +40,76 @@ class Model(Mutable, ABC):
         frozen=True,
         description="The Model name used for labelling, set automatically if not provided.",
     )
-    parent: Model = Field(
+    parent: Model | None = Field(
         default=None,
         description="The parent model in the model heirarchy",
     )
 
+    # created on first use, a private attribute so that it is part of the
+    # state saved by Time Warp and sent back from partition processes
+    _rng: Stream | None = PrivateAttr(None)
+
     def __hash__(self):
         return self.id.int
 
     @model_validator(mode="after")
     def default_name(self):
         if not self.name:
-            object.__setattr__(self, "name", f"{self.__class__.__name__}-{self.id}")
+            # built on access by `__getattr__` rather than stored per model
+            self.__dict__.pop("name", None)
         return self
 
+    @model_serializer(mode="wrap")
+    def dump_name(
+        self, handler: SerializerFunctionWrapHandler, info: SerializationInfo
+    ) -> Any:
+        """Dump default names too, though `default_name` leaves them unset"""
+        data = handler(self)
+        if (
+            isinstance(data, dict)
+            and "name" not in data
+            and not (info.exclude and "name" in info.exclude)
+            and not (info.include and "name" not in info.include)
+            and not (info.exclude_defaults or info.exclude_unset)
+        ):
+            data["name"] = self.name
+        return data
+
+    def __getattr__(self, item: str) -> Any:
+        if item == "name":
+            return f"{self.__class__.__name__}-{self.id}"
+        return super().__getattr__(item)
+
+    def channel(self, name: str) -> ChannelDescriptor:
+        """Return the named channel bound to this model, used for connecting"""
+        return getattr(type(self), name).bind(self)
+
+    def channels(self) -> Iterator[ChannelDescriptor]:
+        """Iterate over every channel declared on the model, bound to it"""
+        for channel in _channels(type(self)):
+            yield channel.bind(self)
+
+    @property
+    def rng(self) -> Stream:
+        """The model's own random stream, seeded from `SEED` and its id"""
+        private = self.__pydantic_private__
+        if (stream := private["_rng"]) is None:
+            stream = private["_rng"] = Stream(self.id)
+        return stream
+
     @property
     def path(self) -> str:
+        if self.parent is None:
+            return self.name
         return f"{self.parent.path}.{self.name}"
+
+
+@cache
+def _channels(cls: type[Model]) -> tuple[ChannelDescriptor, ...]:
+    """The channels declared on `cls` and its bases, found once per class"""
+    channels: dict[str, ChannelDescriptor] = {}
+    for base in cls.__mro__:
+        for name, value in vars(base).items():
+            if isinstance(value, ChannelDescriptor):
+                channels.setdefault(name, value)
+    return tuple(channels.values())
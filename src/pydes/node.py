@@ -1,2 +1,294 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Any
+
+from pydes.atomic import Atomic, unchecked
+from pydes.channel import Port
+from pydes.core import INFINITY, Time
+from pydes.coupled import Routes, build_routes, flatten
+from pydes.errors import SimulationError
+from pydes.model import Model
+from pydes.registry import Registry
+from pydes.scheduler import Scheduler
+from pydes.trace import TraceWriter
+
+__all__ = ("Node",)
+
+
 class Node:
-    """The top level simulation kernel within a process/thread"""
+    """The top level simulation kernel within a process/thread
+
+    Drives a set of `Atomic` models through the Parallel DEVS cycle: all
+    models imminent at the current time produce their outputs, the outputs
+    are routed to the connected input ports, then every affected model
+    undergoes its confluent, internal or external transition and is
+    rescheduled. A model's `time.last` is the current time from its
+    transition on. `Coupled` models are flattened into their atomic components
+    and their couplings precompiled into `routes` when the node is built.
+    Outputs for models that belong to another node are left in `outbox`.
+
+    Models are numbered by `registry`, the simulation's if given, and their
+    input bags are kept in a list by index. Receivers in other nodes are
+    numbered too and have no bag.
+
+    Events are recorded into `trace` when given, see `pydes.trace`.
+
+    With `checked=False` the models are switched to their `unchecked`
+    classes, so state assignments in the transition functions skip pydantic
+    validation; call `validate` to check the whole state at once. `close`
+    switches them back.
+
+    With `threads > 1` the outputs and transitions of large imminent sets
+    run in chunks of at least `chunk_size` models on a thread pool, which
+    pays off on free-threaded builds or when models release the GIL, e.g.
+    inside NumPy. Outputs are merged and models rescheduled in the serial
+    order, so results are identical to a serial run as long as models do
+    not share mutable state, e.g. they draw from their own `Model.rng`.
+    """
+
+    models: list[Atomic]
+    scheduler: Scheduler
+    routes: Routes
+    registry: Registry
+    inbox: list[dict[Port, Any] | None]
+    outbox: list[tuple[Atomic, Port, Any]]
+    time: Time
+    events: int
+    threads: int
+    chunk_size: int
+    executor: ThreadPoolExecutor | None
+    trace: TraceWriter | None
+    classes: list[type[Model]]
+
+    def __init__(
+        self,
+        models: Iterable[Model],
+        scheduler: Scheduler | None = None,
+        checked: bool = True,
+        threads: int = 1,
+        chunk_size: int = 32,
+        registry: Registry | None = None,
+        trace: TraceWriter | None = None,
+    ):
+        self.models = list(flatten(models))
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.routes = build_routes(self.models)
+        # the models' own classes, switched back by `close`
+        self.classes = []
+        if not checked:
+            self.classes = [type(model) for model in self.models]
+            for model in self.models:
+                model.__class__ = unchecked(type(model))
+        self.registry = Registry() if registry is None else registry
+        self.registry.update(self.models)
+        self.registry.update(
+            receiver for receivers in self.routes.values() for receiver, _ in receivers
+        )
+        # one reusable input bag per model, cleared after every transition
+        self.inbox = [None] * len(self.registry)
+        for model in self.models:
+            self.inbox[model._index] = {}
+        # outputs routed to models of other nodes, see `parallel`
+        self.outbox = []
+        self.time = 0
+        self.events = 0
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.trace = trace
+        self.executor = None
+        if threads > 1:
+            self.executor = ThreadPoolExecutor(threads, thread_name_prefix="pydes")
+
+    def close(self):
+        """Shut the thread pool down, close the trace and check the models again"""
+        for model, cls in zip(self.models, self.classes):
+            model.__class__ = cls
+        self.classes = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def map[T](
+        self, function: Callable[[list[Atomic]], T], models: list[Atomic]
+    ) -> list[T]:
+        """Apply `function` to chunks of `models`, returns the results in order
+
+        Runs on the thread pool only when there are enough models to give
+        two threads a chunk of at least `chunk_size`.
+        """
+        executor, size = self.executor, self.chunk_size
+        if executor is None or len(models) < 2 * size:
+            return [function(models)]
+        size = max(size, -(-len(models) // self.threads))
+        chunks = [models[i : i + size] for i in range(0, len(models), size)]
+        return list(executor.map(function, chunks))
+
+    def initialize(self, time: Time = 0):
+        """Set every model's initial time and schedule it"""
+        self.time = time
+        for model in self.models:
+            model.invalidate_time_advance()
+            model.time.last = time
+            model.time.next = time + self.advance(model)
+        self.scheduler.reschedule(self.models)
+
+    def validate(self):
+        """Validate the state of every model"""
+        for model in self.models:
+            model.validate_state()
+
+    @staticmethod
+    def time_advance(model: Atomic) -> Time:
+        if (ta := model.time_advance()) < 0:
+            raise SimulationError(f"{model.name} returned negative time advance {ta}")
+        return ta
+
+    @classmethod
+    def advance(cls, model: Atomic) -> Time:
+        """The time advance of `model`, reused while its declared fields are unchanged
+
+        See `Atomic.time_advance_fields`.
+        """
+        if model.time_advance_fields is None:
+            return cls.time_advance(model)
+        if (ta := getattr(model, "_advance", None)) is None:
+            ta = cls.time_advance(model)
+            object.__setattr__(model, "_advance", ta)
+        return ta
+
+    def next_time(self) -> Time:
+        return self.scheduler.peek_time()
+
+    def step(self) -> Time:
+        """Process every model imminent at the next event time
+
+        Returns the time of the processed events, or `INFINITY` when no
+        model is scheduled.
+        """
+        if (time := self.scheduler.peek_time()) == INFINITY:
+            return INFINITY
+        imminent, receivers = self.collect(time)
+        self.transition(time, imminent, receivers)
+        return time
+
+    def collect(self, time: Time) -> tuple[list[Atomic], list[Atomic]]:
+        """Pop the models imminent at `time` and route their outputs
+
+        Returns the imminent models and the models that received input.
+        Outputs for models outside this node are appended to `outbox`.
+        """
+        scheduler = self.scheduler
+        if scheduler.peek_time() != time:
+            return [], []
+        imminent = scheduler.pop_imminent()
+
+        inbox, routes, outbox = self.inbox, self.routes, self.outbox
+        receivers: list[Atomic] = []
+        if self.executor is None:
+            outputs = (model.output() for model in imminent)
+        else:
+            outputs = chain.from_iterable(self.map(_outputs, imminent))
+        if (trace := self.trace) is not None:
+            outputs = list(outputs)
+            trace.messages(time, imminent, outputs)
+        for output in outputs:
+            for port, value in output.items():
+                # unconnected output channels have no route
+                for receiver, key in routes.get(port, ()):
+                    if (bag := inbox[receiver._index]) is None:
+                        outbox.append((receiver, key, value))
+                        continue
+                    if not bag:
+                        receivers.append(receiver)
+                    bag[key] = value
+        return imminent, receivers
+
+    def deliver(
+        self,
+        messages: Iterable[tuple[Atomic, Port, Any]],
+        receivers: list[Atomic],
+    ):
+        """Put outputs sent by other nodes into the receivers' input bags"""
+        inbox = self.inbox
+        for receiver, key, value in messages:
+            bag = inbox[receiver._index]
+            if not bag:
+                receivers.append(receiver)
+            bag[key] = value
+
+    def transition(
+        self, time: Time, imminent: list[Atomic], receivers: list[Atomic]
+    ) -> list[Atomic]:
+        """Apply the transitions of the models collected at `time`
+
+        Returns the models that changed, which reuses the `imminent` list.
+        """
+        inbox = self.inbox
+        if (trace := self.trace) is not None:
+            trace.transitions(time, imminent, receivers, inbox)
+        if self.executor is None:
+            self._internal(time, imminent)
+            # imminent receivers were already handled as confluent
+            receivers = [model for model in receivers if inbox[model._index]]
+            moved = self._external(time, receivers)
+        else:
+            self.map(partial(self._internal, time), imminent)
+            receivers = [model for model in receivers if inbox[model._index]]
+            external = partial(self._external, time)
+            moved = list(chain.from_iterable(self.map(external, receivers)))
+
+        # popped imminent models always go back, receivers only if they moved
+        self.scheduler.reschedule(imminent + moved if moved else imminent)
+        changed = imminent
+        changed += receivers
+        self.time = time
+        self.events += len(changed)
+        return changed
+
+    def _internal(self, time: Time, models: list[Atomic]):
+        inbox, advance = self.inbox, self.advance
+        for model in models:
+            model.time.last = time
+            if bag := inbox[model._index]:
+                model.confluent_transition(bag)
+                bag.clear()
+            else:
+                model.internal_transition()
+            model.time.next = time + advance(model)
+
+    def _external(self, time: Time, models: list[Atomic]) -> list[Atomic]:
+        """Apply external transitions, returns the models whose next time moved"""
+        inbox, advance = self.inbox, self.advance
+        moved = []
+        for model in models:
+            bag, times = inbox[model._index], model.time
+            times.last = time
+            model.external_transition(bag)
+            bag.clear()
+            previous = times.next
+            times.next = next_time = time + advance(model)
+            if next_time != previous:
+                moved.append(model)
+        return moved
+
+    def run(self, until: Time = INFINITY, max_events: int | None = None) -> Time:
+        """Step the simulation until `until` or until `max_events` transitions
+
+        Returns the simulation time reached.
+        """
+        limit = INFINITY if max_events is None else self.events + max_events
+        step, next_time = self.step, self.next_time
+        while self.events < limit and (time := next_time()) <= until:
+            if time == INFINITY:
+                break
+            step()
+        return self.time
+
+
+def _outputs(models: list[Atomic]) -> list[dict[Port, Any]]:
+    return [model.output() for model in models]
@@ -0,0 +1,691 @@
+"""Conservative parallel execution of partitioned models
+
+Every partition runs in its own forked process with its own `Node`, and a
+coordinator in the calling process synchronizes them with a lower bound on
+timestamp (LBTS) protocol. Each round every node reports its next event time
+and the earliest time it could send anything to another partition, which is
+bounded by the `lookahead` declared on its boundary output channels. Events
+strictly before the smallest such bound cannot be affected by other
+partitions, so the nodes process them independently. Once the next event
+reaches the bound, all nodes take that step together: outputs are exchanged
+as `Message`s before any transition, exactly as the sequential kernel would
+deliver them. With the default lookahead of 0 every step is synchronized.
+
+With an `optimism` window the nodes instead run Time Warp: each round every
+node executes up to that many steps speculatively, saving the fields its
+transitions change, and rolls back when a straggler message arrives with a
+timestamp it has already passed. Messages sent by the undone steps are
+cancelled with anti-messages, but only once re-execution has passed them
+without sending the same message again (lazy cancellation), which keeps
+rollbacks from echoing between partitions. Snapshots older than the global
+virtual time (GVT), below which no rollback can reach, are discarded.
+
+Results are identical to a sequential run as long as models share no state
+outside of their messages, e.g. a common random number generator.
+"""
+import multiprocessing
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from functools import cache
+from itertools import count
+from math import nextafter
+from multiprocessing.connection import Connection
+from traceback import format_exc
+from typing import Any, Literal
+
+import msgpack
+
+from pydes.atomic import Atomic
+from pydes.channel import OutputChannelDescriptor, Port
+from pydes.codec import EXT_USER
+from pydes.codec import Codec as BaseCodec
+from pydes.core import INFINITY, Time
+from pydes.coupled import Coupled, build_routes, flatten
+from pydes.errors import SimulationError
+from pydes.message import Message
+from pydes.model import Model
+from pydes.node import Node
+from pydes.profiling import Profiler
+from pydes.registry import Registry
+from pydes.scheduler import Scheduler
+from pydes.trace import TraceWriter
+from pydes.transport import RingBuffer
+
+__all__ = (
+    "Codec",
+    "Worker",
+    "OptimisticWorker",
+    "PartitionMetrics",
+    "Report",
+    "Transport",
+    "run_partitions",
+)
+
+type Transport = Literal["pipe", "shared_memory"]
+
+# snapshot key of the private attributes, which are not fields
+PRIVATE = "__pydantic_private__"
+EXT_PORT = EXT_USER
+
+
+@dataclass(slots=True)
+class PartitionMetrics:
+    events: int = 0
+    """Transitions that were committed"""
+    processed: int = 0
+    """Transitions executed, including those rolled back"""
+    rollbacks: int = 0
+    rolled_back: int = 0
+    """Transitions undone by rollbacks"""
+    anti_messages: int = 0
+    profile: dict[str, Any] | None = None
+    """The counters of the partition's `Profiler`, when profiled"""
+
+    @property
+    def efficiency(self) -> float:
+        """The fraction of the executed transitions that were committed"""
+        return self.events / self.processed if self.processed else 1.0
+
+
+@dataclass(slots=True)
+class Report:
+    time: Time
+    """The simulation time reached"""
+    partitions: list[PartitionMetrics] = field(default_factory=list)
+
+    @property
+    def events(self) -> int:
+        return sum(metrics.events for metrics in self.partitions)
+
+    @property
+    def rollbacks(self) -> int:
+        return sum(metrics.rollbacks for metrics in self.partitions)
+
+    @property
+    def efficiency(self) -> float:
+        processed = sum(metrics.processed for metrics in self.partitions)
+        return self.events / processed if processed else 1.0
+
+
+class Codec(BaseCodec):
+    """Encodes data exchanged between processes, passing ports by reference
+
+    Every process holds a forked copy of the whole model hierarchy, so models
+    are sent by id and ports by their index in the shared routing table, and
+    resolved to the receiving process's own copies.
+    """
+
+    ports: list[Port]
+    index: dict[Port, int]
+
+    def __init__(self, models: Iterable[Model], ports: Iterable[Port]):
+        super().__init__({model.id: model for model in models})
+        self.ports = list(ports)
+        self.index = {port: i for i, port in enumerate(self.ports)}
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, Port):
+            return msgpack.ExtType(EXT_PORT, self.index[obj].to_bytes(4))
+        return super().default(obj)
+
+    def ext_hook(self, code: int, data: bytes) -> Any:
+        if code == EXT_PORT:
+            return self.ports[int.from_bytes(data)]
+        return super().ext_hook(code, data)
+
+
+class Worker:
+    """Drives the `Node` of one partition on behalf of the coordinator"""
+
+    rank: int
+    node: Node
+    codec: Codec
+    owners: dict[Atomic, int]
+    boundary: list[tuple[Atomic, Time]]
+    metrics: PartitionMetrics
+    profiler: Profiler | None = None
+    sequence: Iterator[int]
+    writers: dict[int, RingBuffer]
+    readers: list[RingBuffer]
+
+    def __init__(
+        self,
+        rank: int,
+        size: int,
+        node: Node,
+        codec: Codec,
+        owners: dict[Atomic, int],
+        rings: Mapping[tuple[int, int], RingBuffer] | None = None,
+    ):
+        self.rank = rank
+        self.node = node
+        self.codec = codec
+        self.owners = owners
+        self.metrics = PartitionMetrics()
+        # shared memory to and from the other partitions, keyed by (source, target)
+        rings = {} if rings is None else rings
+        self.writers = {dst: ring for (src, dst), ring in rings.items() if src == rank}
+        self.readers = [
+            ring for (src, dst), ring in sorted(rings.items()) if dst == rank
+        ]
+        # striding by the number of partitions keeps sequences unique
+        self.sequence = count(rank, size)
+        # output channels with receivers in other partitions and their lookahead
+        self.boundary = []
+        inbox, routes = node.inbox, node.routes
+        for model in node.models:
+            for channel in model.channels():
+                if not isinstance(channel, OutputChannelDescriptor):
+                    continue
+                if any(
+                    inbox[receiver._index] is None
+                    for port in channel.connected()
+                    for receiver, _ in routes.get(port, ())
+                ):
+                    self.boundary.append((model, channel.lookahead))
+
+    def earliest_output(self) -> Time:
+        """A lower bound on the time of the next message to another partition
+
+        Boundary models only send when imminent, and any input that makes
+        them imminent earlier arrives no sooner than this node's next event.
+        """
+        next_time = self.node.next_time()
+        return min(
+            (
+                min(model.time.next, next_time + lookahead)
+                for model, lookahead in self.boundary
+            ),
+            default=INFINITY,
+        )
+
+    def advance(self, bound: Time):
+        """Process every event before `bound`, which no other partition can affect"""
+        node = self.node
+        while node.next_time() < bound:
+            node.step()
+            if node.outbox:
+                receiver, key, _ = node.outbox[0]
+                raise SimulationError(
+                    f"{key.output.owner.name} sent to {receiver.name} at {node.time}"
+                    f" before the time allowed by its lookahead ({bound})"
+                )
+
+    def post(self) -> list[tuple[int, Message]]:
+        """Turn the outbox into messages paired with their destination partition"""
+        time, codec, sequence = self.node.time, self.codec, self.sequence
+        messages = [
+            (
+                self.owners[receiver],
+                Message(
+                    destination=receiver.id,
+                    timestamp=time,
+                    content=value,
+                    port=codec.index[key],
+                    sequence=next(sequence),
+                ),
+            )
+            for receiver, key, value in self.node.outbox
+        ]
+        self.node.outbox.clear()
+        return messages
+
+    def pack(self, messages: Iterable[tuple[int, Message]]) -> dict[int, bytes]:
+        """Send messages through shared memory, or encode them for the coordinator
+
+        Returns one payload per destination partition for the messages that
+        have no ring buffer or did not fit in it.
+        """
+        batches: dict[int, list[Message]] = {}
+        encode, writers = self.codec.encode, self.writers
+        for rank, message in messages:
+            if rank not in batches and (ring := writers.get(rank)) is not None:
+                if ring.write(
+                    message.destination,
+                    message.timestamp,
+                    encode(message.content),
+                    message.port,
+                    message.sequence,
+                    message.negative,
+                ):
+                    continue
+            # once a ring is full, later messages follow the overflow
+            batches.setdefault(rank, []).append(message)
+        for ring in writers.values():
+            ring.flush()
+        return {rank: self.codec.encode_batch(batch) for rank, batch in batches.items()}
+
+    def unpack(self, payloads: Iterable[bytes]) -> list[Message]:
+        """Read the messages sent to this partition, from shared memory first"""
+        decode = self.codec.decode
+        messages = [
+            Message(
+                destination=record.destination,
+                timestamp=record.timestamp,
+                content=decode(record.payload),
+                port=record.port,
+                sequence=record.sequence,
+                negative=record.negative,
+            )
+            for ring in self.readers
+            for record in ring
+        ]
+        for payload in payloads:
+            messages += self.codec.decode_batch(payload)
+        return messages
+
+    def resolve(self, message: Message) -> tuple[Atomic, Port, Any]:
+        codec = self.codec
+        return (
+            codec.models[message.destination],
+            codec.ports[message.port],
+            message.content,
+        )
+
+    def state(self) -> bytes:
+        """Encode the final state of every model, without its place in the hierarchy"""
+        states = {}
+        for model in self.node.models:
+            state = model.__getstate__()
+            state["__dict__"] = {
+                name: value
+                for name, value in state["__dict__"].items()
+                if name != "parent"
+            }
+            states[model.id] = state
+        return self.codec.encode(states)
+
+    def serve(self, conn: Connection):
+        node = self.node
+        while True:
+            conn.send(("time", node.next_time(), self.earliest_output()))
+            match conn.recv():
+                case ("advance", bound):
+                    self.advance(bound)
+                case ("step", time):
+                    imminent, receivers = node.collect(time)
+                    node.time = time
+                    conn.send(("sent", self.pack(self.post())))
+                    _, payloads = conn.recv()
+                    messages = self.unpack(payloads)
+                    node.deliver(map(self.resolve, messages), receivers)
+                    node.transition(time, imminent, receivers)
+                case ("stop",):
+                    self.stop(conn)
+                    return
+
+    def stop(self, conn: Connection):
+        self.node.close()
+        if self.profiler is not None:
+            self.profiler.detach()
+            self.metrics.profile = self.profiler.export()
+        # rollbacks take the transitions they undo back out of the node's count
+        self.metrics.events = self.node.events
+        self.metrics.processed = self.node.events + self.metrics.rolled_back
+        conn.send(("done", self.state(), self.node.time, self.metrics))
+
+
+@cache
+def variables(cls: type[Atomic]) -> tuple[str, ...]:
+    """The fields of `cls` that its transitions can change"""
+    return (
+        "time",
+        *(
+            name
+            for name, info in cls.model_fields.items()
+            if not info.frozen and name != "parent"
+        ),
+    )
+
+
+@dataclass(slots=True)
+class Step:
+    """A step executed speculatively, kept until the GVT passes it"""
+
+    time: Time
+    saved: dict[Atomic, dict[str, bytes]]
+    """The serialized fields each changed model had before the step"""
+    received: list[Message]
+    sent: list[tuple[int, Message]]
+
+
+class OptimisticWorker(Worker):
+    """Drives the `Node` of one partition speculatively with Time Warp
+
+    The serialized variables of every model are cached, and after each step
+    only the fields whose serialization changed are saved, so a step costs
+    memory in proportion to the state it touched.
+    """
+
+    optimism: int
+    until: Time
+    current: dict[Atomic, dict[str, bytes]]
+    pending: dict[Time, dict[int, Message]]
+    steps: deque[Step]
+    floor: Time
+    suspended: dict[tuple, tuple[int, Message]]
+    """Messages sent by undone steps, until re-execution sends or passes them"""
+    outgoing: list[tuple[int, Message]]
+
+    def __init__(self, *args, optimism: int, until: Time, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.optimism = optimism
+        self.until = until
+        self.current = {model: self.save(model) for model in self.node.models}
+        # messages from other partitions waiting for their step
+        self.pending = {}
+        self.steps = deque()
+        # the time of the latest committed step
+        self.floor = self.node.time
+        # messages to send at the end of the round
+        self.suspended = {}
+        self.outgoing = []
+
+    def save(self, model: Atomic) -> dict[str, bytes]:
+        encode, state = self.codec.encode, model.__dict__
+        saved = {name: encode(state[name]) for name in variables(type(model))}
+        saved[PRIVATE] = encode(model.__pydantic_private__)
+        return saved
+
+    def restore(self, model: Atomic, saved: dict[str, bytes]):
+        decode, state = self.codec.decode, model.__dict__
+        for name, data in saved.items():
+            if name == PRIVATE:
+                object.__setattr__(model, PRIVATE, decode(data))
+            else:
+                state[name] = decode(data)
+        model.invalidate_time_advance()
+        self.current[model].update(saved)
+
+    def checkpoint(self, changed: Iterable[Atomic]) -> dict[Atomic, dict[str, bytes]]:
+        saved = {}
+        for model in changed:
+            current, new = self.current[model], self.save(model)
+            saved[model] = {
+                name: current[name]
+                for name, data in new.items()
+                if current[name] != data
+            }
+            self.current[model] = new
+        return saved
+
+    def next_time(self) -> Time:
+        return min(self.node.next_time(), min(self.pending, default=INFINITY))
+
+    def forward(self) -> bool:
+        """Execute the next step, returns False when there is none before `until`"""
+        if (time := self.next_time()) > self.until or time == INFINITY:
+            return False
+        node = self.node
+        imminent, receivers = node.collect(time)
+        received = list(self.pending.pop(time, {}).values())
+        node.deliver(map(self.resolve, received), receivers)
+        changed = node.transition(time, imminent, receivers)
+        sent = self.post()
+        for i, (rank, message) in enumerate(sent):
+            if (previous := self.suspended.pop(self.key(message), None)) is None:
+                self.outgoing.append((rank, message))
+            else:
+                # already sent before the rollback, so the receiver keeps it
+                sent[i] = previous
+        self.steps.append(Step(time, self.checkpoint(changed), received, sent))
+        return True
+
+    def rollback(self, time: Time):
+        """Undo every step at or after `time`"""
+        node, restored = self.node, {}
+        while self.steps and self.steps[-1].time >= time:
+            step = self.steps.pop()
+            for model, saved in step.saved.items():
+                self.restore(model, saved)
+                restored[model] = None
+            for message in step.received:
+                self.pending.setdefault(step.time, {})[message.sequence] = message
+            for rank, message in step.sent:
+                self.suspended[self.key(message)] = (rank, message)
+            node.events -= len(step.saved)
+            self.metrics.rolled_back += len(step.saved)
+        node.scheduler.reschedule(list(restored))
+        node.time = self.steps[-1].time if self.steps else self.floor
+        self.metrics.rollbacks += 1
+
+    def receive(self, messages: Iterable[Message]):
+        for message in messages:
+            if self.steps and message.timestamp <= self.steps[-1].time:
+                # a straggler, or an anti-message for a processed message
+                self.rollback(message.timestamp)
+            bucket = self.pending.setdefault(message.timestamp, {})
+            if message.negative:
+                del bucket[message.sequence]
+                if not bucket:
+                    del self.pending[message.timestamp]
+            else:
+                bucket[message.sequence] = message
+
+    def key(self, message: Message) -> tuple:
+        return (
+            message.destination,
+            message.timestamp,
+            message.port,
+            self.codec.encode(message.content),
+        )
+
+    def cancel(self) -> list[tuple[int, Message]]:
+        """Anti-messages for the suspended messages that re-execution has passed"""
+        time, cancelled = self.next_time(), []
+        for key, (rank, message) in list(self.suspended.items()):
+            if message.timestamp < time:
+                del self.suspended[key]
+                cancelled.append((rank, message.model_copy(update={"negative": True})))
+        self.metrics.anti_messages += len(cancelled)
+        return cancelled
+
+    def fossil_collect(self, gvt: Time):
+        """Discard the steps before `gvt`, which can no longer be rolled back"""
+        steps = self.steps
+        while steps and steps[0].time < gvt:
+            self.floor = steps.popleft().time
+
+    def serve(self, conn: Connection):
+        while True:
+            match conn.recv():
+                case ("deliver", payloads, gvt):
+                    self.receive(self.unpack(payloads))
+                    self.fossil_collect(gvt)
+                    for _ in range(self.optimism):
+                        if not self.forward():
+                            break
+                    # anti-messages go first, they only cancel earlier rounds
+                    messages = self.cancel()
+                    messages += self.outgoing
+                    self.outgoing.clear()
+                    lowest = min(
+                        (message.timestamp for _, message in messages), default=INFINITY
+                    )
+                    conn.send(("sent", self.pack(messages), self.next_time(), lowest))
+                case ("stop",):
+                    self.stop(conn)
+                    return
+
+
+def _work(worker: Callable[[], Worker], conn: Connection):
+    try:
+        worker().serve(conn)
+    except BaseException:
+        conn.send(("error", format_exc()))
+    finally:
+        conn.close()
+
+
+def _receive(conn: Connection) -> tuple:
+    try:
+        message = conn.recv()
+    except EOFError:
+        raise SimulationError("a partition process exited unexpectedly") from None
+    if message[0] == "error":
+        raise SimulationError(f"a partition process failed:\n{message[1]}")
+    return message
+
+
+def _synchronize(conns: list[Connection], until: Time):
+    """Coordinate conservative workers until every event up to `until` is processed"""
+    # `until` is inclusive, advancing stops strictly before the bound
+    limit = nextafter(until, INFINITY)
+    while True:
+        reports = [_receive(conn) for conn in conns]
+        time = min(report[1] for report in reports)
+        if time == INFINITY or time > until:
+            return
+        if time < (bound := min(report[2] for report in reports)):
+            for conn in conns:
+                conn.send(("advance", min(bound, limit)))
+            continue
+        for conn in conns:
+            conn.send(("step", time))
+        sent = [_receive(conn)[1] for conn in conns]
+        for rank, conn in enumerate(conns):
+            conn.send(("deliver", [batch[rank] for batch in sent if rank in batch]))
+
+
+def _speculate(conns: list[Connection], until: Time):
+    """Coordinate optimistic workers until the GVT passes `until`"""
+    sent: list[dict[int, bytes]] = []
+    gvt = 0
+    while True:
+        for rank, conn in enumerate(conns):
+            conn.send(
+                ("deliver", [batch[rank] for batch in sent if rank in batch], gvt)
+            )
+        reports = [_receive(conn) for conn in conns]
+        sent = [report[1] for report in reports]
+        # neither a worker nor a message in transit can go back before the GVT
+        gvt = min(min(report[2], report[3]) for report in reports)
+        if gvt == INFINITY or gvt > until:
+            return
+
+
+def run_partitions(
+    partitions: list[list[Model]],
+    until: Time = INFINITY,
+    scheduler: Callable[[], Scheduler] = Scheduler,
+    checked: bool = True,
+    optimism: int | None = None,
+    transport: Transport = "shared_memory",
+    capacity: int = 1 << 20,
+    threads: int = 1,
+    registry: Registry | None = None,
+    trace: Callable[[int], TraceWriter] | None = None,
+    profiler: Profiler | None = None,
+) -> Report:
+    """Run each partition in its own process until `until`
+
+    Partitions synchronize conservatively, or speculate up to `optimism`
+    steps per round when given. Messages go through a shared memory ring
+    buffer of `capacity` bytes per pair of communicating partitions, or
+    through the coordinator's pipes. Each process evaluates its imminent
+    models on `threads` threads. Every model is numbered in `registry`
+    before forking, so indices agree across processes. `trace` builds the
+    trace of each partition from its rank. Each partition is profiled
+    separately and the counters are merged into `profiler`. The models
+    of the calling process are updated with the final states.
+    """
+    if profiler is not None and threads > 1:
+        raise ValueError("a profiler cannot attach to a node running on threads")
+    models = [list(flatten(partition)) for partition in partitions]
+    owners = {model: rank for rank, atomics in enumerate(models) for model in atomics}
+    routes = build_routes(owners)
+    registry = Registry() if registry is None else registry
+    registry.update(owners)
+    ports, pairs = {}, set()
+    for port, receivers in routes.items():
+        for receiver, key in receivers:
+            if receiver not in owners:
+                raise ValueError(f"{receiver.name} is not in any partition")
+            ports[key] = None
+            if (src := owners[port.output.owner]) != (dst := owners[receiver]):
+                pairs.add((src, dst))
+
+    def hierarchy(models: Iterable[Model]) -> Iterable[Model]:
+        for model in models:
+            yield model
+            if isinstance(model, Coupled):
+                yield from hierarchy(model.components)
+
+    codec = Codec(
+        hierarchy(model for partition in partitions for model in partition), ports
+    )
+
+    def worker(rank: int) -> Callable[[], Worker]:
+        def build() -> Worker:
+            node = Node(
+                models[rank],
+                scheduler(),
+                checked=checked,
+                threads=threads,
+                registry=registry,
+            )
+            if trace is not None:
+                node.trace = trace(rank)
+            # a fresh profiler per partition, what the parent counted before stays there
+            profile = None if profiler is None else Profiler(profiler.sample)
+            if profile is not None:
+                profile.attach(node)
+            node.initialize()
+            args = (rank, len(partitions), node, codec, owners, rings)
+            if optimism is None:
+                worker = Worker(*args)
+            else:
+                worker = OptimisticWorker(*args, optimism=optimism, until=until)
+            worker.profiler = profile
+            return worker
+
+        return build
+
+    # the workers inherit the models and buffers by forking, none is pickled
+    context = multiprocessing.get_context("fork")
+    conns, processes = [], []
+    rings: dict[tuple[int, int], RingBuffer] = {}
+    try:
+        if transport == "shared_memory":
+            for pair in sorted(pairs):
+                rings[pair] = RingBuffer(capacity)
+        for rank in range(len(partitions)):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_work, args=(worker(rank), child), daemon=True
+            )
+            process.start()
+            child.close()
+            conns.append(parent)
+            processes.append(process)
+
+        if optimism is None:
+            _synchronize(conns, until)
+        else:
+            _speculate(conns, until)
+
+        for conn in conns:
+            conn.send(("stop",))
+        report = Report(0)
+        for conn in conns:
+            _, states, time, metrics = _receive(conn)
+            report.time = max(report.time, time)
+            report.partitions.append(metrics)
+            if profiler is not None and metrics.profile is not None:
+                profiler.merge(metrics.profile)
+            for id, state in codec.decode(states).items():
+                model = codec.models[id]
+                state["__dict__"] = {**model.__dict__, **state["__dict__"]}
+                model.__setstate__(state)
+        return report
+    finally:
+        for conn in conns:
+            conn.close()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        for ring in rings.values():
+            ring.close()
+            ring.unlink()
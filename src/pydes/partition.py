@@ -0,0 +1,233 @@
+"""Communication-aware partitioning of the coupling graph across processes"""
+import heapq
+import json
+from collections.abc import Iterable, Mapping
+from os import PathLike
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from pydes.atomic import Atomic
+from pydes.coupled import build_routes, flatten
+from pydes.model import Model
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+__all__ = (
+    "build_graph",
+    "partition_graph",
+    "cut_weight",
+    "export_partition",
+    "load_partition",
+)
+
+type Assignment = dict[Atomic, int]
+
+
+def build_graph(
+    models: Iterable[Model],
+    rates: Mapping[Atomic, float] | None = None,
+    volumes: Mapping[tuple[Atomic, Atomic], float] | None = None,
+) -> "nx.DiGraph":
+    """The coupling graph of the atomic models in `models`
+
+    Nodes are the atomic models, weighted by their event rate, and edges
+    link senders to receivers, weighted by the volume of messages between
+    them. Without profiled figures in `rates` and `volumes`, every model
+    counts as one event per unit of time and every connected port as one
+    message.
+    """
+    atomics = list(flatten(models))
+    rates = {} if rates is None else rates
+    volumes = {} if volumes is None else volumes
+    # imported here, only partitioning needs networkx
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    for model in atomics:
+        graph.add_node(model, weight=rates.get(model, 1.0))
+    for port, receivers in build_routes(atomics).items():
+        sender = port.output.owner
+        for receiver, _ in receivers:
+            if receiver not in graph:
+                continue
+            if graph.has_edge(sender, receiver):
+                graph[sender][receiver]["ports"] += 1
+            else:
+                graph.add_edge(sender, receiver, ports=1)
+    for sender, receiver, data in graph.edges(data=True):
+        data["weight"] = volumes.get((sender, receiver), data["ports"])
+    return graph
+
+
+def partition_graph(
+    graph: "nx.DiGraph", parts: int, imbalance: float = 0.05, passes: int = 10
+) -> Assignment:
+    """Assign every node of `graph` to one of `parts` partitions
+
+    Minimizes the weight of the edges cut between partitions while keeping
+    the node weight of each partition within `imbalance` of an even share.
+    Nodes are first laid out in breadth first order, so that neighbours
+    tend to land together, and cut into contiguous runs of equal weight.
+    Overloaded partitions then hand nodes to the lightest one, and finally
+    single nodes move to the partition they communicate with most as long
+    as that lowers the cut and respects the balance.
+    """
+    weights = {node: graph.nodes[node].get("weight", 1.0) for node in graph}
+    undirected: dict[Atomic, dict[Atomic, float]] = {node: {} for node in graph}
+    for u, v, weight in graph.edges(data="weight", default=1.0):
+        if u is not v:
+            undirected[u][v] = undirected[u].get(v, 0.0) + weight
+            undirected[v][u] = undirected[v].get(u, 0.0) + weight
+
+    order: list[Atomic] = []
+    seen: set[Atomic] = set()
+    for root in graph:
+        if root in seen:
+            continue
+        seen.add(root)
+        order.append(root)
+        frontier = [root]
+        while frontier:
+            following = []
+            for node in frontier:
+                for neighbour in undirected[node]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        order.append(neighbour)
+                        following.append(neighbour)
+            frontier = following
+
+    total = sum(weights.values())
+    target = total / parts if total else 1.0
+    assignment: Assignment = {}
+    load = [0.0] * parts
+    accumulated = 0.0
+    for node in order:
+        part = min(parts - 1, int((accumulated + weights[node] / 2) / target))
+        assignment[node] = part
+        load[part] += weights[node]
+        accumulated += weights[node]
+
+    def links(node: Atomic) -> list[float]:
+        links = [0.0] * parts
+        for neighbour, link in undirected[node].items():
+            links[assignment[neighbour]] += link
+        return links
+
+    members = [0] * parts
+    for part in assignment.values():
+        members[part] += 1
+    position = {node: i for i, node in enumerate(order)}
+    # per pair of partitions, the nodes of the first by their gain in moving to
+    # the second, ties broken by position; a move pushes fresh entries for the
+    # node and its neighbours, entries out of date are dropped when popped
+    heaps: dict[tuple[int, int], list[tuple[float, int, Atomic]]] = {}
+
+    def gain_of(node: Atomic, part: int) -> float:
+        linked = links(node)
+        return linked[part] - linked[assignment[node]]
+
+    def push(node: Atomic):
+        own = assignment[node]
+        linked = links(node)
+        for (source, part), heap in heaps.items():
+            if source == own:
+                entry = (linked[own] - linked[part], position[node], node)
+                heapq.heappush(heap, entry)
+
+    def move(node: Atomic, part: int):
+        own, weight = assignment[node], weights[node]
+        assignment[node] = part
+        load[own] -= weight
+        load[part] += weight
+        members[own] -= 1
+        members[part] += 1
+        if heaps:
+            push(node)
+            for neighbour in undirected[node]:
+                push(neighbour)
+
+    # contiguous runs overshoot with uneven weights, unload the heaviest
+    # partition into the lightest at the least cost in cut weight
+    limit = target * (1 + imbalance)
+    while True:
+        heaviest = max(range(parts), key=load.__getitem__)
+        lightest = min(range(parts), key=load.__getitem__)
+        if load[heaviest] <= limit or members[heaviest] == 1:
+            break
+        if (heap := heaps.get((heaviest, lightest))) is None:
+            heap = heaps[heaviest, lightest] = [
+                (-gain_of(node, lightest), position[node], node)
+                for node in order
+                if assignment[node] == heaviest
+            ]
+            heapq.heapify(heap)
+        # too heavy to move now, but perhaps once the loads have shifted
+        heavy, best = [], None
+        while heap:
+            key, _, node = heap[0]
+            if assignment[node] != heaviest or -key != gain_of(node, lightest):
+                heapq.heappop(heap)
+            elif load[lightest] + weights[node] >= load[heaviest]:
+                heavy.append(heapq.heappop(heap))
+            else:
+                best = node
+                break
+        for entry in heavy:
+            heapq.heappush(heap, entry)
+        if best is None:
+            break
+        move(best, lightest)
+
+    limit = max(limit, max(load, default=0.0))
+    heaps.clear()
+    for _ in range(passes):
+        moved = False
+        for node in order:
+            own, weight = assignment[node], weights[node]
+            if members[own] == 1:
+                continue
+            linked = links(node)
+            best, gain = own, 0.0
+            for part in range(parts):
+                if part == own or load[part] + weight > limit:
+                    continue
+                candidate = linked[part] - linked[own]
+                if candidate > gain or (
+                    candidate == gain > 0 and load[part] < load[best]
+                ):
+                    best, gain = part, candidate
+            if best != own:
+                move(node, best)
+                moved = True
+        if not moved:
+            break
+    return assignment
+
+
+def cut_weight(graph: "nx.DiGraph", assignment: Mapping[Atomic, int]) -> float:
+    """The total weight of the edges between different partitions"""
+    return sum(
+        weight
+        for u, v, weight in graph.edges(data="weight", default=1.0)
+        if assignment[u] != assignment[v]
+    )
+
+
+def export_partition(assignment: Mapping[Atomic, int], path: str | PathLike):
+    """Write `assignment` as JSON, keyed by model id"""
+    with open(path, "w") as file:
+        json.dump({str(model.id): part for model, part in assignment.items()}, file)
+
+
+def load_partition(path: str | PathLike, models: Iterable[Model]) -> Assignment:
+    """Read an assignment written by `export_partition` for the atomics of `models`"""
+    with open(path) as file:
+        parts = {UUID(id): part for id, part in json.load(file).items()}
+    assignment = {}
+    for model in flatten(models):
+        if (part := parts.get(model.id)) is None:
+            raise ValueError(f"{model.name} is not in the partition {path}")
+        assignment[model] = part
+    return assignment
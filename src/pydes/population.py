@@ -0,0 +1,120 @@
+from typing import Any
+
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+from pydantic import ConfigDict, Field, PrivateAttr, model_validator
+
+from pydes.atomic import Atomic, StateConstant
+from pydes.channel import Inputs, Outputs
+from pydes.core import INFINITY, Time
+
+__all__ = (
+    "StateColumn",
+    "AtomicArray",
+)
+
+type Index = NDArray[np.intp]
+
+
+def StateColumn(dtype: DTypeLike, fill: Any = 0):
+    """A state variable holding one value per element of an `AtomicArray`
+
+    Allocated as `numpy.full(size, fill, dtype)` unless given explicitly.
+    """
+    return Field(
+        default=None,
+        frozen=False,
+        json_schema_extra={"column": {"dtype": np.dtype(dtype).str, "fill": fill}},
+    )
+
+
+class AtomicArray(Atomic):
+    """A population of `size` identical models evaluated with NumPy
+
+    State declared with `StateColumn` lives in arrays, one entry per element,
+    and the population is scheduled as a single model whose next time is the
+    earliest of its elements' `next` times. Subclasses implement the
+    `*_array` variants of the DEVS functions, which receive the indices of
+    the affected elements and operate on whole columns at once:
+
+    - `time_advance_array(index)` returns the time advance of each element
+    - `internal_transition_array(index)` and `output_array(index)` handle the
+      elements imminent at the current time
+    - `external_transition_array(inputs)` returns the indices of the elements
+      whose state it changed, so that only those are rescheduled
+
+    All elements handled at one step, including those whose time advance was
+    recomputed after an external transition, take the current time as their
+    last event time.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    size: int = StateConstant()
+    next: NDArray[np.float64] = StateColumn(np.float64, INFINITY)
+
+    _imminent: Index = PrivateAttr(default_factory=lambda: np.empty(0, np.intp))
+    _pending: list[Index] = PrivateAttr(default_factory=list)
+    # the earliest `next`, the imminent elements are selected against it rather
+    # than against `time.next`, which need not add back up to it
+    _minimum: float = PrivateAttr(INFINITY)
+
+    @model_validator(mode="after")
+    def allocate_columns(self):
+        for name, field in type(self).model_fields.items():
+            if not isinstance(extra := field.json_schema_extra, dict):
+                continue
+            if (column := extra.get("column")) is None:
+                continue
+            if (value := self.__dict__[name]) is None:
+                value = np.full(self.size, column["fill"], column["dtype"])
+                self.__dict__[name] = value
+            elif len(value) != self.size:
+                raise ValueError(f"column {name} must have {self.size} elements")
+        # every element needs its first time advance
+        self._pending.append(np.arange(self.size))
+        return self
+
+    def time_advance_array(self, index: Index) -> NDArray[np.float64]:
+        """Override this function to implement the vectorized time advance
+
+        Default implementation returns infinity for every element.
+        """
+        return np.full(len(index), INFINITY)
+
+    def internal_transition_array(self, index: Index) -> None:
+        """Override this function to implement the vectorized internal transition"""
+        pass
+
+    def external_transition_array(self, inputs: Inputs[Any]) -> Index | None:
+        """Override this function to implement the vectorized external transition
+
+        Returns the indices of the changed elements, default implementation
+        changes nothing.
+        """
+        return None
+
+    def output_array(self, index: Index) -> Outputs[Any]:
+        """Override this function to implement the vectorized output function"""
+        return {}
+
+    def time_advance(self) -> Time:
+        time = self.time.last
+        if self._pending:
+            index = np.unique(np.concatenate(self._pending))
+            self._pending.clear()
+            self.next[index] = time + self.time_advance_array(index)
+        self._minimum = float(self.next.min()) if self.size else INFINITY
+        return self._minimum - time
+
+    def output(self) -> Outputs[Any]:
+        self._imminent = np.flatnonzero(self.next <= self._minimum)
+        return self.output_array(self._imminent)
+
+    def internal_transition(self):
+        self.internal_transition_array(self._imminent)
+        self._pending.append(self._imminent)
+
+    def external_transition(self, inputs: Inputs[Any]):
+        if (index := self.external_transition_array(inputs)) is not None:
+            self._pending.append(np.asarray(index, np.intp))
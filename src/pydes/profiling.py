@@ -0,0 +1,245 @@
+"""Per-model and per-class performance counters for the simulation kernel
+
+A `Profiler` attached to a `Node` switches its models over to instrumented
+subclasses, like `unchecked` does, whose transition, output and time advance
+functions count their calls and time them. The scheduler's queue is switched
+over too, to sample its depth whenever imminent models are popped, and
+outputs are counted per port. Nothing is instrumented unless a profiler is
+attached, so profiling costs nothing when disabled.
+
+The counters complement a line-level profiler such as scalene: they tell
+which model classes and which callbacks dominate a run, and export as a
+summary table or as JSON.
+"""
+import json
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from functools import wraps
+from time import perf_counter
+from typing import Any
+
+from pydes.atomic import Atomic
+from pydes.channel import Port
+from pydes.node import Node
+from pydes.utils import EventQueue
+
+__all__ = ("Profiler",)
+
+CALLBACKS = (
+    "internal_transition",
+    "external_transition",
+    "confluent_transition",
+    "output",
+    "time_advance",
+)
+
+
+class Profiler:
+    """Counts and times the callbacks of the models of attached nodes
+
+    Every call is counted. With `sample > 1` only every `sample`-th call of
+    each model's callback is timed and the time is scaled up accordingly,
+    which lowers the overhead of the timer for very cheap callbacks.
+    Callbacks run from other callbacks, like the internal and external
+    transitions run by the default `confluent_transition`, are counted but
+    not timed, their time is part of the outer one's. Counting is not synchronized, profile without `threads`.
+    """
+
+    sample: int
+    calls: Counter[tuple[int, str]]
+    seconds: defaultdict[tuple[int, str], float]
+    depths: Counter[int]
+    """How often the scheduler held a number of models, by power of two"""
+    messages: Counter[str]
+    models: dict[int, tuple[str, str]]
+    """The name and class of every profiled model, by registry index"""
+
+    def __init__(self, sample: int = 1):
+        self.sample = sample
+        self.calls = Counter()
+        self.seconds = defaultdict(float)
+        self.depths = Counter()
+        self.messages = Counter()
+        self.models = {}
+        self.classes: dict[type, type] = {}
+        self.nodes: list[Node] = []
+        self.ports: dict[Port, str] = {}
+        self.active = False
+
+    def attach(self, node: Node):
+        """Instrument the models and the scheduler of `node`
+
+        Raises ValueError for a node evaluating models on several threads,
+        the counters are not shared safely between them.
+        """
+        if node.threads > 1:
+            raise ValueError("a profiler cannot attach to a node running on threads")
+        for model in node.models:
+            self.models[model._index] = (model.name, type(model).__qualname__)
+            model.__class__ = self.instrument(type(model))
+        queue = node.scheduler.queue
+        queue.__class__ = self.instrument_queue(type(queue))
+        self.nodes.append(node)
+
+    def detach(self):
+        """Switch the models and schedulers of the attached nodes back"""
+        originals = {cls: original for original, cls in self.classes.items()}
+        for node in self.nodes:
+            for model in node.models:
+                model.__class__ = originals.get(type(model), type(model))
+            queue = node.scheduler.queue
+            queue.__class__ = originals.get(type(queue), type(queue))
+        self.nodes.clear()
+
+    def instrument[A: Atomic](self, cls: type[A]) -> type[A]:
+        if (instrumented := self.classes.get(cls)) is None:
+            callbacks = {
+                name: self.timed(name, getattr(cls, name)) for name in CALLBACKS
+            }
+            callbacks["output"] = self.counted(callbacks["output"])
+            instrumented = self.classes[cls] = type(cls)(
+                cls.__name__,
+                (cls,),
+                {
+                    "__module__": cls.__module__,
+                    "__qualname__": cls.__qualname__,
+                    # the wrapped `time_advance` still reads the same fields
+                    "time_advance_fields": cls.time_advance_fields,
+                    **callbacks,
+                },
+            )
+        return instrumented
+
+    def instrument_queue[Q: EventQueue](self, cls: type[Q]) -> type[Q]:
+        if (instrumented := self.classes.get(cls)) is None:
+            pop_imminent, depths = cls.pop_imminent, self.depths
+
+            def sampled(queue: Q) -> list:
+                depths[len(queue).bit_length()] += 1
+                return pop_imminent(queue)
+
+            instrumented = self.classes[cls] = type(
+                cls.__name__, (cls,), {"pop_imminent": sampled}
+            )
+        return instrumented
+
+    def timed(self, name: str, callback: Callable) -> Callable:
+        calls, seconds, sample = self.calls, self.seconds, self.sample
+
+        @wraps(callback)
+        def timed(model: Atomic, *args: Any) -> Any:
+            key = (model._index, name)
+            calls[key] += 1
+            if self.active or calls[key] % sample:
+                return callback(model, *args)
+            self.active = True
+            start = perf_counter()
+            try:
+                return callback(model, *args)
+            finally:
+                seconds[key] += (perf_counter() - start) * sample
+                self.active = False
+
+        return timed
+
+    def counted(self, output: Callable) -> Callable:
+        messages, ports = self.messages, self.ports
+
+        @wraps(output)
+        def counted(model: Atomic) -> Any:
+            outputs = output(model)
+            for port in outputs:
+                # unconnected output channels have no port
+                if port is not None:
+                    if (name := ports.get(port)) is None:
+                        name = ports[port] = (
+                            f"{port.output.owner.path}.{port.output.name}"
+                            f" -> {port.input.owner.path}.{port.input.name}"
+                        )
+                    messages[name] += 1
+            return outputs
+
+        return counted
+
+    def export(self) -> dict[str, Any]:
+        """The counters as plain data, see `merge`"""
+        models: dict[int, dict[str, Any]] = {}
+        for (index, name), calls in self.calls.items():
+            entry = models.setdefault(
+                index,
+                {
+                    "name": self.models[index][0],
+                    "class": self.models[index][1],
+                    "calls": {},
+                    "seconds": {},
+                },
+            )
+            entry["calls"][name] = calls
+            entry["seconds"][name] = self.seconds.get((index, name), 0.0)
+        classes: dict[str, dict[str, dict[str, float]]] = {}
+        for entry in models.values():
+            totals = classes.setdefault(
+                entry["class"], {"calls": Counter(), "seconds": Counter()}
+            )
+            totals["calls"].update(entry["calls"])
+            totals["seconds"].update(entry["seconds"])
+        return {
+            "models": models,
+            "classes": {
+                name: {key: dict(values) for key, values in totals.items()}
+                for name, totals in classes.items()
+            },
+            "queue_depth": {
+                f"{(1 << bucket) >> 1}-{(1 << bucket) - 1}": count
+                for bucket, count in sorted(self.depths.items())
+            },
+            "messages": dict(self.messages.most_common()),
+        }
+
+    def merge(self, data: dict[str, Any]):
+        """Add the counters exported by another profiler, e.g. of another partition"""
+        for index, entry in data["models"].items():
+            self.models[int(index)] = (entry["name"], entry["class"])
+            for name, calls in entry["calls"].items():
+                self.calls[int(index), name] += calls
+                self.seconds[int(index), name] += entry["seconds"][name]
+        for bucket, count in data["queue_depth"].items():
+            low = int(bucket.split("-")[0])
+            self.depths[low.bit_length()] += count
+        self.messages.update(data["messages"])
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.export(), **kwargs)
+
+    def summary(self, top: int = 20) -> str:
+        """A table of the `top` model classes by time spent in their callbacks"""
+        classes = self.export()["classes"]
+        total = sum(sum(entry["seconds"].values()) for entry in classes.values()) or 1.0
+        header = [
+            "class",
+            *(name.removesuffix("_transition") for name in CALLBACKS),
+            "seconds",
+            "%",
+        ]
+        rows = [
+            [
+                name,
+                *(str(entry["calls"].get(callback, 0)) for callback in CALLBACKS),
+                f"{(seconds := sum(entry['seconds'].values())):.6f}",
+                f"{100 * seconds / total:.1f}",
+            ]
+            for name, entry in sorted(
+                classes.items(), key=lambda item: -sum(item[1]["seconds"].values())
+            )[:top]
+        ]
+        widths = [
+            max(len(row[i]) for row in [header, *rows]) for i in range(len(header))
+        ]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in [header, *rows]
+        ]
+        return "\n".join(lines)
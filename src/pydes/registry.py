@@ -0,0 +1,65 @@
+from collections.abc import Iterable, Iterator
+from uuid import UUID
+
+from bidict import bidict
+
+from pydes.model import Model
+
+__all__ = (
+    "Registry",
+    "index",
+)
+
+
+class Registry:
+    """Dense integer indices for the models of a simulation
+
+    Models are numbered from 0 in registration order, and each keeps its
+    index in `_index`, so that hot paths can key lists, arrays and the
+    `IndexedQueue` by a small int rather than by hashing the model. `ids`
+    maps model ids to indices and back.
+
+    A model holds one index at a time: registering it with another registry
+    renumbers it, so models should belong to a single simulation at once.
+    """
+
+    ids: bidict[UUID, int]
+    models: list[Model]
+
+    def __init__(self, models: Iterable[Model] = ()):
+        self.ids = bidict()
+        self.models = []
+        self.update(models)
+
+    def register(self, model: Model) -> int:
+        """Number `model`, or renumber it with the index it already has here"""
+        if (i := self.ids.get(model.id)) is None:
+            i = self.ids[model.id] = len(self.models)
+            self.models.append(model)
+        object.__setattr__(model, "_index", i)
+        return i
+
+    def update(self, models: Iterable[Model]):
+        for model in models:
+            self.register(model)
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def __iter__(self) -> Iterator[Model]:
+        return iter(self.models)
+
+    def __contains__(self, model: Model) -> bool:
+        return model.id in self.ids
+
+    def __getitem__(self, i: int) -> Model:
+        return self.models[i]
+
+    def lookup(self, id: UUID) -> Model:
+        """The model registered with `id`"""
+        return self.models[self.ids[id]]
+
+
+def index(model: Model) -> int:
+    """The index of a registered model, see `Registry`"""
+    return model._index
@@ -0,0 +1,223 @@
+"""Independent replications of a simulation on a pool of processes
+
+Every replication builds its models afresh from a factory and runs them with
+its own seed, spawned from a single root seed: the generator of model ids is
+reseeded with it, and since each model's `Stream` is seeded from its id, so
+are all of the models' random draws. Replications are therefore independent
+of each other and reproducible, whichever process runs them and in whatever
+order.
+
+Only the results reduced by `measure`, numbers or `Statistic`s, travel back
+to the calling process, which estimates confidence intervals across the
+replications and merges statistics into pooled ones.
+"""
+import math
+import multiprocessing
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from statistics import NormalDist, fmean, stdev
+from time import perf_counter
+from traceback import format_exc
+from typing import TYPE_CHECKING
+
+from numpy.random import PCG64DXSM, SeedSequence
+
+from pydes import core
+from pydes.core import INFINITY, SEED, Time
+from pydes.coupled import flatten
+from pydes.errors import SimulationError
+from pydes.model import Model
+from pydes.registry import Registry
+from pydes.statistics import Sink, Statistic, merge
+
+if TYPE_CHECKING:
+    from pydes.simulation import Simulation
+
+__all__ = (
+    "Replications",
+    "replicate",
+    "sink_statistics",
+)
+
+type Result = float | Statistic
+type Measure = Callable[[list[Model]], Mapping[str, Result]]
+
+
+def sink_statistics(models: Iterable[Model]) -> dict[str, Statistic]:
+    """The statistics of every `Sink` among `models`, keyed by `sink.statistic`
+
+    Sinks should be given a `name`, the default one differs between
+    replications.
+    """
+    return {
+        f"{model.name}.{name}": statistic
+        for model in flatten(models)
+        if isinstance(model, Sink)
+        for name, statistic in model.statistics.items()
+    }
+
+
+@dataclass
+class Replications:
+    """The results of independent replications, see `replicate`"""
+
+    results: list[dict[str, Result]] = field(default_factory=list)
+    """What `measure` returned for each replication, in order"""
+    seconds: list[float] = field(default_factory=list)
+    """The wall clock time of each replication, building its models included"""
+    elapsed: float = 0.0
+    """The wall clock time of all replications"""
+    processes: int = 1
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def values(self, key: str) -> list[float]:
+        """The result `key` of each replication, the mean of a statistic"""
+        return [
+            result.mean if isinstance(result := results[key], Statistic) else result
+            for results in self.results
+        ]
+
+    def mean(self, key: str) -> float:
+        return fmean(self.values(key))
+
+    def interval(self, key: str, confidence: float = 0.95) -> tuple[float, float]:
+        """The Student t confidence interval of the mean of `key` across replications"""
+        values = self.values(key)
+        if len(values) < 2:
+            raise ValueError("a confidence interval needs at least 2 replications")
+        mean = fmean(values)
+        half = (
+            t_quantile(confidence, len(values) - 1)
+            * stdev(values)
+            / math.sqrt(len(values))
+        )
+        return mean - half, mean + half
+
+    def merged(self, key: str) -> Statistic:
+        """The statistic `key` over the observations of all replications"""
+        return merge(results[key] for results in self.results)
+
+    @property
+    def speedup(self) -> float:
+        """How many times faster the replications ran than one after the other"""
+        return sum(self.seconds) / self.elapsed if self.elapsed else 1.0
+
+    @property
+    def efficiency(self) -> float:
+        """The speedup per process"""
+        return self.speedup / self.processes
+
+
+def t_quantile(confidence: float, df: int) -> float:
+    """The two-sided critical value of Student's t distribution with `df` degrees"""
+    if df > 1000:
+        return NormalDist().inv_cdf((1 + confidence) / 2)
+    low, high = 0.0, 1.0
+    while _t_probability(high, df) < confidence:
+        high *= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_probability(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def _t_probability(t: float, df: int) -> float:
+    """P(|T| < t), by Abramowitz and Stegun 26.7.3 and 26.7.4"""
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        term = total = 0.0 if df == 1 else math.cos(theta)
+        for k in range(3, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        return 2 / math.pi * (theta + math.sin(theta) * total)
+    term = total = 1.0
+    for k in range(2, df - 1, 2):
+        term *= cos2 * (k - 1) / k
+        total += term
+    return math.sin(theta) * total
+
+
+def replicate(
+    factory: Callable[[], Iterable[Model]],
+    replications: int,
+    simulation: "Simulation | None" = None,
+    until: Time = INFINITY,
+    measure: Measure = sink_statistics,
+    processes: int | None = None,
+    seed: int = SEED,
+) -> Replications:
+    """Run `replications` of the models built by `factory` on `processes` processes
+
+    Each replication runs with a copy of `simulation`, without its trace or
+    profiler, and only returns what `measure` makes of its models. The seeds
+    of the replications are spawned from `seed`. `processes` defaults to one
+    per CPU; with a single process, or a parallel `simulation` whose
+    partitions need processes of their own, the replications run one after
+    the other in the calling process.
+    """
+    from pydes.simulation import Simulation
+
+    simulation = Simulation() if simulation is None else simulation
+    seeds = SeedSequence(seed).spawn(replications)
+    processes = min(processes or multiprocessing.cpu_count(), replications)
+    if simulation.num_processes > 1:
+        processes = 1
+    report = Replications(processes=processes)
+    job = (factory, simulation, until, measure)
+
+    start = perf_counter()
+    if processes == 1:
+        # replications reseed the ids, leave the caller's sequence as it was
+        state = core.random.bit_generator.state
+        try:
+            outcomes = [_replicate(job, seed) for seed in seeds]
+        finally:
+            core.random.bit_generator.state = state
+    else:
+        # workers inherit the factory by forking, only seeds and results are pickled
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes, initializer=_install, initargs=(job,)) as pool:
+            outcomes = pool.map(_run, seeds, chunksize=1)
+    report.elapsed = perf_counter() - start
+
+    for outcome in outcomes:
+        if outcome[0] == "error":
+            raise SimulationError(f"a replication failed:\n{outcome[1]}")
+        _, results, seconds = outcome
+        report.results.append(results)
+        report.seconds.append(seconds)
+    return report
+
+
+_job: tuple | None = None
+
+
+def _install(job: tuple):
+    global _job
+    _job = job
+
+
+def _run(seed: SeedSequence) -> tuple:
+    return _replicate(_job, seed)
+
+
+def _replicate(job: tuple, seed: SeedSequence) -> tuple:
+    factory, simulation, until, measure = job
+    try:
+        start = perf_counter()
+        core.random.bit_generator.state = PCG64DXSM(seed).state
+        models = list(factory())
+        simulation = simulation.model_copy(
+            update={"registry": Registry(), "trace": None, "profiler": None}
+        )
+        simulation.run(models, until)
+        results = dict(measure(models))
+        return "done", results, perf_counter() - start
+    except Exception:
+        return "error", format_exc()
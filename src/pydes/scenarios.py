@@ -0,0 +1,202 @@
+"""What-if scenarios branching off a warmed-up simulation
+
+`fork` continues a node that has already run for a while under several
+scenarios, each overriding fields, typically `StateConstant` parameters, of
+some of its models. With the `fork` start method every scenario runs in a
+child process forked from the caller, which shares the warmed-up state
+copy-on-write, so nothing is copied until a scenario changes it. Elsewhere
+the models' state is encoded once and restored before each scenario, which
+then run one after the other in the calling process.
+
+Either way the models keep drawing from the random streams they had at the
+branching point, so every scenario sees the same random numbers as far as
+its changes allow, and the caller's models are left at the branching point.
+"""
+import multiprocessing
+from collections.abc import Iterable, Mapping
+from copy import deepcopy
+from multiprocessing.connection import Connection, wait
+from traceback import format_exc
+from typing import Any, Literal
+
+from pydantic import BaseModel, create_model
+
+from pydes.atomic import Atomic
+from pydes.codec import Codec
+from pydes.core import INFINITY, Time
+from pydes.errors import SimulationError
+from pydes.model import Model
+from pydes.node import Node
+from pydes.replication import Measure, sink_statistics
+
+__all__ = (
+    "Scenario",
+    "fork",
+    "override",
+)
+
+type Scenario = Mapping[Model, Mapping[str, Any]]
+type Method = Literal["fork", "serialize"]
+
+
+def override(node: Node, scenario: Scenario):
+    """Assign the fields of `scenario` and reschedule the models it changes
+
+    Frozen fields, such as `StateConstant`s, are overridden too. Every
+    overridden field is validated before any model changes, so an invalid
+    scenario leaves the models as they were; model validators are not run
+    again. Time advances are recomputed from each model's last event, but
+    not before the node's current time.
+    """
+    overrides = []
+    for model, fields in scenario.items():
+        for name in fields:
+            if name not in type(model).model_fields:
+                raise ValueError(f"{model.name} has no field {name}")
+        validated = _fields(type(model), fields).model_validate(fields)
+        overrides.append((model, {name: validated.__dict__[name] for name in fields}))
+    models = []
+    for model, fields in overrides:
+        model.__dict__.update(fields)
+        if isinstance(model, Atomic):
+            model.invalidate_time_advance()
+            times = model.time
+            times.next = max(times.last + node.advance(model), node.time)
+            models.append(model)
+    node.scheduler.reschedule(models)
+
+
+def _fields(cls: type[Model], names: Iterable[str]) -> type[BaseModel]:
+    """A model of only the fields `names` of `cls`, to validate them on their own
+
+    Validating a whole copy of the model would run its model validators, and
+    those can have side effects, e.g. a `Coupled` adopts its components.
+    """
+    fields = {
+        name: (cls.model_fields[name].annotation, cls.model_fields[name])
+        for name in names
+    }
+    return create_model(cls.__name__, __config__=cls.model_config, **fields)
+
+
+def fork(
+    node: Node,
+    scenarios: Iterable[Scenario],
+    until: Time = INFINITY,
+    measure: Measure = sink_statistics,
+    processes: int | None = None,
+    method: Method | None = None,
+) -> list[dict[str, Any]]:
+    """Run `node` on from its current time until `until` under every scenario
+
+    Returns what `measure` makes of the node's models at the end of each
+    scenario, in order. Forked scenarios run up to `processes` at a time,
+    one per CPU by default. `method` defaults to `fork` where the platform
+    supports it, `serialize` otherwise.
+    """
+    scenarios = list(scenarios)
+    if method is None:
+        method = (
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else "serialize"
+        )
+    if method == "serialize":
+        return _serialized(node, scenarios, until, measure)
+    processes = processes or multiprocessing.cpu_count()
+    context = multiprocessing.get_context("fork")
+    results: list[Any] = [None] * len(scenarios)
+    running: dict[int, tuple[Any, Connection]] = {}
+    try:
+        for i, scenario in enumerate(scenarios):
+            if len(running) >= processes:
+                _collect(running, results)
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_branch,
+                args=(node, scenario, until, measure, child),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            running[i] = (process, parent)
+        while running:
+            _collect(running, results)
+    finally:
+        for process, conn in running.values():
+            conn.close()
+            process.terminate()
+    return results
+
+
+def _branch(
+    node: Node, scenario: Scenario, until: Time, measure: Measure, conn: Connection
+):
+    try:
+        # the parent's trace files and worker threads are not the child's to use
+        node.trace = node.executor = None
+        override(node, scenario)
+        node.run(until)
+        conn.send(("done", dict(measure(node.models))))
+    except BaseException:
+        conn.send(("error", format_exc()))
+    finally:
+        conn.close()
+
+
+def _collect(running: dict[int, tuple[Any, Connection]], results: list[Any]):
+    """Wait for any running scenario to finish and store its result"""
+    ready = wait([conn for _, conn in running.values()])
+    for i, (process, conn) in list(running.items()):
+        if conn not in ready:
+            continue
+        del running[i]
+        try:
+            message = conn.recv()
+        except EOFError:
+            raise SimulationError("a scenario process exited unexpectedly") from None
+        finally:
+            conn.close()
+            process.join()
+        if message[0] == "error":
+            raise SimulationError(f"a scenario failed:\n{message[1]}")
+        results[i] = message[1]
+
+
+def _serialized(
+    node: Node, scenarios: list[Scenario], until: Time, measure: Measure
+) -> list[dict[str, Any]]:
+    codec = Codec({model.id: model for model in node.models})
+    snapshot = _save(node, codec)
+    results = []
+    try:
+        for i, scenario in enumerate(scenarios):
+            if i:
+                _restore(node, codec, snapshot)
+            override(node, scenario)
+            node.run(until)
+            # restoring replaces the models' state, not the results
+            results.append(deepcopy(dict(measure(node.models))))
+    finally:
+        _restore(node, codec, snapshot)
+    return results
+
+
+def _save(node: Node, codec: Codec) -> tuple[bytes, Time, int]:
+    states = {}
+    for model in node.models:
+        state = model.__getstate__()
+        # the hierarchy is not part of the state, see `parallel.Worker.state`
+        state["__dict__"] = {
+            name: value for name, value in state["__dict__"].items() if name != "parent"
+        }
+        states[model.id] = state
+    return codec.encode(states), node.time, node.events
+
+
+def _restore(node: Node, codec: Codec, snapshot: tuple[bytes, Time, int]):
+    data, node.time, node.events = snapshot
+    for id, state in codec.decode(data).items():
+        model = codec.models[id]
+        state["__dict__"] = {**model.__dict__, **state["__dict__"]}
+        model.__setstate__(state)
+        model.invalidate_time_advance()
+    node.scheduler.reschedule(node.models)
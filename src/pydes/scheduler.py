@@ -1,10 +1,37 @@
-from pydes.core import Field, Immutable
+from collections.abc import Iterable
+from typing import Literal
+
+from typing_extensions import Self
+
+from pydes.core import ConfigDict, Field, Immutable
 from pydes.model import Model
-from pydes.utils import MapQueue
+from pydes.registry import index
+from pydes.utils import CalendarQueue, EventQueue, IndexedQueue, MapQueue
+
+type Backend = Literal["heap", "indexed", "calendar"]
+
+BACKENDS: dict[Backend, type[EventQueue[Model]]] = {
+    "heap": MapQueue,
+    "indexed": IndexedQueue,
+    "calendar": CalendarQueue,
+}
 
 
 class Scheduler(Immutable):
-    queue: MapQueue[Model] = Field(default_factory=MapQueue)
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    queue: EventQueue[Model] = Field(default_factory=MapQueue)
+
+    @classmethod
+    def from_backend(cls, backend: Backend = "heap") -> Self:
+        """A scheduler on the `backend` priority queue
+
+        The indexed backend keys its arrays by the models' `Registry` index,
+        which the `Node` assigns before scheduling them.
+        """
+        if backend == "indexed":
+            return cls(queue=IndexedQueue(index=index))
+        return cls(queue=BACKENDS[backend]())
 
     def schedule(self, model: Model):
         if result := self.queue.push(model, model.time.next):
@@ -16,3 +43,14 @@ class Scheduler(Immutable):
 
     def deschedule(self, model: Model):
         return self.queue.remove(model)
+
+    def peek_time(self) -> float:
+        return self.queue.peek_time()
+
+    def pop_imminent(self) -> list[Model]:
+        """Remove and return every model due at the next event time"""
+        return self.queue.pop_imminent()
+
+    def reschedule(self, models: Iterable[Model]):
+        """Schedule many models at their next time in one bulk operation"""
+        self.queue.reschedule((model, model.time.next) for model in models)
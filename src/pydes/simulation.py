@@ -1,17 +1,291 @@
+from collections.abc import Callable, Iterable, Mapping
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING
 from uuid import UUID
 
-import networkx as nx
+from pydantic import PrivateAttr
 
-from .core import Field, Immutable, model_id
+from .atomic import Atomic
+from .checkpoint import load_checkpoint
+from .core import INFINITY, SEED, ConfigDict, Field, Immutable, Time, model_id
+from .model import Model
+from .node import Node
+from .parallel import Report, Transport, run_partitions
+from .partition import (
+    build_graph,
+    export_partition,
+    load_partition,
+    partition_graph,
+)
+from .profiling import Profiler
+from .registry import Registry
+from .replication import Measure, Replications, replicate, sink_statistics
+from .scenarios import Method, Scenario, fork
+from .scheduler import Backend, Scheduler
+from .trace import Level, TraceWriter
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 class Simulation(Immutable):
     """The global instantiator for a simulation"""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: UUID = Field(default_factory=model_id)
-    graph: nx.DiGraph = Field(default_factory=nx.DiGraph)
-    num_processes: int = Field(default=1)
-    num_threads: int = Field(default=1)
+    registry: Registry = Field(
+        default_factory=Registry,
+        description="Dense indices of the models built into nodes",
+    )
+    num_processes: int = Field(
+        default=1,
+        description="The number of partitions run in parallel by `run`",
+    )
+    num_threads: int = Field(
+        default=1,
+        description="Threads evaluating the imminent models of each node within a"
+        " timestep",
+    )
+    optimism: int | None = Field(
+        default=None,
+        description="Steps each partition executes speculatively per round (Time Warp),"
+        " or None to synchronize partitions conservatively",
+    )
+    transport: Transport = Field(
+        default="shared_memory",
+        description="How messages travel between partitions, pipes carry the overflow",
+    )
+    scheduler: Backend = Field(
+        default="heap",
+        description="The priority queue backend used by each node's scheduler",
+    )
+    checked: bool = Field(
+        default=True,
+        description="Validate every state assignment, disable for production runs",
+    )
+    trace: str | None = Field(
+        default=None,
+        description="A directory to record the events of `run` into, one subdirectory"
+        " per partition when parallel, speculative events included",
+    )
+    trace_level: Level = Field(
+        default=Level.MESSAGES,
+        description="What is traced of models without a level of their own",
+    )
+    profiler: Profiler | None = Field(
+        default=None,
+        description="Counts and times the callbacks of every model during `run`",
+    )
+
+    # networkx is only imported once a graph is built, see `graph`
+    _graph: "nx.DiGraph | None" = PrivateAttr(None)
+
+    @property
+    def graph(self) -> "nx.DiGraph":
+        """The coupling graph last built by `build_model_graph` or `load_partition`"""
+        private = self.__pydantic_private__
+        if (graph := private["_graph"]) is None:
+            import networkx as nx
+
+            graph = private["_graph"] = nx.DiGraph()
+        return graph
+
+    def build_model_graph(
+        self,
+        models: Iterable[Model],
+        rates: Mapping[Atomic, float] | None = None,
+        volumes: Mapping[tuple[Atomic, Atomic], float] | None = None,
+    ) -> "nx.DiGraph":
+        """Build the coupling graph of `models` into `graph` and partition it
+
+        Nodes are atomic models weighted by their event `rates`, edges carry
+        the message `volumes` between them, either profiled or one per port.
+        Each node's `partition` attribute assigns it to one of
+        `num_processes` partitions, balancing the event rates while cutting
+        as little message volume as possible.
+        """
+        graph = build_graph(models, rates, volumes)
+        for model, part in partition_graph(graph, self.num_processes).items():
+            graph.nodes[model]["partition"] = part
+        # replaced rather than updated, copies of the simulation keep their own
+        self._graph = graph
+        return graph
+
+    def partitions(self) -> list[list[Model]]:
+        """The partitions assigned in `graph`"""
+        assignment = dict(self.graph.nodes(data="partition"))
+        partitions: list[list[Model]] = [
+            [] for _ in range(max(assignment.values(), default=-1) + 1)
+        ]
+        for model, part in assignment.items():
+            partitions[part].append(model)
+        return partitions
+
+    def export_partition(self, path: str | PathLike):
+        """Save the partitions assigned in `graph`, to reuse with `load_partition`"""
+        export_partition(dict(self.graph.nodes(data="partition")), path)
+
+    def load_partition(
+        self, path: str | PathLike, models: Iterable[Model]
+    ) -> list[list[Model]]:
+        """Assign `models` to the partitions saved by `export_partition`"""
+        models = list(models)
+        graph = build_graph(models)
+        for model, part in load_partition(path, models).items():
+            graph.nodes[model]["partition"] = part
+        self._graph = graph
+        return self.partitions()
+
+    def build_scheduler(self) -> Scheduler:
+        return Scheduler.from_backend(self.scheduler)
+
+    def build_node(self, models: Iterable[Model]) -> Node:
+        return Node(
+            models,
+            self.build_scheduler(),
+            checked=self.checked,
+            threads=self.num_threads,
+            registry=self.registry,
+            trace=None if self.trace is None else self.build_trace(self.trace),
+        )
+
+    def restore(
+        self,
+        path: str | PathLike,
+        indices: Iterable[int] | None = None,
+        classes: Iterable[type] = (),
+    ) -> Node:
+        """A node of the models checkpointed to `path` by `checkpoint.save_checkpoint`
+
+        Continues where the checkpoint left off with this simulation's
+        scheduler and settings, see `Checkpoint.node` for `indices` and
+        `Checkpoint` for `classes`.
+        """
+        checkpoint = load_checkpoint(path, classes)
+        return checkpoint.node(
+            indices,
+            self.build_scheduler(),
+            checked=self.checked,
+            threads=self.num_threads,
+            registry=self.registry,
+        )
+
+    def build_trace(self, path: str | PathLike) -> TraceWriter:
+        return TraceWriter(path, self.registry, self.trace_level)
+
+    def build_partition_trace(self, rank: int) -> TraceWriter:
+        return self.build_trace(Path(self.trace) / f"partition-{rank}")
+
+    def partition(self, models: Iterable[Model]) -> list[list[Model]]:
+        """Split the atomic models of `models` into `num_processes` partitions
+
+        See `build_model_graph`, the partitions can be exported and reloaded
+        to reuse them across runs.
+        """
+        self.build_model_graph(models)
+        return self.partitions()
+
+    def run(
+        self,
+        models: Iterable[Model],
+        until: Time = INFINITY,
+        partitions: list[list[Model]] | None = None,
+    ) -> Time:
+        """Simulate `models` from time 0 until `until`
+
+        With more than one process, or explicit `partitions`, each partition
+        runs in its own process and the final states are copied back into
+        `models`. Returns the simulation time reached.
+        """
+        if partitions is None and self.num_processes == 1:
+            node = self.build_node(models)
+            try:
+                if self.profiler is not None:
+                    self.profiler.attach(node)
+                node.initialize()
+                return node.run(until)
+            finally:
+                node.close()
+                if self.profiler is not None:
+                    self.profiler.detach()
+        return self.run_parallel(models, until, partitions).time
+
+    def run_parallel(
+        self,
+        models: Iterable[Model],
+        until: Time = INFINITY,
+        partitions: list[list[Model]] | None = None,
+    ) -> Report:
+        """Simulate `models` partitioned across processes
+
+        Returns the time reached together with per partition metrics, such
+        as the rollbacks and efficiency of optimistic runs.
+        """
+        if partitions is None:
+            partitions = self.partition(models)
+        return run_partitions(
+            partitions,
+            until,
+            self.build_scheduler,
+            self.checked,
+            self.optimism,
+            self.transport,
+            threads=self.num_threads,
+            registry=self.registry,
+            trace=None if self.trace is None else self.build_partition_trace,
+            profiler=self.profiler,
+        )
+
+    def replicate(
+        self,
+        factory: Callable[[], Iterable[Model]],
+        replications: int,
+        until: Time = INFINITY,
+        measure: Measure = sink_statistics,
+        processes: int | None = None,
+        seed: int = SEED,
+    ) -> Replications:
+        """Run independent replications of the models built by `factory`
+
+        Each one runs with this simulation's settings and its own seed
+        spawned from `seed`, see `replicate`. Only what `measure` returns,
+        by default the statistics of the named `Sink`s, comes back.
+        """
+        return replicate(
+            factory,
+            replications,
+            self,
+            until,
+            measure,
+            processes,
+            seed,
+        )
+
+    def fork(
+        self,
+        models: Iterable[Model],
+        at: Time,
+        scenarios: Iterable[Scenario],
+        until: Time = INFINITY,
+        measure: Measure = sink_statistics,
+        processes: int | None = None,
+        method: Method | None = None,
+    ) -> list[dict]:
+        """Warm `models` up until `at`, then branch into every scenario until `until`
 
-    def build_model_graph(self):
-        ...
+        The warm-up runs once, each scenario overrides fields of some models,
+        such as `StateConstant` parameters, and continues from there in a
+        forked process, see `scenarios.fork`. Returns what `measure` makes
+        of the models at the end of each scenario; `models` are left at `at`.
+        """
+        if self.num_processes > 1:
+            raise ValueError("only sequential simulations can be forked")
+        node = self.build_node(models)
+        try:
+            node.initialize()
+            node.run(at)
+            return fork(node, scenarios, until, measure, processes, method)
+        finally:
+            node.close()
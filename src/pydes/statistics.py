@@ -0,0 +1,322 @@
+"""Online statistics with bounded memory, and the sink collecting them
+
+Each `Statistic` accumulates a stream of values in constant space whatever the
+number of observations, and merges with statistics of the same kind gathered
+elsewhere, such as in other partitions or replications:
+
+- `Moments` keeps the count, mean, variance (Welford), minimum and maximum
+- `TimeWeighted` integrates a piecewise constant level, like a queue length
+- `Histogram` counts values into fixed bins
+- `QuantileSketch` estimates quantiles within a relative accuracy (DDSketch)
+
+A `Sink` feeds every value it receives to its statistics, in place of a
+model appending them all to a list.
+"""
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Self
+
+from pydantic import InstanceOf
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import Inputs, MultiInputChannel
+from pydes.core import INFINITY, Time
+
+__all__ = (
+    "Histogram",
+    "Moments",
+    "QuantileSketch",
+    "Sink",
+    "Statistic",
+    "TimeWeighted",
+    "merge",
+)
+
+
+class Statistic(ABC):
+    @abstractmethod
+    def add(self, value: float, time: Time = 0.0):
+        """Observe `value` at `time`, which only time weighted statistics use"""
+
+    @abstractmethod
+    def merge(self, other: Self):
+        """Add the observations of `other` to this statistic"""
+
+
+def merge[S: Statistic](statistics: Iterable[S]) -> S:
+    """A statistic of the observations of all `statistics`, which are left as is"""
+    statistics = iter(statistics)
+    merged = deepcopy(next(statistics))
+    for statistic in statistics:
+        merged.merge(statistic)
+    return merged
+
+
+@dataclass
+class Moments(Statistic):
+    """The count, mean and variance of the values, updated with Welford's algorithm"""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    """The sum of the squared deviations from the mean"""
+    min: float = INFINITY
+    max: float = -INFINITY
+
+    def add(self, value: float, time: Time = 0.0):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Moments"):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        # Chan et al.'s pairwise update
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """The sample variance, NaN for fewer than two values"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+@dataclass
+class TimeWeighted(Statistic):
+    """The time average of a level that holds its value between observations
+
+    Each value replaces the level from its time on; the level is 0 from time 0
+    until the first one. The time after the last observation is only
+    counted once `close` integrates the level up to the end of the run, which
+    should precede merging.
+    """
+
+    level: float = 0.0
+    since: Time = 0.0
+    """The time the current level was observed"""
+    duration: float = 0.0
+    area: float = 0.0
+    """The integral of the level over `duration`"""
+    area2: float = 0.0
+    """The integral of the squared level over `duration`"""
+    min: float = INFINITY
+    max: float = -INFINITY
+
+    def add(self, value: float, time: Time = 0.0):
+        self.close(time)
+        self.level = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def close(self, time: Time):
+        """Integrate the current level up to `time`"""
+        if (elapsed := time - self.since) > 0:
+            self.duration += elapsed
+            self.area += self.level * elapsed
+            self.area2 += self.level * self.level * elapsed
+            self.since = time
+
+    def merge(self, other: "TimeWeighted"):
+        self.duration += other.duration
+        self.area += other.area
+        self.area2 += other.area2
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.area / self.duration if self.duration else math.nan
+
+    @property
+    def variance(self) -> float:
+        if not self.duration:
+            return math.nan
+        return max(0.0, self.area2 / self.duration - self.mean**2)
+
+
+@dataclass
+class Histogram(Statistic):
+    """Counts of the values in `bins` equal bins from `low` to `high`
+
+    `counts` starts with the values below `low` and ends with those from
+    `high` on.
+    """
+
+    low: float
+    high: float
+    bins: int
+    counts: list[int] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.high > self.low or self.bins < 1:
+            raise ValueError(
+                f"invalid histogram bins {self.bins} from {self.low} to {self.high}"
+            )
+        if not self.counts:
+            self.counts = [0] * (self.bins + 2)
+
+    @cached_property
+    def width(self) -> float:
+        return (self.high - self.low) / self.bins
+
+    def add(self, value: float, time: Time = 0.0):
+        if value < self.low:
+            self.counts[0] += 1
+        elif value >= self.high:
+            self.counts[-1] += 1
+        else:
+            self.counts[
+                min(int((value - self.low) / self.width), self.bins - 1) + 1
+            ] += 1
+
+    def merge(self, other: "Histogram"):
+        if (other.low, other.high, other.bins) != (self.low, self.high, self.bins):
+            raise ValueError("only histograms with the same bins can be merged")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def edges(self) -> list[float]:
+        return [self.low + i * self.width for i in range(self.bins + 1)]
+
+    def quantile(self, q: float) -> float:
+        """The `q` quantile, interpolated within its bin"""
+        rank = q * self.count
+        for i, count in enumerate(self.counts):
+            if count and rank <= count:
+                if i == 0:
+                    return self.low
+                if i == self.bins + 1:
+                    return self.high
+                return self.low + (i - 1 + rank / count) * self.width
+            rank -= count
+        return math.nan
+
+
+@dataclass
+class QuantileSketch(Statistic):
+    """Quantile estimates within `relative_accuracy` of the true values (DDSketch)
+
+    Values fall into buckets growing geometrically with their magnitude. Up
+    to `max_bins` buckets are kept per sign, beyond that the buckets of the
+    smallest magnitudes are collapsed, which only affects the quantiles
+    nearest zero: the low quantiles of the positive values and the high
+    quantiles of the negative ones.
+    """
+
+    relative_accuracy: float = 0.01
+    max_bins: int = 2048
+    positive: dict[int, int] = field(default_factory=dict)
+    negative: dict[int, int] = field(default_factory=dict)
+    zeros: int = 0
+    count: int = 0
+
+    @cached_property
+    def gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @cached_property
+    def log_gamma(self) -> float:
+        return math.log(self.gamma)
+
+    def add(self, value: float, time: Time = 0.0):
+        self.count += 1
+        if value > 0:
+            store = self.positive
+        elif value < 0:
+            store, value = self.negative, -value
+        else:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        store[key] = store.get(key, 0) + 1
+        if len(store) > self.max_bins:
+            self.collapse(store)
+
+    def collapse(self, store: dict[int, int]):
+        keys = sorted(store)
+        excess = len(keys) - self.max_bins + 1
+        store[keys[excess]] += sum(store.pop(key) for key in keys[:excess])
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                "only sketches with the same relative accuracy can be merged"
+            )
+        for store, others in (
+            (self.positive, other.positive),
+            (self.negative, other.negative),
+        ):
+            for key, count in others.items():
+                store[key] = store.get(key, 0) + count
+            if len(store) > self.max_bins:
+                self.collapse(store)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """The `q` quantile of the values, NaN when there are none"""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            if (seen := seen + self.negative[key]) > rank:
+                return -self.value(key)
+        if (seen := seen + self.zeros) > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            if (seen := seen + self.positive[key]) > rank:
+                return self.value(key)
+        return self.value(max(self.positive))
+
+
+class Sink(Atomic):
+    """Adds every value received to each of its named `statistics`
+
+    Values are turned into numbers by `measure`, override it to observe a
+    property of the messages. They are added as they are received, at the
+    current time, `time.last`.
+    """
+
+    statistics: dict[str, InstanceOf[Statistic]] = StateVariable(default_factory=dict)
+    observe = MultiInputChannel()
+
+    def __getitem__(self, name: str) -> Statistic:
+        return self.statistics[name]
+
+    def measure(self, value: Any) -> float:
+        return float(value)
+
+    def external_transition(self, inputs: Inputs[Any]):
+        time, statistics = self.time.last, self.statistics.values()
+        for value in inputs.values():
+            value = self.measure(value)
+            for statistic in statistics:
+                statistic.add(value, time)
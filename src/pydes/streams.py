@@ -0,0 +1,141 @@
+"""Independent, reproducible random streams for models
+
+Every model owns a `Stream` seeded from the root `SEED` and its own id, so the
+numbers a model draws do not depend on the order in which other models draw
+theirs, nor on partitioning or threads. Variates are generated by NumPy in
+blocks and handed out one at a time as Python floats, which is far cheaper
+than a scalar `Generator` call per draw.
+"""
+from collections.abc import Iterator
+from itertools import islice
+from operator import length_hint
+from typing import Any
+from uuid import UUID
+
+from numpy.random import PCG64DXSM, Generator, SeedSequence
+
+from pydes.core import SEED
+
+__all__ = (
+    "Stream",
+    "seed_sequence",
+)
+
+# every buffered distribution draws from its own substream, `generator` too
+KINDS = ("random", "normal", "exponential", "generator")
+
+
+def seed_sequence(key: UUID | int, seed: int = SEED) -> SeedSequence:
+    """The seed of the stream identified by `key`, derived from `seed`"""
+    key = key.int if isinstance(key, UUID) else key
+    words = []
+    while True:
+        words.append(key & 0xFFFFFFFF)
+        if not (key := key >> 32):
+            break
+    return SeedSequence(seed, spawn_key=tuple(words))
+
+
+class Stream:
+    """Buffered random variates of one model, see `Model.rng`
+
+    `random`, `normal` and `exponential` prefetch `block` variates at a time,
+    each from a separate substream, so every sequence is the same whatever
+    mix of calls precedes it. `generator` draws from a fourth substream, for
+    bulk draws of other distributions.
+
+    A stream pickles as the generator states at the start of the current
+    blocks and the positions within them, so snapshots stay small.
+    """
+
+    __slots__ = (
+        "key",
+        "block",
+        "_substreams",
+        "_starts",
+        "_random",
+        "_normal",
+        "_exponential",
+    )
+
+    key: int
+    block: int
+    _substreams: dict[str, Generator]
+    # generator states before each current block, to rebuild it on unpickling
+    _starts: dict[str, dict[str, Any]]
+    _random: Iterator[float]
+    _normal: Iterator[float]
+    _exponential: Iterator[float]
+
+    def __init__(self, key: UUID | int, block: int = 4096):
+        self.key = key.int if isinstance(key, UUID) else key
+        self.block = block
+        self._substreams = {}
+        self._starts = {}
+        self._random = self._normal = self._exponential = iter(())
+
+    def substream(self, kind: str) -> Generator:
+        if (generator := self._substreams.get(kind)) is None:
+            seed = seed_sequence(self.key).spawn(len(KINDS))[KINDS.index(kind)]
+            generator = self._substreams[kind] = Generator(PCG64DXSM(seed))
+        return generator
+
+    @property
+    def generator(self) -> Generator:
+        """Unbuffered access to the model's own `Generator`"""
+        return self.substream("generator")
+
+    def refill(self, kind: str) -> Iterator[float]:
+        """Draw the next block of `kind` variates"""
+        generator = self.substream(kind)
+        self._starts[kind] = generator.bit_generator.state
+        match kind:
+            case "random":
+                block = generator.random(self.block)
+            case "normal":
+                block = generator.standard_normal(self.block)
+            case "exponential":
+                block = generator.standard_exponential(self.block)
+            case _:
+                raise ValueError(f"{kind} variates are not buffered")
+        values = iter(block.tolist())
+        setattr(self, f"_{kind}", values)
+        return values
+
+    def random(self) -> float:
+        """A uniform variate in [0, 1)"""
+        try:
+            return next(self._random)
+        except StopIteration:
+            return next(self.refill("random"))
+
+    def normal(self, loc: float = 0.0, scale: float = 1.0) -> float:
+        """A normal variate of mean `loc` and standard deviation `scale`"""
+        try:
+            return loc + scale * next(self._normal)
+        except StopIteration:
+            return loc + scale * next(self.refill("normal"))
+
+    def exponential(self, scale: float = 1.0) -> float:
+        """An exponential variate of mean `scale`"""
+        try:
+            return scale * next(self._exponential)
+        except StopIteration:
+            return scale * next(self.refill("exponential"))
+
+    def __getstate__(self) -> dict[str, Any]:
+        positions = {
+            kind: (start, self.block - length_hint(getattr(self, f"_{kind}")))
+            for kind, start in self._starts.items()
+        }
+        if (generator := self._substreams.get("generator")) is not None:
+            positions["generator"] = (generator.bit_generator.state, 0)
+        return {"key": self.key, "block": self.block, "positions": positions}
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__init__(state["key"], state["block"])
+        for kind, (start, position) in state["positions"].items():
+            self.substream(kind).bit_generator.state = start
+            if kind != "generator":
+                values = self.refill(kind)
+                next(islice(values, position, position), None)
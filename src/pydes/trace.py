@@ -0,0 +1,329 @@
+"""Binary event traces
+
+A `TraceWriter` records every transition and every message of a `Node` as a
+fixed-width record: the time, the model's `Registry` index, the event kind,
+the port and a reference to the payload. Records collect in preallocated
+NumPy columns, one per field, written in bulk once per step, and are appended
+to one `.npy` file per column whenever the buffers fill up. Each file's header
+is rewritten on every flush, and the model and port descriptions whenever new
+ones appear, so a trace can be loaded, memory-mapped, while the simulation
+still runs.
+
+Payloads are only kept at the `PAYLOADS` level, packed with the codec into a
+separate file; references to other models are stored by id. `read_trace`
+loads the columns back, with the model names and port descriptions.
+"""
+import json
+import struct
+from collections.abc import Iterable, Mapping, Sequence
+from enum import IntEnum
+from os import PathLike
+from pathlib import Path
+from typing import Any, BinaryIO, Self
+from uuid import UUID
+
+import numpy as np
+from numpy.lib.format import dtype_to_descr
+
+from pydes.atomic import Atomic
+from pydes.channel import Port
+from pydes.core import Time, codec, deserialize
+from pydes.coupled import flatten
+from pydes.model import Model
+from pydes.registry import Registry
+
+__all__ = (
+    "Kind",
+    "Level",
+    "Trace",
+    "TraceWriter",
+    "read_trace",
+)
+
+
+class Kind(IntEnum):
+    INTERNAL = 0
+    EXTERNAL = 1
+    CONFLUENT = 2
+    MESSAGE = 3
+
+
+class Level(IntEnum):
+    """How much of a model's activity is traced, each level adds to the previous"""
+
+    OFF = 0
+    TRANSITIONS = 1
+    MESSAGES = 2
+    PAYLOADS = 3
+
+
+COLUMNS = {
+    "time": np.dtype("<f8"),
+    "model": np.dtype("<i4"),
+    "kind": np.dtype("u1"),
+    "port": np.dtype("<i4"),
+    "payload": np.dtype("<i8"),
+}
+OFFSETS = np.dtype("<i8")
+# large enough for any column's header, a multiple of 64 like numpy's own
+HEADER = 128
+MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _header(dtype: np.dtype, length: int) -> bytes:
+    text = repr(
+        {"descr": dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+    )
+    text = text.ljust(HEADER - len(MAGIC) - 3) + "\n"
+    return MAGIC + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def _append(file: BinaryIO, array: np.ndarray, length: int):
+    """Append `array` to the `.npy` file, which then holds `length` items"""
+    file.write(array.tobytes())
+    end = file.tell()
+    file.seek(0)
+    file.write(_header(array.dtype, length))
+    file.seek(end)
+    file.flush()
+
+
+class TraceWriter:
+    """Records the events of a node into the directory `path`
+
+    `level` applies to every model without a level of its own, see
+    `set_level`. Up to `capacity` records are buffered between flushes.
+    """
+
+    path: Path
+    registry: Registry
+    level: Level
+    levels: dict[int, Level]
+    capacity: int
+    size: int
+    length: int
+    buffers: dict[str, np.ndarray]
+    files: dict[str, BinaryIO]
+    ports: dict[Port, int]
+    payloads: BinaryIO
+    offsets: list[int]
+    """The end of every payload in `payloads.bin` not flushed yet"""
+    payload_count: int
+    payload_end: int
+    offsets_file: BinaryIO
+    described: tuple[int, int]
+
+    def __init__(
+        self,
+        path: str | PathLike,
+        registry: Registry,
+        level: Level = Level.MESSAGES,
+        capacity: int = 1 << 16,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.registry = registry
+        self.level = level
+        self.levels = {}
+        self.capacity = capacity
+        # records buffered, and records flushed
+        self.size = self.length = 0
+        self.buffers = {
+            name: np.empty(capacity, dtype) for name, dtype in COLUMNS.items()
+        }
+        self.files = {}
+        for name, dtype in COLUMNS.items():
+            file = self.files[name] = open(self.path / f"{name}.npy", "wb")
+            file.write(_header(dtype, 0))
+        self.ports = {}
+        self.payloads = open(self.path / "payloads.bin", "wb")
+        self.offsets = []
+        self.payload_count = self.payload_end = 0
+        self.offsets_file = open(self.path / "offsets.npy", "wb")
+        self.offsets_file.write(_header(OFFSETS, 0))
+        # the models and ports last described in `metadata.json`
+        self.described = (-1, -1)
+
+    def set_level(self, models: Model | Iterable[Model], level: Level):
+        """Trace `models`, or the atomic models within them, at `level`"""
+        for model in flatten([models] if isinstance(models, Model) else models):
+            self.levels[self.registry.register(model)] = level
+
+    def traced(self, models: Sequence[Atomic], level: Level) -> list[Atomic]:
+        """The `models` traced at `level` or above"""
+        if not self.levels:
+            return list(models) if self.level >= level else []
+        levels, default = self.levels, self.level
+        return [model for model in models if levels.get(model._index, default) >= level]
+
+    def transitions(
+        self,
+        time: Time,
+        imminent: list[Atomic],
+        receivers: list[Atomic],
+        inbox: list[dict | None],
+    ):
+        """Record the transitions about to be applied, before the bags are cleared"""
+        imminent = self.traced(imminent, Level.TRANSITIONS)
+        indices = {model._index for model in imminent}
+        models = [model._index for model in imminent]
+        kinds = [Kind.CONFLUENT if inbox[i] else Kind.INTERNAL for i in models]
+        for model in self.traced(receivers, Level.TRANSITIONS):
+            if (i := model._index) not in indices and inbox[i]:
+                models.append(i)
+                kinds.append(Kind.EXTERNAL)
+        if models:
+            self.write(time, models, kinds, -1, -1)
+
+    def messages(
+        self, time: Time, imminent: list[Atomic], outputs: list[dict[Port, Any]]
+    ):
+        """Record the outputs of the `imminent` models, one record per port"""
+        levels, default = self.levels, self.level
+        models, ports, payloads = [], [], []
+        for model, output in zip(imminent, outputs):
+            if (
+                not output
+                or (level := levels.get(model._index, default)) < Level.MESSAGES
+            ):
+                continue
+            for port, value in output.items():
+                # unconnected output channels have no port
+                if port is None:
+                    continue
+                models.append(model._index)
+                ports.append(self.port(port))
+                payloads.append(self.payload(value) if level >= Level.PAYLOADS else -1)
+        if models:
+            self.write(time, models, Kind.MESSAGE, ports, payloads)
+
+    def port(self, port: Port) -> int:
+        if (i := self.ports.get(port)) is None:
+            i = self.ports[port] = len(self.ports)
+        return i
+
+    def payload(self, value: Any) -> int:
+        data = codec.pack(value)
+        self.payloads.write(data)
+        self.payload_end += len(data)
+        self.offsets.append(self.payload_end)
+        self.payload_count += 1
+        return self.payload_count - 1
+
+    def write(
+        self, time: Time, models: list[int], kinds: Any, ports: Any, payloads: Any
+    ):
+        """Append one record per model, the other fields are scalars or lists"""
+        if self.size + len(models) > self.capacity:
+            self.flush()
+            if len(models) > self.capacity:
+                self.buffers = {
+                    name: np.empty(len(models), dtype)
+                    for name, dtype in COLUMNS.items()
+                }
+                self.capacity = len(models)
+        start, end = self.size, self.size + len(models)
+        buffers = self.buffers
+        buffers["time"][start:end] = time
+        buffers["model"][start:end] = models
+        buffers["kind"][start:end] = kinds
+        buffers["port"][start:end] = ports
+        buffers["payload"][start:end] = payloads
+        self.size = end
+
+    def flush(self):
+        """Append the buffered records to the column files, and update the metadata"""
+        size = self.size
+        self.length += size
+        for name, file in self.files.items():
+            _append(file, self.buffers[name][:size], self.length)
+        self.size = 0
+        self.payloads.flush()
+        _append(self.offsets_file, np.array(self.offsets, OFFSETS), self.payload_count)
+        self.offsets.clear()
+        # the descriptions only grow with new models and ports
+        if (described := (len(self.registry), len(self.ports))) == self.described:
+            return
+        self.described = described
+        metadata = {
+            "models": [[str(model.id), model.name] for model in self.registry],
+            "ports": [
+                [_describe(port.output), _describe(port.input)] for port in self.ports
+            ],
+        }
+        (self.path / "metadata.json").write_text(json.dumps(metadata))
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+        self.payloads.close()
+        self.offsets_file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _describe(channel) -> str:
+    return f"{channel.owner.path}.{channel.name}"
+
+
+class Trace:
+    """A trace loaded by `read_trace`, each column an array with a record per row"""
+
+    time: np.ndarray
+    model: np.ndarray
+    kind: np.ndarray
+    port: np.ndarray
+    payload: np.ndarray
+    models: list[tuple[str, str]]
+    """The id and name of every model, by index"""
+    ports: list[tuple[str, str]]
+    """The output and input channel of every port, by index"""
+
+    def __init__(self, path: str | PathLike, mmap: bool = True):
+        self.path = Path(path)
+        for name in COLUMNS:
+            setattr(
+                self, name, np.load(self.path / f"{name}.npy", "r" if mmap else None)
+            )
+        metadata = json.loads((self.path / "metadata.json").read_text())
+        self.models = [tuple(model) for model in metadata["models"]]
+        self.ports = [tuple(port) for port in metadata["ports"]]
+        self.offsets = np.load(self.path / "offsets.npy")
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def select(
+        self, model: Model | None = None, kind: Kind | None = None
+    ) -> np.ndarray:
+        """The rows recording events of `model` and of `kind`"""
+        mask = np.ones(len(self), bool)
+        if model is not None:
+            ids = [id for id, _ in self.models]
+            mask &= self.model == ids.index(str(model.id))
+        if kind is not None:
+            mask &= self.kind == kind
+        return np.flatnonzero(mask)
+
+    def load_payload(self, row: int, models: Mapping[UUID, Model] | None = None) -> Any:
+        """The payload of the message at `row`
+
+        Payloads referencing models need the simulation's models, by id, to
+        resolve them.
+        """
+        if (i := int(self.payload[row])) < 0:
+            raise ValueError(f"row {row} has no payload")
+        start = int(self.offsets[i - 1]) if i else 0
+        with open(self.path / "payloads.bin", "rb") as file:
+            file.seek(start)
+            return deserialize(file.read(int(self.offsets[i]) - start), models)
+
+
+def read_trace(path: str | PathLike, mmap: bool = True) -> Trace:
+    """Load the trace written to `path`, memory-mapping the columns by default"""
+    return Trace(path, mmap)
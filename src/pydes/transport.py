@@ -0,0 +1,174 @@
+"""Shared memory transport for messages between the processes of a run
+
+A `RingBuffer` is a single-producer single-consumer queue living in a
+`multiprocessing.shared_memory` block. Each message is written as a packed
+record: a fixed header holding its destination, timestamp and routing fields,
+followed by its encoded content. The producer only publishes its write
+position on `flush`, so a whole timestep becomes visible to the consumer at
+once, and the consumer hands out payloads as `memoryview`s into the shared
+block without copying them.
+
+Neither side takes a lock: the producer owns the write position and the
+consumer the read position, each written by one process and read by the
+other. The consumer must not rely on a record before the producer flushed it;
+runs in `pydes.parallel` only read after the coordinator relayed that the
+producer finished its step, which orders the accesses.
+"""
+import struct
+from collections.abc import Iterator
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+from uuid import UUID
+
+from pydes.core import Time
+
+__all__ = (
+    "Record",
+    "RingBuffer",
+)
+
+# write and read positions on separate cache lines, then the records
+POSITION = struct.Struct("<Q")
+HEAD, TAIL, DATA = 0, 64, 128
+
+# length, port, flags, padding, sequence, timestamp, destination
+RECORD = struct.Struct("<IIIIqd16s")
+LENGTH = struct.Struct("<I")
+NEGATIVE = 1
+# a length marking the unused end of the buffer, the next record is at 0
+WRAP = 0xFFFFFFFF
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class Record(NamedTuple):
+    destination: UUID
+    timestamp: Time
+    port: int
+    sequence: int
+    negative: bool
+    payload: memoryview
+
+
+class RingBuffer:
+    """Lock-free single-producer single-consumer queue of message records
+
+    `capacity` is the size of the record area in bytes, rounded up to a
+    multiple of 8. A record that does not fit is refused by `write` rather
+    than waited for, so a producer never blocks on its consumer.
+    """
+
+    memory: SharedMemory
+    capacity: int
+    head: int
+    tail: int
+
+    def __init__(self, capacity: int = 1 << 20, name: str | None = None):
+        self.capacity = _aligned(capacity)
+        if name is None:
+            self.memory = SharedMemory(create=True, size=DATA + self.capacity)
+            POSITION.pack_into(self.memory.buf, HEAD, 0)
+            POSITION.pack_into(self.memory.buf, TAIL, 0)
+        else:
+            self.memory = SharedMemory(name=name)
+        # each side's own position, the peer's is read from shared memory
+        self.head = POSITION.unpack_from(self.memory.buf, HEAD)[0]
+        self.tail = POSITION.unpack_from(self.memory.buf, TAIL)[0]
+
+    @property
+    def name(self) -> str:
+        """Attach to the same buffer from another process with `RingBuffer(name=...)`"""
+        return self.memory.name
+
+    def write(
+        self,
+        destination: UUID,
+        timestamp: Time,
+        payload: bytes,
+        port: int = 0,
+        sequence: int = 0,
+        negative: bool = False,
+    ) -> bool:
+        """Append a record, returns False when there is no room for it
+
+        The record stays invisible to the consumer until the next `flush`.
+        """
+        buf, capacity, head = self.memory.buf, self.capacity, self.head
+        size = _aligned(RECORD.size + len(payload))
+        offset = head % capacity
+        # records are contiguous, skip the end of the buffer if too short
+        skip = capacity - offset if capacity - offset < size else 0
+        tail = POSITION.unpack_from(buf, TAIL)[0]
+        if head + skip + size - tail > capacity:
+            return False
+        if skip:
+            LENGTH.pack_into(buf, DATA + offset, WRAP)
+            offset = 0
+        start = DATA + offset
+        RECORD.pack_into(
+            buf,
+            start,
+            len(payload),
+            port,
+            NEGATIVE if negative else 0,
+            0,
+            sequence,
+            timestamp,
+            destination.bytes,
+        )
+        start += RECORD.size
+        buf[start : start + len(payload)] = payload
+        self.head = head + skip + size
+        return True
+
+    def flush(self):
+        """Publish the records written since the last flush"""
+        POSITION.pack_into(self.memory.buf, HEAD, self.head)
+
+    def __iter__(self) -> Iterator[Record]:
+        """Read every published record
+
+        Payloads are views into the shared block, valid until the iteration
+        finishes and the space is handed back to the producer.
+        """
+        buf, capacity = self.memory.buf, self.capacity
+        head = POSITION.unpack_from(buf, HEAD)[0]
+        tail = self.tail
+        try:
+            while tail < head:
+                offset = tail % capacity
+                # the end of the buffer may be too short for a whole header
+                if LENGTH.unpack_from(buf, DATA + offset)[0] == WRAP:
+                    tail += capacity - offset
+                    continue
+                (
+                    length,
+                    port,
+                    flags,
+                    _,
+                    sequence,
+                    timestamp,
+                    destination,
+                ) = RECORD.unpack_from(buf, DATA + offset)
+                start = DATA + offset + RECORD.size
+                yield Record(
+                    UUID(bytes=destination),
+                    timestamp,
+                    port,
+                    sequence,
+                    bool(flags & NEGATIVE),
+                    buf[start : start + length],
+                )
+                tail += _aligned(RECORD.size + length)
+        finally:
+            self.tail = tail
+            POSITION.pack_into(buf, TAIL, tail)
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        """Free the shared block, once every process closed it"""
+        self.memory.unlink()
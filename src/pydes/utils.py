@@ -1,13 +1,16 @@
 import heapq
-from collections.abc import Iterable
+from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Callable, Iterable
 from dataclasses import field
+from itertools import count, repeat
 
 from pydantic.dataclasses import dataclass
 
 from pydes.core import INFINITY, Time
 
 
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class SimulationTime:
     last: Time = field(default=0, compare=False)
     next: Time = field(default=INFINITY, compare=True)
@@ -19,10 +22,65 @@ class SimulationTime:
 @dataclass(frozen=True, slots=True, order=True)
 class QueueItem[T]:
     priority: float = field(compare=True, hash=False)
-    value: T = field(compare=True, hash=True)
+    value: T = field(compare=False, hash=True)
 
 
-class MapQueue[T]:
+class EventQueue[T](ABC):
+    """Interface shared by the scheduler priority queue backends
+
+    Values are unique; `push` returns False for a value already queued,
+    `update` and `remove` raise `KeyError` for a value that is not.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __contains__(self, value: T) -> bool:
+        ...
+
+    @abstractmethod
+    def peek_time(self) -> float:
+        """Return the lowest queued priority, `INFINITY` when empty"""
+
+    @abstractmethod
+    def push(self, value: T, priority: float) -> bool:
+        ...
+
+    @abstractmethod
+    def pop(self) -> T:
+        ...
+
+    @abstractmethod
+    def update(self, value: T, priority: float) -> None:
+        ...
+
+    @abstractmethod
+    def remove(self, value: T) -> None:
+        ...
+
+    def pop_imminent(self) -> list[T]:
+        """Pop every value sharing the lowest priority"""
+        time = self.peek_time()
+        imminent: list[T] = []
+        while self and self.peek_time() == time:
+            imminent.append(self.pop())
+        return imminent
+
+    def reschedule(self, items: Iterable[tuple[T, float]]) -> None:
+        """Push or update many values at once"""
+        for value, priority in items:
+            if not self.push(value, priority):
+                self.update(value, priority)
+
+
+def bulk(changes: int, size: int) -> bool:
+    """Whether `changes` sifts cost more than rebuilding a heap of `size`"""
+    return changes * size.bit_length() > size
+
+
+class MapQueue[T](EventQueue[T]):
     """Updated version of networkx.utils.mapping_queue.MappingQueue"""
 
     heap: list[QueueItem[T]]
@@ -81,6 +139,9 @@ class MapQueue[T]:
             pos = parent_pos
         self.__set(new_item, pos)
 
+    def peek_time(self) -> float:
+        return self.heap[0].priority if self.heap else INFINITY
+
     def push(self, value: T, priority: float):
         if value in self.position:
             return False
@@ -110,3 +171,364 @@ class MapQueue[T]:
             return
         self.__set(self.heap.pop(), pos)
         self.__sift_up(pos)
+
+    def pop_imminent(self) -> list[T]:
+        heap = self.heap
+        if not heap:
+            return []
+        # items sharing the root priority form a subtree hanging off the root
+        time, end_pos = heap[0].priority, len(heap)
+        positions = [0]
+        for pos in positions:
+            for child_pos in ((pos << 1) + 1, (pos << 1) + 2):
+                if child_pos < end_pos and heap[child_pos].priority == time:
+                    positions.append(child_pos)
+        if not bulk(len(positions), end_pos):
+            return [self.pop() for _ in positions]
+        imminent = [heap[pos].value for pos in positions]
+        self.heap = [item for item in heap if item.priority != time]
+        self.__heapify()
+        return imminent
+
+    def reschedule(self, items: Iterable[tuple[T, float]]):
+        items = list(items)
+        if not bulk(len(items), len(self.heap) + len(items)):
+            return super().reschedule(items)
+        heap, position = self.heap, self.position
+        for value, priority in items:
+            if (pos := position.get(value)) is None:
+                position[value] = len(heap)
+                heap.append(QueueItem(priority, value))
+            else:
+                heap[pos] = QueueItem(priority, value)
+        self.__heapify()
+
+
+class IndexedQueue[T](EventQueue[T]):
+    """Indexed binary heap with the `MapQueue` interface, backed by arrays
+
+    Every value is mapped to a dense integer slot, either through the `index`
+    callable or by assigning slots in insertion order, which requires
+    hashable values. Only pushing assigns a slot, lookups leave the slots as
+    they are. The heap holds slots, and priorities and heap positions live
+    in contiguous `array` buffers indexed by slot, so pushes and updates
+    allocate no per-item objects.
+    """
+
+    heap: array[int]
+    position: array[int]
+    priority: array[float]
+    values: list[T | None]
+    slots: dict[T, int]
+    index: Callable[[T], int]
+    """The slot of a value, assigning one if needed"""
+    slot: Callable[[T], int]
+    """The slot of a value, -1 if it has none"""
+
+    def __init__(
+        self,
+        data: Iterable[tuple[float, T]] | None = None,
+        index: Callable[[T], int] | None = None,
+    ):
+        self.heap = array("q")
+        self.position = array("q")
+        self.priority = array("d")
+        self.values = []
+        self.slots = {}
+        self.index = self.__assign if index is None else index
+        self.slot = self.__slot if index is None else index
+        for priority, value in data or ():
+            slot = self.__reserve(value)
+            if self.position[slot] >= 0:
+                raise ValueError("Duplicate Elements")
+            self.priority[slot] = priority
+            self.position[slot] = len(self.heap)
+            self.heap.append(slot)
+        self.__heapify()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, value: T):
+        slot = self.slot(value)
+        return 0 <= slot < len(self.position) and self.position[slot] >= 0
+
+    def __position(self, value: T) -> tuple[int, int]:
+        slot = self.slot(value)
+        if not 0 <= slot < len(self.position) or (pos := self.position[slot]) < 0:
+            raise KeyError(value)
+        return slot, pos
+
+    def __slot(self, value: T) -> int:
+        """The slot assigned to `value`, -1 if none"""
+        return self.slots.get(value, -1)
+
+    def __assign(self, value: T) -> int:
+        try:
+            return self.slots[value]
+        except KeyError:
+            slot = self.slots[value] = len(self.slots)
+            return slot
+
+    def __reserve(self, value: T) -> int:
+        slot = self.index(value)
+        if slot >= (size := len(self.values)):
+            grow = max(slot + 1 - size, size, 16)
+            self.position.extend(repeat(-1, grow))
+            self.priority.extend(repeat(INFINITY, grow))
+            self.values.extend(repeat(None, grow))
+        self.values[slot] = value
+        return slot
+
+    def __heapify(self):
+        for pos in reversed(range(len(self.heap) >> 1)):
+            self.__sift_up(pos, pos)
+
+    def __sift_down(self, start_pos: int, pos: int):
+        heap, position, priority = self.heap, self.position, self.priority
+        new_slot = heap[pos]
+        new_priority = priority[new_slot]
+        while pos > start_pos:
+            parent = heap[parent_pos := (pos - 1) >> 1]
+            if not new_priority < priority[parent]:
+                break
+            heap[pos], position[parent] = parent, pos
+            pos = parent_pos
+        heap[pos], position[new_slot] = new_slot, pos
+
+    def __sift_up(self, pos: int, start_pos: int = 0):
+        heap, position, priority = self.heap, self.position, self.priority
+        end_pos = len(heap)
+        new_slot = heap[pos]
+        child_pos = (pos << 1) + 1
+        while child_pos < end_pos:
+            child = heap[child_pos]
+            if (right_pos := child_pos + 1) < end_pos:
+                right = heap[right_pos]
+                if not priority[child] < priority[right]:
+                    child, child_pos = right, right_pos
+            heap[pos], position[child] = child, pos
+            pos = child_pos
+            child_pos = (pos << 1) + 1
+        heap[pos], position[new_slot] = new_slot, pos
+        self.__sift_down(start_pos, pos)
+
+    def peek_time(self) -> float:
+        return self.priority[self.heap[0]] if self.heap else INFINITY
+
+    def push(self, value: T, priority: float):
+        slot = self.__reserve(value)
+        if self.position[slot] >= 0:
+            return False
+        self.priority[slot] = priority
+        self.position[slot] = pos = len(self.heap)
+        self.heap.append(slot)
+        self.__sift_down(0, pos)
+        return True
+
+    def pop(self) -> T:
+        heap = self.heap
+        self.position[slot := heap[0]] = -1
+        last = heap.pop()
+        if heap:
+            heap[0], self.position[last] = last, 0
+            self.__sift_up(0)
+        return self.values[slot]
+
+    def update(self, value: T, priority: float):
+        slot, pos = self.__position(value)
+        self.priority[slot] = priority
+        self.__sift_up(pos)
+
+    def remove(self, value: T):
+        slot, pos = self.__position(value)
+        self.position[slot] = -1
+        last = self.heap.pop()
+        if pos == len(self.heap):
+            return
+        self.heap[pos], self.position[last] = last, pos
+        self.__sift_up(pos)
+
+    def pop_imminent(self) -> list[T]:
+        heap, position, priority = self.heap, self.position, self.priority
+        if not heap:
+            return []
+        # slots sharing the root priority form a subtree hanging off the root
+        time, end_pos = priority[heap[0]], len(heap)
+        positions = [0]
+        for pos in positions:
+            for child_pos in ((pos << 1) + 1, (pos << 1) + 2):
+                if child_pos < end_pos and priority[heap[child_pos]] == time:
+                    positions.append(child_pos)
+        if not bulk(len(positions), end_pos):
+            return [self.pop() for _ in positions]
+        values = self.values
+        imminent = [values[heap[pos]] for pos in positions]
+        for pos in positions:
+            position[heap[pos]] = -1
+        self.heap = heap = array("q", [slot for slot in heap if position[slot] >= 0])
+        for pos, slot in enumerate(heap):
+            position[slot] = pos
+        self.__heapify()
+        return imminent
+
+    def reschedule(self, items: Iterable[tuple[T, float]]):
+        items = list(items)
+        if not bulk(len(items), len(self.heap) + len(items)):
+            return super().reschedule(items)
+        heap, position, priority = self.heap, self.position, self.priority
+        for value, value_priority in items:
+            slot = self.__reserve(value)
+            priority[slot] = value_priority
+            if position[slot] < 0:
+                position[slot] = len(heap)
+                heap.append(slot)
+        self.__heapify()
+
+
+type CalendarEntry[T] = tuple[float, int, T]
+
+
+class CalendarQueue[T](EventQueue[T]):
+    """Calendar queue (R. Brown, 1988) with amortized O(1) push and pop
+
+    Priorities are hashed into `len(buckets)` days of `width` each, wrapping
+    around like the days of a year. Each bucket is a small binary heap of
+    `(priority, sequence, value)` entries, so ties pop in insertion order.
+    `update` and `remove` are lazy: the superseded entry stays in its bucket
+    until it surfaces and is discarded, or until the next resize. The bucket
+    count, a power of two, doubles or halves with the queue size,
+    re-estimating `width` from the spacing of the earliest entries.
+    """
+
+    buckets: list[list[CalendarEntry[T]]]
+    passive: list[CalendarEntry[T]]
+    position: dict[T, CalendarEntry[T]]
+    width: float
+    day: int
+    active: int
+    stale: int
+
+    def __init__(
+        self,
+        data: Iterable[tuple[float, T]] | None = None,
+        buckets: int = 2,
+        width: float = 1.0,
+    ):
+        if buckets < 1 or buckets & (buckets - 1):
+            raise ValueError(f"buckets must be a power of two, not {buckets}")
+        self.position = {}
+        self.sequence = count()
+        self.passive = []
+        self.active = self.stale = 0
+        self.buckets, self.width, self.day = [[] for _ in range(buckets)], width, 0
+        for priority, value in data or ():
+            if not self.push(value, priority):
+                raise ValueError("Duplicate Elements")
+
+    def __len__(self):
+        return len(self.position)
+
+    def __contains__(self, value: T):
+        return value in self.position
+
+    def __clean(self, bucket: list[CalendarEntry[T]]):
+        """Discard superseded entries from the front of `bucket`"""
+        position = self.position
+        while bucket and position.get((head := bucket[0])[2]) is not head:
+            heapq.heappop(bucket)
+            self.stale -= 1
+
+    def __locate(self) -> list[CalendarEntry[T]] | None:
+        """Return the bucket holding the earliest finite entry"""
+        if not self.active:
+            return None
+        buckets, width, day = self.buckets, self.width, self.day
+        mask = len(buckets) - 1
+        for day in range(day, day + len(buckets)):
+            bucket = buckets[day & mask]
+            self.__clean(bucket)
+            if bucket and int(bucket[0][0] / width) <= day:
+                self.day = day
+                return bucket
+        # nothing due within a year, fall back to a direct search
+        earliest = None
+        for bucket in buckets:
+            self.__clean(bucket)
+            if bucket and (earliest is None or bucket[0] < earliest[0]):
+                earliest = bucket
+        assert earliest is not None
+        self.day = int(earliest[0][0] / width)
+        return earliest
+
+    def __resize(self, size: int):
+        position = self.position
+        entries = [
+            entry
+            for bucket in self.buckets
+            for entry in bucket
+            if position.get(entry[2]) is entry
+        ]
+        self.passive = [
+            entry for entry in self.passive if position.get(entry[2]) is entry
+        ]
+        heapq.heapify(self.passive)
+        self.stale = 0
+
+        # bucket width is a small multiple of the average gap between the
+        # earliest distinct priorities
+        sample = sorted({entry[0] for entry in heapq.nsmallest(25, entries)})
+        if len(sample) > 1:
+            self.width = 3 * (sample[-1] - sample[0]) / (len(sample) - 1)
+
+        self.buckets = buckets = [[] for _ in range(size)]
+        width, mask = self.width, size - 1
+        for entry in entries:
+            buckets[int(entry[0] / width) & mask].append(entry)
+        for bucket in buckets:
+            heapq.heapify(bucket)
+        self.day = int(sample[0] / width) if sample else 0
+
+    def peek_time(self) -> float:
+        if bucket := self.__locate():
+            return bucket[0][0]
+        return INFINITY
+
+    def push(self, value: T, priority: float):
+        if value in self.position:
+            return False
+        self.position[value] = entry = (priority, next(self.sequence), value)
+        if priority == INFINITY:
+            heapq.heappush(self.passive, entry)
+            return True
+        day = int(priority / self.width)
+        heapq.heappush(self.buckets[day & (len(self.buckets) - 1)], entry)
+        if day < self.day:
+            self.day = day
+        self.active += 1
+        if self.active > 2 * len(self.buckets):
+            self.__resize(2 * len(self.buckets))
+        return True
+
+    def pop(self) -> T:
+        if bucket := self.__locate():
+            self.active -= 1
+        else:
+            self.__clean(bucket := self.passive)
+        _, _, value = heapq.heappop(bucket)
+        del self.position[value]
+        if 2 < len(self.buckets) > 2 * self.active:
+            self.__resize(len(self.buckets) // 2)
+        return value
+
+    def update(self, value: T, priority: float):
+        self.remove(value)
+        self.push(value, priority)
+
+    def remove(self, value: T):
+        priority, _, _ = self.position.pop(value)
+        if priority != INFINITY:
+            self.active -= 1
+        self.stale += 1
+        if self.stale > 2 * len(self.position) + len(self.buckets):
+            self.__resize(len(self.buckets))
@@ -0,0 +1,51 @@
+"""Save and restore times of memory-mapped checkpoints against the codec
+
+Run with `pytest tests/benchmarks/bench_checkpoint.py -s`
+"""
+import tracemalloc
+from time import perf_counter
+
+import pytest
+
+from pydes.checkpoint import load_checkpoint, save_checkpoint
+from pydes.codec import Codec
+from pydes.node import Node
+
+
+@pytest.mark.parametrize("copies", [10**3, 10**5])
+def test_checkpoint(tmp_path, trafficlight_model, copies):
+    node = Node([model for _ in range(copies) for model in trafficlight_model()])
+    node.initialize()
+    node.run(until=250)
+    path = tmp_path / "checkpoint"
+
+    tracemalloc.start()
+    start = perf_counter()
+    save_checkpoint(node, path)
+    saved = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = perf_counter()
+    checkpoint = load_checkpoint(path, {type(model) for model in node.models[:2]})
+    checkpoint.lookup(node.models[-1].id)
+    first = perf_counter() - start
+    start = perf_counter()
+    restored = checkpoint.node()
+    restore = perf_counter() - start
+    assert len(restored.models) == len(node.models)
+
+    codec = Codec()
+    start = perf_counter()
+    data = codec.encode_batch(node.models)
+    encoded = perf_counter() - start
+    start = perf_counter()
+    codec.decode_batch(data)
+    decoded = perf_counter() - start
+    size = path.stat().st_size / len(node.models)
+    print(
+        f"\n{len(node.models):,} models, {size:.0f} B/model:"
+        f" save {saved:.2f}s (peak {peak / 2**20:.1f} MiB),"
+        f" first model {first * 1e3:.1f}ms, node {restore:.2f}s;"
+        f" codec encode {encoded:.2f}s, decode {decoded:.2f}s"
+    )
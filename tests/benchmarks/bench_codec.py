@@ -0,0 +1,56 @@
+"""Message size and encode/decode rate of the msgpack codec against pickle
+
+Run with `pytest tests/benchmarks/bench_codec.py -s`
+"""
+import pickle
+import uuid
+from time import perf_counter
+
+import pytest
+
+from pydes.codec import Codec
+from pydes.message import Message
+
+CONTENTS = {
+    "scalar": lambda i: float(i),
+    "tuple": lambda i: (i, "job", 2.5),
+    "record": lambda i: {"id": uuid.UUID(int=i), "size": i, "tags": ["a", "b"]},
+}
+
+
+def pickle_batch(messages: list[Message]) -> bytes:
+    return pickle.dumps(messages, pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.mark.parametrize("content", list(CONTENTS))
+def test_codec(content):
+    make = CONTENTS[content]
+    messages = [
+        Message(destination=uuid.uuid4(), timestamp=i * 0.5, content=make(i))
+        for i in range(10_000)
+    ]
+    codec = Codec()
+    cases = {
+        "pickle": (lambda m: pickle.dumps(m, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        "msgpack": (codec.encode, codec.decode),
+        "pickle batch": (pickle_batch, pickle.loads),
+        "msgpack batch": (codec.encode_batch, codec.decode_batch),
+    }
+
+    print()
+    for name, (encode, decode) in cases.items():
+        batch = name.endswith("batch")
+        start = perf_counter()
+        data = [encode(messages)] if batch else [encode(m) for m in messages]
+        encoded = perf_counter() - start
+        start = perf_counter()
+        for item in data:
+            decode(item)
+        decoded = perf_counter() - start
+
+        size = sum(map(len, data)) / len(messages)
+        print(
+            f"{content:>7} {name:>13}: {size:6.1f} B/message,"
+            f" encode {len(messages) / encoded:10,.0f}/s,"
+            f" decode {len(messages) / decoded:10,.0f}/s"
+        )
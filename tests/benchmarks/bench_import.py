@@ -0,0 +1,46 @@
+"""Import time of the package's entry points, and the modules that dominate it
+
+Each module is imported in a fresh interpreter under `-X importtime`; the
+cumulative time of the slowest imports is reported, and the total is held to
+the budget enforced by `tests/test_imports.py`.
+
+Run with `pytest tests/benchmarks/bench_import.py -s`
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+# the budget of `tests/test_imports.py`
+BUDGET = float(os.environ.get("PYDES_IMPORT_BUDGET", 1.0))
+
+
+def import_times(module: str) -> dict[str, float]:
+    """The cumulative seconds of every import made by `import module`"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", ["pydes", "pydes.simulation"])
+def test_import(module):
+    # the best of a few, a single cold import is noisy
+    runs = [import_times(module) for _ in range(5)]
+    times = min(runs, key=lambda times: times[module])
+    slowest = sorted(
+        ((seconds, name) for name, seconds in times.items() if name != module),
+        reverse=True,
+    )[:8]
+    print(f"\nimport {module}: {times[module] * 1e3:.0f}ms")
+    for seconds, name in slowest:
+        print(f"  {name:<40} {seconds * 1e3:6.0f}ms")
+    assert times[module] < BUDGET
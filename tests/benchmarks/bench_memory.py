@@ -0,0 +1,33 @@
+"""Memory per model of the conftest models
+
+Run with `pytest tests/benchmarks/bench_memory.py -s`
+"""
+import gc
+import tracemalloc
+
+import pytest
+
+from pydes.node import Node
+
+
+def memory_per_model(build, copies: int) -> tuple[float, float]:
+    """Bytes per model allocated building the models, then building a node"""
+    build()  # warm up class level caches
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        models = [model for _ in range(copies) for model in build()]
+        built = tracemalloc.get_traced_memory()[0]
+        node = Node(models)
+        ready = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert node.models
+    return (built - start) / len(models), (ready - built) / len(models)
+
+
+@pytest.mark.parametrize("fixture", ["trafficlight_model", "queueing_model"])
+def test_memory_per_model(request, fixture):
+    models, node = memory_per_model(request.getfixturevalue(fixture), 5000)
+    print(f"\n{fixture}: {models:,.0f} B/model, {node:,.0f} B/model in the node")
@@ -0,0 +1,40 @@
+"""Throughput of the sequential kernel on the conftest models
+
+Run with `pytest tests/benchmarks/bench_node.py -s`
+"""
+from time import perf_counter
+
+import pytest
+
+from pydes.node import Node
+
+
+def throughput(
+    build, copies: int, checked: bool, until: float = 100_000.0, **kwargs
+) -> tuple[int, float]:
+    models = [model for _ in range(copies) for model in build(**kwargs)]
+    node = Node(models, checked=checked)
+    node.initialize()
+    start = perf_counter()
+    node.run(until=until)
+    return node.events, perf_counter() - start
+
+
+@pytest.mark.parametrize("checked", [True, False])
+@pytest.mark.parametrize("copies", [1, 100])
+def test_trafficlight_throughput(trafficlight_model, copies, checked):
+    events, elapsed = throughput(trafficlight_model, copies, checked)
+    print(
+        f"\ntrafficlight x{copies} {checked=}: {events} events, "
+        f"{events / elapsed:,.0f} events/s"
+    )
+
+
+@pytest.mark.parametrize("checked", [True, False])
+@pytest.mark.parametrize("copies", [1, 100])
+def test_queueing_throughput(queueing_model, copies, checked):
+    events, elapsed = throughput(queueing_model, copies, checked, jobs=200)
+    print(
+        f"\nqueueing x{copies} {checked=}: {events} events, "
+        f"{events / elapsed:,.0f} events/s"
+    )
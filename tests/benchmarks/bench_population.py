@@ -0,0 +1,62 @@
+"""Element transitions per second of scalar models versus an AtomicArray
+
+Run with `pytest tests/benchmarks/bench_population.py -s`
+"""
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.node import Node
+from pydes.population import AtomicArray, StateColumn
+
+DURATION = np.array([60.0, 50.0, 10.0])
+SUCCESSOR = np.array([1, 2, 0], np.int8)
+
+
+class Light(Atomic):
+    status: int = StateVariable(0)
+
+    def time_advance(self):
+        return float(DURATION[self.status])
+
+    def internal_transition(self):
+        self.status = int(SUCCESSOR[self.status])
+
+
+class Lights(AtomicArray):
+    status: np.ndarray = StateColumn(np.int8)
+    transitions: int = StateVariable(0)
+
+    def time_advance_array(self, index):
+        return DURATION[self.status[index]]
+
+    def internal_transition_array(self, index):
+        self.transitions += len(index)
+        self.status[index] = SUCCESSOR[self.status[index]]
+
+
+def initial_status(size: int):
+    return np.random.default_rng(0).integers(0, 3, size, dtype=np.int8)
+
+
+@pytest.mark.parametrize("size", [10**3, 10**4])
+def test_scalar(size):
+    node = Node([Light(status=status) for status in initial_status(size)])
+    node.initialize()
+    start = perf_counter()
+    node.run(until=1000)
+    elapsed = perf_counter() - start
+    print(f"\nscalar n={size}: {node.events / elapsed:,.0f} transitions/s")
+
+
+@pytest.mark.parametrize("size", [10**3, 10**4, 10**6])
+def test_array(size):
+    lights = Lights(size=size, status=initial_status(size))
+    node = Node([lights])
+    node.initialize()
+    start = perf_counter()
+    node.run(until=1000)
+    elapsed = perf_counter() - start
+    print(f"\narray n={size}: {lights.transitions / elapsed:,.0f} transitions/s")
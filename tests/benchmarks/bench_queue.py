@@ -0,0 +1,55 @@
+"""Hold-model throughput of the scheduler queue backends
+
+Run with `pytest tests/benchmarks/bench_queue.py -s`
+"""
+from random import Random
+from time import perf_counter
+
+import pytest
+
+from pydes.scheduler import BACKENDS
+from pydes.utils import IndexedQueue
+
+
+class Item:
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: int):
+        self.slot = slot
+
+
+DISTRIBUTIONS = {
+    "uniform": lambda rng: rng.uniform(0.0, 2.0),
+    "exponential": lambda rng: rng.expovariate(1.0),
+    # most time advances are identical, as with synchronised traffic lights
+    "ties": lambda rng: 1.0 if rng.random() < 0.9 else 2.0,
+}
+
+
+@pytest.mark.parametrize("size", [10**3, 10**5])
+@pytest.mark.parametrize("distribution", list(DISTRIBUTIONS))
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_hold(backend, distribution, size):
+    rng = Random(0)
+    increment = DISTRIBUTIONS[distribution]
+    items = [Item(i) for i in range(size)]
+    if BACKENDS[backend] is IndexedQueue:
+        queue = IndexedQueue[Item](index=lambda item: item.slot)
+    else:
+        queue = BACKENDS[backend]()
+
+    for item in items:
+        queue.push(item, increment(rng))
+
+    start = perf_counter()
+    for _ in range(2 * size):
+        # classic hold operation: pop the minimum and reschedule it later
+        now = queue.peek_time()
+        queue.push(queue.pop(), now + increment(rng))
+    for item in rng.sample(items, size // 2):
+        queue.update(item, queue.peek_time() + increment(rng))
+    elapsed = perf_counter() - start
+
+    print(
+        f"\n{backend:>8} {distribution:>11} n={size}: {2.5 * size / elapsed:,.0f} ops/s"
+    )
@@ -0,0 +1,182 @@
+"""Scaling of the kernel with the number of models, against a stored baseline
+
+Builds the conftest models at sizes from 10^2 up to 10^6 models and measures
+the event rate, the time to the first event (building the models and the
+node included), the peak memory per model and the codec's rate of encoding
+and decoding model states. Each result is compared against `baseline.json`,
+failing on a regression beyond `PYDES_BENCH_TOLERANCE` (0.3 by default).
+Timings are scaled by a pure Python calibration loop timed alongside them, so
+that a slower or busier machine does not pass for a regression.
+
+Sizes above `PYDES_BENCH_MAX_SIZE` (10^4 by default) are skipped. Set
+`PYDES_BENCH_UPDATE=1` to record the results as the new baseline; results
+without a baseline are recorded either way.
+
+Run with `pytest tests/benchmarks/bench_scaling.py -s`
+"""
+import gc
+import json
+import os
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from pydes.codec import Codec
+from pydes.model import Model
+from pydes.node import Node
+
+BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = [10**k for k in range(2, 7)]
+MAX_SIZE = int(os.environ.get("PYDES_BENCH_MAX_SIZE", 10**4))
+TOLERANCE = float(os.environ.get("PYDES_BENCH_TOLERANCE", 0.3))
+UPDATE = os.environ.get("PYDES_BENCH_UPDATE") == "1"
+# whether a larger value of the metric is better, and whether it is a timing
+METRICS = {
+    "events_per_second": (True, True),
+    "first_event_seconds": (False, True),
+    "peak_bytes_per_model": (False, False),
+    "encoded_models_per_second": (True, True),
+    "decoded_models_per_second": (True, True),
+}
+
+
+def calibrate(repeat: int = 5) -> float:
+    """The best time of a fixed pure Python workload on this machine, right now"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        table = {}
+        for i in range(100_000):
+            table[i % 1000] = table.get(i % 1000, 0.0) + i * 0.5
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def trafficlights(
+    build: Callable[[], list[Model]], size: int, density: float
+) -> list[Model]:
+    """`size` models in pairs, the policeman coupled to the light in `density`"""
+    light, policeman = map(type, build())
+    pairs = size // 2
+    coupled = round(pairs * density)
+    models = [model for _ in range(coupled) for model in build()]
+    models += [
+        model for _ in range(pairs - coupled) for model in (light(), policeman())
+    ]
+    return models
+
+
+def queueing(build: Callable[..., list[Model]], size: int) -> list[Model]:
+    """`size` models in independent pipelines of 4 models, each generating 10 jobs"""
+    return [model for _ in range(size // 4) for model in build(jobs=10)]
+
+
+def measure(
+    build: Callable[[], list[Model]], until: float, repeat: int
+) -> dict[str, float]:
+    """The best of `repeat` runs of every timing, short runs are noisy
+
+    A first run warms up the class level caches, its timings are dropped.
+    """
+    results: dict[str, list[float]] = {metric: [] for metric in METRICS}
+    for _ in range(repeat + 1):
+        start = perf_counter()
+        models = build()
+        node = Node(models)
+        node.initialize()
+        node.step()
+        results["first_event_seconds"].append(perf_counter() - start)
+        events = node.events
+        start = perf_counter()
+        node.run(until=until)
+        results["events_per_second"].append(
+            (node.events - events) / (perf_counter() - start)
+        )
+
+        # references between the models resolve among them
+        codec = Codec({model.id: model for model in node.models})
+        start = perf_counter()
+        data = codec.encode_batch(node.models)
+        results["encoded_models_per_second"].append(
+            len(models) / (perf_counter() - start)
+        )
+        start = perf_counter()
+        codec.decode_batch(data)
+        results["decoded_models_per_second"].append(
+            len(models) / (perf_counter() - start)
+        )
+        del models, node
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        models = build()
+        node = Node(models)
+        node.initialize()
+        results["peak_bytes_per_model"].append(
+            tracemalloc.get_traced_memory()[1] / len(models)
+        )
+    finally:
+        tracemalloc.stop()
+    return {
+        metric: max(values[-repeat:]) if METRICS[metric][0] else min(values[-repeat:])
+        for metric, values in results.items()
+    }
+
+
+def repeats(size: int) -> int:
+    return max(1, min(10, 10**4 // size))
+
+
+def check_baseline(name: str, results: dict[str, float]):
+    """Compare `results` with the baseline of `name`, recording them if asked or new"""
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    calibration = calibrate()
+    recorded = baseline.get(name, {})
+    # how much slower this machine runs now than when the baseline was recorded
+    slowdown = calibration / recorded.get("calibration_seconds", calibration)
+    print(f"\n{name}: {slowdown:.2f}x the baseline's calibration time")
+    regressions = []
+    for metric, value in results.items():
+        higher, timing = METRICS[metric]
+        if (expected := recorded.get(metric)) is not None and timing:
+            expected = expected / slowdown if higher else expected * slowdown
+        change = "" if expected is None else f" ({value / expected - 1:+.0%})"
+        print(f"  {metric:>26}: {value:14,.6g}{change}")
+        if expected is not None:
+            ratio = value / expected if higher else expected / value
+            if ratio < 1 - TOLERANCE:
+                regressions.append(f"{metric} {value:,.6g}, expected {expected:,.6g}")
+    if UPDATE or name not in baseline:
+        baseline[name] = {**results, "calibration_seconds": calibration}
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    elif regressions:
+        pytest.fail(f"{name} regressed: " + "; ".join(regressions))
+
+
+def sizes() -> list:
+    return [
+        pytest.param(
+            size,
+            marks=pytest.mark.skipif(size > MAX_SIZE, reason="PYDES_BENCH_MAX_SIZE"),
+        )
+        for size in SIZES
+    ]
+
+
+@pytest.mark.parametrize("density", [0.0, 0.5, 1.0])
+@pytest.mark.parametrize("size", sizes())
+def test_trafficlight_scaling(trafficlight_model, size, density):
+    results = measure(
+        lambda: trafficlights(trafficlight_model, size, density), 1000.0, repeats(size)
+    )
+    check_baseline(f"trafficlight n={size} density={density}", results)
+
+
+@pytest.mark.parametrize("size", sizes())
+def test_queueing_scaling(queueing_model, size):
+    results = measure(lambda: queueing(queueing_model, size), 1000.0, repeats(size))
+    check_baseline(f"queueing n={size}", results)
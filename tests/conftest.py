@@ -5,7 +5,7 @@ from pydantic.dataclasses import dataclass
 
 from pydes.atomic import Atomic, StateConstant, StateVariable
 from pydes.channel import InputChannel, Inputs, MultiOutputChannel, OutputChannel
-from pydes.core import INFINITY, Time, random
+from pydes.core import INFINITY, Time
 from pydes.errors import InvalidInputError, InvalidStateError
 
 # @pytest.fixture
@@ -26,6 +26,8 @@ def trafficlight_model():
         interrupt = InputChannel()
         observed = OutputChannel()
 
+        time_advance_fields = frozenset({"status"})
+
         def time_advance(self):
             match self.status:
                 case "red":
@@ -75,6 +77,8 @@ def trafficlight_model():
         status: PolicemanStatus = StateVariable("idle")
         interrupt = OutputChannel()
 
+        time_advance_fields = frozenset({"status"})
+
         def time_advance(self):
             """
             Time-Advance Function.
@@ -107,12 +111,24 @@ def trafficlight_model():
                 case "working":
                     return {self.interrupt: "toAutomatic"}
 
-    TrafficLight()
-    Policeman()
+    def build():
+        light, policeman = TrafficLight(), Policeman()
+        policeman.channel("interrupt").connect(light.channel("interrupt"))
+        return [light, policeman]
+
+    return build
 
 
 @pytest.fixture
 def queueing_model():
+    """A builder of a generator, queue, processor and collector, connected in turn
+
+    The processor reports itself back to the queue when it finishes a job,
+    rather than its id, and the queue is imminent while it holds an active
+    job. It accepts a finished processor and a new job in the same bag, and
+    rejects inputs on any other port.
+    """
+
     @dataclass
     class Job:
         size: int
@@ -126,13 +142,13 @@ def queueing_model():
             if self.remaining == 0:
                 return INFINITY
             else:
-                return random.random()
+                return self.rng.random()
 
         def internal_transition(self):
             self.remaining -= 1
 
         def output(self):
-            size = max(1, int(random.normal(self.size_param, 5)))
+            size = max(1, int(self.rng.normal(self.size_param, 5)))
             return {self.generate: Job(size)}
 
     class Processor(Atomic):
@@ -142,6 +158,8 @@ def queueing_model():
         send = OutputChannel()
         finish = OutputChannel()
 
+        time_advance_fields = frozenset({"event"})
+
         def time_advance(self):
             if self.event is not None:
                 return 20.0 + max(1.0, self.event.size)
@@ -155,7 +173,7 @@ def queueing_model():
             self.event = inputs[self.receive]
 
         def output(self):
-            return {self.send: self.event, self.finish: self.id}
+            return {self.send: self.event, self.finish: self}
 
     class Collector(Atomic):
         events: list[Job] = StateVariable(default_factory=list)
@@ -175,8 +193,10 @@ def queueing_model():
         finish = InputChannel()
         outputs = MultiOutputChannel()
 
+        time_advance_fields = frozenset({"active_job"})
+
         def time_advance(self) -> Time:
-            if self.queued_jobs and self.idle_processors:
+            if self.active_job is not None:
                 return self.processing_time
             else:
                 return INFINITY
@@ -188,12 +208,15 @@ def queueing_model():
                 self.active_job = None
 
         def external_transition(self, inputs: Inputs[Processor | Job]):
+            if not inputs.keys() <= {self.finish, self.enqueue}:
+                raise InvalidInputError(inputs)
             match inputs:
                 case {self.finish: Processor() as processor}:
                     self.idle_processors.append(processor)
                     if not self.active_job and self.queued_jobs:
                         # Process first task in queue
                         self.active_job = self.queued_jobs.pop(0)
+            match inputs:
                 case {self.enqueue: Job() as job}:
                     # Processing an incoming event
                     if self.idle_processors and not self.active_job:
@@ -202,8 +225,6 @@ def queueing_model():
                     else:
                         # No idle processors, so queue it
                         self.queued_jobs.append(job)
-                case _:
-                    raise InvalidInputError(inputs)
 
         def output(self):
             return {self.outputs[self.idle_processors.pop(0)]: self.active_job}
@@ -213,7 +234,15 @@ def queueing_model():
         #     port = self.out_proc[self.state.idle_procs[0]]
         #     return {port: self.state.processing}
 
-    Generator()
-    Processor()
-    Collector()
-    Queue()
+    def build(jobs: int = 100, size: float = 10.0):
+        generator = Generator(remaining=jobs, size_param=size)
+        processor = Processor(speed=1.0)
+        collector = Collector()
+        queue = Queue(idle_processors=[processor])
+        generator.channel("generate").connect(queue.channel("enqueue"))
+        queue.channel("outputs").connect(processor.channel("receive"))
+        processor.channel("send").connect(collector.channel("collect"))
+        processor.channel("finish").connect(queue.channel("finish"))
+        return [generator, queue, processor, collector]
+
+    return build
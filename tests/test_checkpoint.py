@@ -0,0 +1,111 @@
+from uuid import UUID
+
+import pytest
+from pydantic import ValidationError
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.checkpoint import load_checkpoint, save_checkpoint
+from pydes.core import random
+from pydes.node import Node
+from pydes.simulation import Simulation
+
+
+@pytest.mark.parametrize("checked", [True, False])
+def test_checkpoint(tmp_path, queueing_model, checked):
+    state = random.bit_generator.state
+    expected = queueing_model(jobs=50)
+    node = Node(expected)
+    node.initialize()
+    node.run()
+
+    random.bit_generator.state = state
+    models = queueing_model(jobs=50)
+    node = Node(models, checked=checked)
+    node.initialize()
+    node.run(until=400)
+    save_checkpoint(node, tmp_path / "checkpoint", chunk_size=3)
+
+    # the model and job classes are defined locally, in the fixture
+    classes = {type(model) for model in models} | {type(models[3].events[0])}
+    with load_checkpoint(tmp_path / "checkpoint", classes) as checkpoint:
+        assert (checkpoint.time, checkpoint.events) == (node.time, node.events)
+        assert len(checkpoint) == 4
+        restored = checkpoint.node(checked=checked)
+        assert [model.id for model in restored.models] == [model.id for model in models]
+        restored.run()
+    generator, queue, processor, collector = expected
+    assert restored.models[3].events == collector.events
+    assert restored.models[1].idle_processors == [restored.models[2]]
+
+
+def test_lazy(tmp_path, trafficlight_model):
+    models = [model for _ in range(100) for model in trafficlight_model()]
+    node = Node(models)
+    node.initialize()
+    node.run(until=250)
+    save_checkpoint(node, tmp_path / "checkpoint", chunk_size=16)
+
+    checkpoint = load_checkpoint(
+        tmp_path / "checkpoint", {type(model) for model in models}
+    )
+    light = checkpoint.lookup(models[10].id)
+    assert list(checkpoint.models.values()) == [light]
+    assert light.status == models[10].status
+    assert light.parent is None
+    assert light.path == models[10].name
+    assert light.time == models[10].time
+    with pytest.raises(KeyError):
+        checkpoint.lookup(UUID(int=0))
+
+    # a partition of the models, coupled among themselves
+    partition = checkpoint.node(checkpoint.index(model.id) for model in models[:20])
+    assert len(partition.models) == 20
+    assert len(checkpoint.models) == 20
+    partition.run(until=1000)
+    node.run(until=1000)
+    statuses = {model.id: model.status for model in models}
+    assert all(model.status == statuses[model.id] for model in partition.models)
+    checkpoint.close()
+
+
+def test_restore(tmp_path, trafficlight_model):
+    models = trafficlight_model()
+    simulation = Simulation(scheduler="indexed")
+    node = simulation.build_node(models)
+    node.initialize()
+    node.run(until=250)
+    save_checkpoint(node, tmp_path / "checkpoint")
+    restored = simulation.restore(
+        tmp_path / "checkpoint", classes={type(model) for model in models}
+    )
+    assert restored.time == node.time
+    assert restored.run(until=1000) == node.run(until=1000)
+    assert [model.status for model in restored.models] == [
+        model.status for model in models
+    ]
+
+
+class Counter(Atomic):
+    count: int = StateVariable(0)
+
+
+def test_big_ints(tmp_path):
+    counters = [Counter(count=1), Counter(count=2**70), Counter(count=-(2**80))]
+    node = Node(counters)
+    node.initialize()
+    # chunks whose counts do not all fit in 64 bits keep them in the blobs
+    save_checkpoint(node, tmp_path / "checkpoint", chunk_size=1)
+    save_checkpoint(node, tmp_path / "chunked", chunk_size=2)
+    for path in ["checkpoint", "chunked"]:
+        with load_checkpoint(tmp_path / path) as checkpoint:
+            assert [checkpoint[i].count for i in range(3)] == [1, 2**70, -(2**80)]
+
+
+def test_validated(tmp_path):
+    counter = Counter()
+    node = Node([counter], checked=False)
+    node.initialize()
+    counter.count = "many"
+    with pytest.raises(ValidationError):
+        save_checkpoint(node, tmp_path / "checkpoint")
+    node.close()
@@ -0,0 +1,82 @@
+import pytest
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import InputChannel, InputChannelDescriptor, Inputs, OutputChannel
+from pydes.coupled import Coupled, build_routes, flatten
+from pydes.node import Node
+
+
+class Ticker(Atomic):
+    tick = OutputChannel()
+
+    def time_advance(self):
+        return 1.0
+
+    def output(self):
+        return {self.tick: self.time.next}
+
+
+class Counter(Atomic):
+    received: list[float] = StateVariable(default_factory=list)
+    tick = InputChannel()
+
+    def external_transition(self, inputs: Inputs[float]):
+        self.received.append(inputs[self.tick])
+
+
+class Wrapper(Coupled):
+    inp = InputChannel()
+    out = OutputChannel()
+
+
+def test_nested_routing():
+    ticker, first, second = Ticker(), Counter(), Counter()
+    inner_a = Wrapper(components={ticker})
+    outer_a = Wrapper(components={inner_a})
+    inner_b = Wrapper(components={first, second})
+    outer_b = Wrapper(components={inner_b})
+
+    assert ticker.parent is inner_a
+    assert first.path == f"{outer_b.name}.{inner_b.name}.{first.name}"
+
+    # ticker -> inner_a -> outer_a -> outer_b -> inner_b -> first, second
+    ticker.channel("tick").connect(inner_a.channel("out"))
+    inner_a.channel("out").connect(outer_a.channel("out"))
+    outer_a.channel("out").connect(outer_b.channel("inp"))
+    inner_b.channel("inp").connect(outer_b.channel("inp"))
+    inner_b.channel("inp").connect(first.channel("tick"))
+    inner_b.channel("inp").connect(second.channel("tick"))
+
+    models = list(flatten([outer_a, outer_b]))
+    assert sorted(models, key=id) == sorted([ticker, first, second], key=id)
+
+    routes = build_routes(models)
+    assert sorted(routes[ticker.tick], key=lambda route: id(route[0])) == sorted(
+        [(first, first.tick), (second, second.tick)], key=lambda route: id(route[0])
+    )
+
+    node = Node([outer_a, outer_b])
+    node.initialize()
+    node.run(until=3)
+
+    assert first.received == second.received == [1.0, 2.0, 3.0]
+
+
+def test_invalid_coupling():
+    ticker, counter = Ticker(), Counter()
+    wrapper, unrelated = Wrapper(components={counter}), Wrapper(components=set())
+
+    # input to input is only valid from a coupled model into its components
+    with pytest.raises(ValueError):
+        unrelated.channel("inp").connect(counter.channel("tick"))
+
+    with pytest.raises(ValueError):
+        ticker.channel("tick").connect(wrapper.channel("out"))
+
+
+def test_incomplete_channel():
+    class Partial(InputChannelDescriptor):
+        __slots__ = ()
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+# seconds `import pydes.simulation` may take in a fresh interpreter, numpy and
+# pydantic included; loose enough for a busy machine, tight enough to catch
+# an eagerly imported subsystem
+BUDGET = float(os.environ.get("PYDES_IMPORT_BUDGET", 1.0))
+LAZY = ("rich", "networkx")
+
+
+def run(code: str):
+    """Run `code` in a fresh interpreter, returns what it prints as JSON"""
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def test_lazy_imports():
+    loaded = run(
+        "import json, sys\n"
+        "import pydes, pydes.logging\n"
+        "from pydes.simulation import Simulation\n"
+        "Simulation()\n"
+        f"print(json.dumps([name for name in {LAZY!r} if name in sys.modules]))\n"
+    )
+    assert loaded == []
+
+    loaded = run(
+        "import json, sys\n"
+        "from pydes.logging import rich_logging\n"
+        "from pydes.simulation import Simulation\n"
+        "from pydes import Atomic\n"
+        "rich_logging()\n"
+        "Simulation(num_processes=2).partition([Atomic(), Atomic()])\n"
+        f"print(json.dumps([name for name in {LAZY!r} if name in sys.modules]))\n"
+    )
+    assert loaded == list(LAZY)
+
+
+def test_import_budget():
+    code = (
+        "from time import perf_counter\n"
+        "start = perf_counter()\n"
+        "import pydes.simulation\n"
+        "print(perf_counter() - start)\n"
+    )
+    # the best of a few, a single cold import is noisy
+    seconds = min(run(code) for _ in range(3))
+    assert seconds < BUDGET, f"import pydes.simulation took {seconds:.3f}s"
@@ -0,0 +1,216 @@
+from collections import Counter
+
+import pytest
+from pydantic import ValidationError
+
+from pydes.atomic import Atomic, StateVariable, unchecked
+from pydes.channel import InputChannel, Inputs, OutputChannel
+from pydes.core import INFINITY
+from pydes.errors import SimulationError
+from pydes.node import Node
+from pydes.simulation import Simulation
+
+
+def test_trafficlight(trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    node = Node(models)
+    node.initialize()
+
+    assert node.run(until=100) == 60.0
+    assert light.status == "green"
+
+    # policeman switches the light to manual at t=200
+    assert node.run(until=200) == 200.0
+    assert light.status == "manual"
+    assert policeman.status == "working"
+    assert light.time.next == INFINITY
+
+    # and back to automatic at t=300
+    assert node.run(until=300) == 300.0
+    assert light.status == "red"
+    assert light.time.next == 360.0
+
+
+def test_queueing(queueing_model):
+    generator, queue, processor, collector = models = queueing_model(jobs=25)
+    node = Node(models)
+    node.initialize()
+    node.run()
+
+    assert node.step() == INFINITY
+    assert generator.remaining == 0
+    assert len(collector.events) == 25
+    assert not queue.queued_jobs
+    assert queue.idle_processors == [processor]
+
+
+def test_confluent():
+    class Ticker(Atomic):
+        tick = OutputChannel()
+
+        def time_advance(self):
+            return 1.0
+
+        def output(self):
+            return {self.tick: self.time.next}
+
+    class Counter(Atomic):
+        internal: int = StateVariable(0)
+        external: int = StateVariable(0)
+        confluent: int = StateVariable(0)
+        tick = InputChannel()
+
+        def time_advance(self):
+            return 2.0 if self.time.last == 0 else 1.0
+
+        def internal_transition(self):
+            self.internal += 1
+
+        def external_transition(self, inputs: Inputs[float]):
+            self.external += 1
+
+        def confluent_transition(self, inputs: Inputs[float]):
+            self.confluent += 1
+
+    ticker, counter = Ticker(), Counter()
+    ticker.channel("tick").connect(counter.channel("tick"))
+    node = Node([ticker, counter])
+    node.initialize()
+    node.run(until=4)
+
+    # external at t=1, then imminent together with the ticker at t=2,3,4
+    assert (counter.internal, counter.external, counter.confluent) == (0, 1, 3)
+    assert node.events == 8
+
+
+def test_negative_time_advance():
+    class Broken(Atomic):
+        def time_advance(self):
+            return -1.0
+
+    with pytest.raises(SimulationError):
+        Node([Broken()]).initialize()
+
+
+@pytest.mark.parametrize("backend", ["heap", "indexed", "calendar"])
+def test_scheduler_backends(trafficlight_model, backend):
+    models = [model for _ in range(10) for model in trafficlight_model()]
+    node = Node(models, Simulation(scheduler=backend).build_scheduler())
+    node.initialize()
+
+    assert node.run(until=1000) == 960.0
+    assert node.events == 250
+    assert [model.status for model in models] == ["green", "idle"] * 10
+
+
+def test_unchecked(trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    cls = type(light)
+    node = Simulation(checked=False).build_node(models)
+    assert type(light) is unchecked(cls)
+    # assignments skip validation until the node is closed
+    light.status = "blinking"
+    light.status = "red"
+    node.initialize()
+    node.run(until=1000)
+    assert light.status == "green"
+    node.validate()
+
+    light.status = "blinking"
+    with pytest.raises(ValidationError):
+        node.validate()
+    light.status = "green"
+
+    node.close()
+    assert type(light) is cls
+    with pytest.raises(ValidationError):
+        light.status = "blinking"
+
+
+def test_threads(trafficlight_model):
+    serial = [model for _ in range(40) for model in trafficlight_model()]
+    threaded = [model for _ in range(40) for model in trafficlight_model()]
+    expected = Node(serial)
+    expected.initialize()
+    expected.run(until=1000)
+
+    # chunks of 8 spread the 80 imminent models over the pool
+    node = Simulation(num_threads=4).build_node(threaded)
+    node.chunk_size = 8
+    node.initialize()
+    try:
+        assert node.run(until=1000) == expected.time
+    finally:
+        node.close()
+    assert node.events == expected.events
+    assert [model.model_dump(exclude={"id", "name"}) for model in threaded] == [
+        model.model_dump(exclude={"id", "name"}) for model in serial
+    ]
+
+
+calls = Counter()
+
+
+class Blinker(Atomic):
+    on: bool = StateVariable(False)
+    hits: int = StateVariable(0)
+    receive = InputChannel()
+
+    def time_advance(self):
+        calls[self.time_advance_fields is not None] += 1
+        return 1.0 if self.on else 3.0
+
+    def internal_transition(self):
+        self.on = not self.on
+
+    def external_transition(self, inputs: Inputs):
+        self.hits += 1
+
+
+class CachedBlinker(Blinker):
+    time_advance_fields = frozenset({"on"})
+
+
+class Pulse(Atomic):
+    pulse = OutputChannel()
+    echo = OutputChannel()
+
+    def time_advance(self):
+        return 0.5
+
+    def output(self):
+        return {self.pulse: None, self.echo: None}
+
+
+class Sink(Atomic):
+    receive = InputChannel()
+
+
+@pytest.mark.parametrize("checked", [True, False])
+def test_time_advance_fields(checked):
+    calls.clear()
+    runs = []
+    for cls in [Blinker, CachedBlinker]:
+        pulse, blinker, sink = Pulse(), cls(), Sink()
+        pulse.channel("pulse").connect(blinker.channel("receive"))
+        pulse.channel("echo").connect(sink.channel("receive"))
+        node = Simulation(checked=checked).build_node([pulse, blinker, sink])
+        node.initialize()
+        rescheduled = []
+        reschedule = node.scheduler.queue.reschedule
+
+        def record(items):
+            items = list(items)
+            rescheduled.extend(model for model, _ in items)
+            reschedule(items)
+
+        node.scheduler.queue.reschedule = record
+        node.run(until=20)
+        runs.append((blinker.time.next, blinker.on, blinker.hits, node.events))
+        # the passive sink never moves in the scheduler
+        assert sink not in rescheduled
+
+    assert runs[0] == runs[1]
+    assert Sink.time_advance_fields == frozenset()
+    # only transitions that toggle `on` recompute the time advance
+    assert calls[True] < calls[False] / 2
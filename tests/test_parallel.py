@@ -0,0 +1,249 @@
+from unittest.mock import ANY
+
+import pytest
+
+from pydes.atomic import Atomic, StateConstant, StateVariable
+from pydes.channel import InputChannel, Inputs, OutputChannel
+from pydes.core import INFINITY, Time
+from pydes.coupled import Coupled
+from pydes.errors import SimulationError
+from pydes.node import Node
+from pydes.parallel import Codec, OptimisticWorker, run_partitions
+from pydes.simulation import Simulation
+
+
+class Ticker(Atomic):
+    period: float = StateConstant(1.0)
+    ticks: int = StateVariable(0)
+    tick = OutputChannel()
+
+    def time_advance(self) -> Time:
+        return self.period
+
+    def internal_transition(self):
+        self.ticks += 1
+
+    def output(self):
+        return {self.tick: (self, self.time.next, self.ticks)}
+
+
+class Relay(Atomic):
+    """Forwards every input after `delay`, declaring it as lookahead"""
+
+    delay: float = StateConstant(2.0)
+    pending: list[tuple[float, int]] = StateVariable(default_factory=list)
+    senders: list[Ticker] = StateVariable(default_factory=list)
+    receive = InputChannel()
+    send = OutputChannel(lookahead=2.0)
+
+    def time_advance(self) -> Time:
+        if not self.pending:
+            return INFINITY
+        return self.pending[0][0] - self.time.last
+
+    def external_transition(self, inputs: Inputs[tuple[Ticker, float, int]]):
+        sender, time, count = inputs[self.receive]
+        if sender not in self.senders:
+            self.senders.append(sender)
+        self.pending.append((time + self.delay, count))
+
+    def internal_transition(self):
+        self.pending.pop(0)
+
+    def output(self):
+        return {self.send: self.pending[0]}
+
+
+class Recorder(Atomic):
+    history: list[tuple[float, int]] = StateVariable(default_factory=list)
+    receive = InputChannel()
+
+    def external_transition(self, inputs: Inputs[tuple[float, int]]):
+        self.history.append(inputs[self.receive])
+
+
+class Tally(Atomic):
+    """Reports how many values it has received whenever it is ticked"""
+
+    received: int = StateVariable(0)
+    reporting: bool = StateVariable(False)
+    tick = InputChannel()
+    receive = InputChannel()
+    report = OutputChannel()
+
+    def time_advance(self) -> Time:
+        return 0.0 if self.reporting else INFINITY
+
+    def external_transition(self, inputs: Inputs):
+        if self.receive in inputs:
+            self.received += 1
+        if self.tick in inputs:
+            self.reporting = True
+
+    def internal_transition(self):
+        self.reporting = False
+
+    def output(self):
+        return {self.report: (self.time.next, self.received)}
+
+
+def chain(lookahead: float = 2.0):
+    ticker, relay, recorder = Ticker(), Relay(delay=lookahead), Recorder()
+    ticker.channel("tick").connect(relay.channel("receive"))
+    relay.channel("send").connect(recorder.channel("receive"))
+    return ticker, relay, recorder
+
+
+def test_trafficlight(trafficlight_model):
+    sequential, parallel = trafficlight_model(), trafficlight_model()
+    assert Simulation().run(sequential, until=1000) == 960.0
+    # the light and the policeman run in different processes
+    assert Simulation(num_processes=2).run(parallel, until=1000) == 960.0
+
+    for expected, model in zip(sequential, parallel):
+        assert model.status == expected.status
+        assert model.time == expected.time
+
+
+@pytest.mark.parametrize("checked", [True, False])
+def test_lookahead(checked):
+    ticker, relay, recorder = sequential = chain()
+    Simulation().run(sequential, until=50)
+
+    # the ticker and the recorder share a partition, the relay has its own
+    parallel = chain()
+    simulation = Simulation(num_processes=2, checked=checked)
+    simulation.run(
+        parallel, until=50, partitions=[[parallel[0], parallel[2]], [parallel[1]]]
+    )
+
+    assert parallel[2].history == recorder.history
+    assert parallel[2].history[-1] == (50.0, 47)
+    assert parallel[1].pending == relay.pending
+    assert parallel[0].ticks == ticker.ticks
+    # models sent as messages arrive as the receiving process's own copies
+    assert parallel[1].senders == [parallel[0]]
+    assert parallel[1].senders[0] is parallel[0]
+
+
+def test_coupled():
+    ticker, relay, recorder = chain()
+    coupled = Coupled(components={relay, recorder})
+    Simulation(num_processes=2).run([ticker, coupled], until=10)
+
+    assert recorder.history == [(float(t), t - 3) for t in range(3, 11)]
+    assert relay.parent is coupled
+
+
+def test_lookahead_violation():
+    # the relay forwards after 1 but promises a lookahead of 2
+    ticker, relay, recorder = chain(lookahead=1.0)
+    with pytest.raises(SimulationError, match="lookahead"):
+        Simulation().run([], until=10, partitions=[[ticker, relay], [recorder]])
+
+
+def test_unpartitioned():
+    ticker, relay, recorder = chain()
+    with pytest.raises(ValueError, match="not in any partition"):
+        Simulation().run([], partitions=[[ticker, recorder]])
+
+
+@pytest.mark.parametrize("optimism", [1, 16])
+def test_optimistic(optimism):
+    ticker, relay, recorder = sequential = chain()
+    Simulation().run(sequential, until=50)
+
+    # the ticker and recorder speculate ahead of the relay's messages
+    parallel = chain()
+    simulation = Simulation(optimism=optimism)
+    report = simulation.run_parallel(
+        [], until=50, partitions=[[parallel[0], parallel[2]], [parallel[1]]]
+    )
+
+    assert parallel[2].history == recorder.history
+    assert parallel[1].pending == relay.pending
+    assert parallel[0].ticks == ticker.ticks
+    assert parallel[1].senders[0] is parallel[0]
+    assert report.events == sum(metrics.events for metrics in report.partitions)
+    if optimism > 1:
+        assert report.rollbacks > 0
+        assert report.efficiency < 1
+
+
+def test_anti_messages():
+    def build():
+        ticker, relay, recorder = Ticker(), Relay(), Recorder()
+        clock, tally = Ticker(period=0.5), Tally()
+        ticker.channel("tick").connect(relay.channel("receive"))
+        relay.channel("send").connect(tally.channel("receive"))
+        clock.channel("tick").connect(tally.channel("tick"))
+        tally.channel("report").connect(recorder.channel("receive"))
+        return [ticker, clock, tally], [relay, recorder]
+
+    sequential = build()
+    Simulation().run([model for part in sequential for model in part], until=20)
+    parallel = build()
+    report = Simulation(optimism=32).run_parallel([], until=20, partitions=parallel)
+
+    # reports sent before the relay's values arrived were cancelled
+    assert report.partitions[0].anti_messages > 0
+    assert parallel[1][1].history == sequential[1][1].history
+
+
+def test_optimistic_trafficlight(trafficlight_model):
+    sequential, parallel = trafficlight_model(), trafficlight_model()
+    Simulation().run(sequential, until=1000)
+    report = Simulation(num_processes=2, optimism=8).run_parallel(parallel, until=1000)
+
+    assert report.time == 960.0
+    for expected, model in zip(sequential, parallel):
+        assert model.status == expected.status
+        assert model.time == expected.time
+
+
+def test_rollback():
+    ticker, relay, recorder = chain()
+    node = Node([ticker, relay, recorder])
+    node.initialize()
+    codec = Codec([ticker, relay, recorder], [])
+    owners = dict.fromkeys(node.models, 0)
+    worker = OptimisticWorker(0, 1, node, codec, owners, optimism=8, until=10)
+
+    while worker.forward():
+        pass
+    assert ticker.ticks == 10
+    assert len(recorder.history) == 8
+    # only the fields a step changed are saved
+    assert worker.steps[0].saved == {ticker: {"time": ANY, "ticks": ANY}, relay: ANY}
+    assert "history" not in worker.steps[0].saved[relay]
+
+    worker.rollback(4.0)
+    assert ticker.ticks == 3
+    assert recorder.history == [(3.0, 0)]
+    assert node.next_time() == 4.0
+    assert node.events == sum(len(step.saved) for step in worker.steps)
+    assert worker.metrics.rollbacks == 1
+
+    # replaying gives the same states again
+    while worker.forward():
+        pass
+    assert ticker.ticks == 10
+    assert recorder.history == [(float(t), t - 3) for t in range(3, 11)]
+
+
+@pytest.mark.parametrize("transport", ["pipe", "shared_memory"])
+@pytest.mark.parametrize("capacity", [128, 1 << 20])
+def test_transport(transport, capacity):
+    ticker, relay, recorder = chain()
+    Simulation().run([ticker, relay, recorder], until=30)
+
+    # a tiny buffer overflows into the pipes
+    parallel = chain()
+    run_partitions(
+        [[parallel[0]], [parallel[1]], [parallel[2]]],
+        until=30,
+        optimism=4,
+        transport=transport,
+        capacity=capacity,
+    )
+    assert parallel[2].history == recorder.history
@@ -0,0 +1,100 @@
+import pytest
+
+from pydes.atomic import Atomic
+from pydes.channel import MultiInputChannel, MultiOutputChannel
+from pydes.coupled import Coupled
+from pydes.partition import build_graph, cut_weight, partition_graph
+from pydes.simulation import Simulation
+
+
+class Peer(Atomic):
+    receive = MultiInputChannel()
+    send = MultiOutputChannel()
+
+
+def clusters(count: int = 2, size: int = 4) -> list[list[Peer]]:
+    """Fully connected groups of peers, each linked to the next by one edge"""
+    groups = [[Peer() for _ in range(size)] for _ in range(count)]
+    for group in groups:
+        for sender in group:
+            for receiver in group:
+                if sender is not receiver:
+                    sender.channel("send").connect(receiver.channel("receive"))
+    for group, following in zip(groups, groups[1:]):
+        group[-1].channel("send").connect(following[0].channel("receive"))
+    return groups
+
+
+def test_build_graph():
+    a, b, c = Peer(), Peer(), Peer()
+    a.channel("send").connect(b.channel("receive"))
+    b.channel("send").connect(c.channel("receive"))
+    graph = build_graph(
+        [a, Coupled(components={b, c})], rates={a: 4.0}, volumes={(b, c): 10.0}
+    )
+
+    assert set(graph) == {a, b, c}
+    assert graph.nodes[a]["weight"] == 4.0
+    assert graph.nodes[b]["weight"] == 1.0
+    assert graph[a][b]["weight"] == 1
+    assert graph[b][c]["weight"] == 10.0
+    assert not graph.has_edge(a, c)
+
+
+@pytest.mark.parametrize("count", [2, 3, 4])
+def test_clusters(count):
+    groups = clusters(count)
+    # shuffle the groups so that only the couplings keep them together
+    models = [model for i in range(4) for group in groups for model in group[i::4]]
+    graph = build_graph(models)
+    assignment = partition_graph(graph, count)
+
+    assert cut_weight(graph, assignment) == count - 1
+    for group in groups:
+        assert len({assignment[model] for model in group}) == 1
+
+
+def test_balance():
+    # one busy model outweighs the others, so the rest share a partition
+    models = [Peer() for _ in range(5)]
+    for sender, receiver in zip(models, models[1:]):
+        sender.channel("send").connect(receiver.channel("receive"))
+    graph = build_graph(models, rates={models[2]: 4.0})
+    assignment = partition_graph(graph, 2)
+
+    parts = [assignment[model] for model in models]
+    assert parts.count(assignment[models[2]]) == 1
+
+
+def test_rebalance():
+    # a busy model just short of the middle of a chain overloads the first run,
+    # which then hands over a third of the chain one model at a time
+    models = [Peer() for _ in range(3000)]
+    for sender, receiver in zip(models, models[1:]):
+        sender.channel("send").connect(receiver.channel("receive"))
+    graph = build_graph(models, rates={models[1470]: 1200.0})
+    assignment = partition_graph(graph, 2)
+
+    load = [0.0, 0.0]
+    for model, part in assignment.items():
+        load[part] += graph.nodes[model]["weight"]
+    assert max(load) <= sum(load) / 2 * 1.05
+    assert cut_weight(graph, assignment) <= 2
+
+
+def test_export(tmp_path):
+    groups = clusters()
+    models = [model for group in groups for model in group]
+    simulation = Simulation(num_processes=2)
+    partitions = simulation.partition(models)
+    assert sorted(map(set, partitions), key=len) == [set(group) for group in groups]
+    assert all("partition" in data for _, data in simulation.graph.nodes(data=True))
+
+    simulation.export_partition(tmp_path / "partition.json")
+    reloaded = Simulation(num_processes=2).load_partition(
+        tmp_path / "partition.json", models
+    )
+    assert reloaded == partitions
+
+    with pytest.raises(ValueError, match="not in the partition"):
+        Simulation().load_partition(tmp_path / "partition.json", [*models, Peer()])
@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import InputChannel, Inputs, OutputChannel
+from pydes.core import INFINITY, deserialize, serialize
+from pydes.node import Node
+from pydes.population import AtomicArray, StateColumn
+
+RED, GREEN, YELLOW, MANUAL = range(4)
+DURATION = np.array([60.0, 50.0, 10.0, INFINITY])
+SUCCESSOR = np.array([GREEN, YELLOW, RED, MANUAL], np.int8)
+
+
+class Light(Atomic):
+    status: int = StateVariable(RED)
+
+    def time_advance(self):
+        return DURATION[self.status]
+
+    def internal_transition(self):
+        self.status = int(SUCCESSOR[self.status])
+
+
+class Lights(AtomicArray):
+    status: np.ndarray = StateColumn(np.int8, RED)
+    switch = InputChannel()
+    switched = OutputChannel()
+
+    def time_advance_array(self, index):
+        return DURATION[self.status[index]]
+
+    def internal_transition_array(self, index):
+        self.status[index] = SUCCESSOR[self.status[index]]
+
+    def external_transition_array(self, inputs: Inputs[list[int]]):
+        index = np.asarray(inputs[self.switch])
+        self.status[index] = MANUAL
+        return index
+
+    def output_array(self, index):
+        return {self.switched: index}
+
+
+class Switch(Atomic):
+    targets: list[int] = StateVariable()
+    switch = OutputChannel()
+
+    def time_advance(self):
+        return 100.0 if self.targets else INFINITY
+
+    def internal_transition(self):
+        self.targets = []
+
+    def output(self):
+        return {self.switch: self.targets}
+
+
+class Recorder(Atomic):
+    switched: list[list[int]] = StateVariable(default_factory=list)
+    inp = InputChannel()
+
+    def external_transition(self, inputs: Inputs[np.ndarray]):
+        self.switched.append(inputs[self.inp].tolist())
+
+
+def test_matches_scalar_models():
+    initial = [RED, GREEN, YELLOW, RED, GREEN, YELLOW, RED]
+    lights = Lights(size=len(initial), status=np.array(initial, np.int8))
+    scalar = [Light(status=status) for status in initial]
+
+    for models in ([lights], scalar):
+        node = Node(models)
+        node.initialize()
+        node.run(until=1000)
+
+    assert lights.status.tolist() == [light.status for light in scalar]
+    assert lights.next.tolist() == [light.time.next for light in scalar]
+    assert lights.time.next == min(light.time.next for light in scalar)
+
+
+def test_external_and_output():
+    lights = Lights(size=4)
+    switch, recorder = Switch(targets=[1, 3]), Recorder()
+    switch.channel("switch").connect(lights.channel("switch"))
+    lights.channel("switched").connect(recorder.channel("inp"))
+
+    node = Node([lights, switch, recorder])
+    node.initialize()
+    node.run(until=1000)
+
+    assert lights.status.tolist()[1::2] == [MANUAL, MANUAL]
+    assert lights.next.tolist()[1::2] == [INFINITY, INFINITY]
+    # all four turn green at 60, then only the automatic ones keep cycling
+    assert recorder.switched[:3] == [[0, 1, 2, 3], [0, 2], [0, 2]]
+
+
+def test_column_size():
+    with pytest.raises(ValidationError):
+        Lights(size=3, status=np.zeros(2, np.int8))
+
+
+def test_serialization():
+    lights = Lights(size=5)
+    node = Node([lights])
+    node.initialize()
+    node.run(until=60)
+
+    restored = deserialize(serialize(lights))
+    assert restored.status.tolist() == lights.status.tolist()
+    assert restored.next.tolist() == lights.next.tolist()
+    assert restored.size == 5
+
+
+def test_unchecked():
+    initial = [RED, GREEN, YELLOW, RED]
+    checked, lights = (
+        Lights(size=len(initial), status=np.array(initial, np.int8)) for _ in range(2)
+    )
+    for model, check in [(checked, True), (lights, False)]:
+        node = Node([model], checked=check)
+        node.initialize()
+        node.run(until=1000)
+
+    assert lights.status.tolist() == checked.status.tolist()
+    # private attributes assigned by the transitions stay private
+    assert "_imminent" not in lights.__dict__
+    node.validate()
+
+
+class Timers(AtomicArray):
+    delay: np.ndarray = StateColumn(np.float64, INFINITY)
+    fired: np.ndarray = StateColumn(np.int64, 0)
+    batches: list[int] = StateVariable(default_factory=list)
+
+    def time_advance_array(self, index):
+        return np.where(self.fired[index] == 0, self.delay[index], INFINITY)
+
+    def internal_transition_array(self, index):
+        self.fired[index] += 1
+        self.batches.append(len(index))
+
+
+def test_rounding():
+    # the time advance to 83422.84... from 445.84... does not add back up to it
+    late, early = 83422.84760295371, 445.84338617695175
+    assert (late - early) + early < late
+    timers = Timers(size=2, delay=np.array([late, early]))
+    node = Node([timers])
+    node.initialize()
+    node.run()
+    assert timers.fired.tolist() == [1, 1]
+    assert timers.batches == [1, 1]
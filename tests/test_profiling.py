@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import InputChannel, OutputChannel
+from pydes.core import INFINITY
+from pydes.node import Node
+from pydes.profiling import Profiler
+from pydes.simulation import Simulation
+
+
+def test_profiler(trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    classes = [type(model) for model in models]
+    profiler = Profiler()
+    simulation = Simulation(profiler=profiler)
+    simulation.run(models, until=1000)
+    assert [type(model) for model in models] == classes
+
+    data = json.loads(profiler.to_json())
+    index = simulation.registry.ids
+    # the policeman switches the light every 100 and 200
+    calls = data["models"][str(index[policeman.id])]["calls"]
+    assert calls["internal_transition"] == calls["output"] == 6
+    assert (
+        data["classes"]["trafficlight_model.<locals>.Policeman"]["calls"]["output"] == 6
+    )
+    calls = data["models"][str(index[light.id])]["calls"]
+    assert (
+        calls.get("external_transition", 0) + calls.get("confluent_transition", 0) == 6
+    )
+    assert data["messages"] == {
+        f"{policeman.name}.interrupt -> {light.name}.interrupt": 6
+    }
+    assert sum(data["queue_depth"].values()) > 0
+    assert all(
+        seconds >= 0
+        for seconds in data["models"][str(index[light.id])]["seconds"].values()
+    )
+    lines = profiler.summary().splitlines()
+    assert lines[0].split()[:2] == ["class", "internal"]
+    assert len(lines) == 3
+
+
+def test_sample(trafficlight_model):
+    profiler = Profiler(sample=4)
+    Simulation(profiler=profiler).run(trafficlight_model(), until=1000)
+    # every call is counted, every 4th is timed
+    assert profiler.calls
+    timed = [key for key, calls in profiler.calls.items() if calls >= 4]
+    assert all(profiler.seconds[key] > 0 for key in timed)
+    assert all(
+        key not in profiler.seconds
+        for key, calls in profiler.calls.items()
+        if calls < 4
+    )
+
+
+class Ticker(Atomic):
+    ticks: int = StateVariable(0)
+    tick = OutputChannel()
+
+    def time_advance(self):
+        return 1.0 if self.ticks < 10 else INFINITY
+
+    def internal_transition(self):
+        self.ticks += 1
+
+    def output(self):
+        return {self.tick: self.ticks}
+
+
+class Listener(Ticker):
+    heard: int = StateVariable(0)
+    listen = InputChannel()
+
+    def external_transition(self, inputs):
+        self.heard += 1
+
+
+@pytest.mark.parametrize("sample", [1, 3])
+def test_nested(sample):
+    # the listener ticks together with the ticker, in confluent transitions
+    ticker, listener = Ticker(), Listener()
+    ticker.channel("tick").connect(listener.channel("listen"))
+    profiler = Profiler(sample)
+    node = Node([ticker, listener])
+    profiler.attach(node)
+    node.initialize()
+    node.run()
+    profiler.detach()
+    calls = {
+        name: count
+        for (index, name), count in profiler.calls.items()
+        if index == listener._index
+    }
+    assert listener.heard == 10
+    assert calls["confluent_transition"] == 10
+    # the transitions run by each confluent transition are counted too
+    assert calls["internal_transition"] == calls["external_transition"] == 10
+
+
+def test_partitions(trafficlight_model):
+    sequential, parallel = Profiler(), Profiler()
+    Simulation(profiler=sequential).run(trafficlight_model(), until=1000)
+    Simulation(num_processes=2, profiler=parallel).run(trafficlight_model(), until=1000)
+
+    def totals(profiler: Profiler) -> dict:
+        return {
+            name: entry["calls"] for name, entry in profiler.export()["classes"].items()
+        }
+
+    assert totals(parallel) == totals(sequential)
+    assert sum(parallel.messages.values()) == sum(sequential.messages.values())
+
+
+def test_threads(trafficlight_model):
+    models = trafficlight_model()
+    classes = [type(model) for model in models]
+    simulation = Simulation(profiler=Profiler(), num_threads=2)
+    with pytest.raises(ValueError, match="threads"):
+        simulation.run(models, until=1000)
+    parallel = Simulation(profiler=Profiler(), num_processes=2, num_threads=2)
+    with pytest.raises(ValueError, match="threads"):
+        parallel.run(models, until=1000)
+    assert [type(model) for model in models] == classes
@@ -1,4 +1,9 @@
-from pydes.utils import MapQueue
+from random import Random
+
+import pytest
+
+from pydes.core import INFINITY
+from pydes.utils import CalendarQueue, IndexedQueue, MapQueue
 
 
 def test_queue():
@@ -12,3 +17,134 @@ def test_queue():
 
     queued = [q.pop() for _ in range(len(q))]
     assert queued == ["violet", "indigo", "blue"]
+
+
+def test_indexed_queue():
+    q = IndexedQueue[str]([(665, "red"), (470, "blue"), (550, "green")])
+
+    assert "blue" in q
+    assert q.peek_time() == 470
+
+    q.remove("red")
+    assert "red" not in q
+    q.update("green", 400)
+    assert q.push("indigo", 425)
+    assert not q.push("indigo", 100)
+
+    queued = [q.pop() for _ in range(len(q))]
+    assert queued == ["green", "indigo", "blue"]
+    assert q.peek_time() == INFINITY
+
+    with pytest.raises(KeyError):
+        q.update("blue", 1)
+    # looking values up assigns them no slot
+    assert "yellow" not in q
+    with pytest.raises(KeyError):
+        q.remove("yellow")
+    assert "yellow" not in q.slots
+
+
+def test_indexed_queue_matches_map_queue():
+    rng = Random(7)
+    values = [f"v{i}" for i in range(200)]
+    indexed = IndexedQueue[str](index=values.index)
+    mapped = MapQueue[str]()
+
+    for value in values:
+        priority = rng.random()
+        indexed.push(value, priority)
+        mapped.push(value, priority)
+
+    for _ in range(500):
+        value, priority = rng.choice(values), rng.random()
+        if value in mapped:
+            mapped.update(value, priority)
+            indexed.update(value, priority)
+        if rng.random() < 0.2 and len(mapped):
+            assert indexed.pop() == mapped.pop()
+
+    assert [indexed.pop() for _ in range(len(indexed))] == [
+        mapped.pop() for _ in range(len(mapped))
+    ]
+
+
+def test_calendar_queue():
+    q = CalendarQueue[str]([(665, "red"), (470, "blue"), (550, "green")])
+
+    assert "blue" in q
+    assert q.peek_time() == 470
+
+    q.remove("red")
+    assert "red" not in q
+    q.update("green", 400)
+    assert q.push("indigo", 425)
+    assert not q.push("indigo", 100)
+    assert q.push("black", INFINITY)
+
+    queued = [q.pop() for _ in range(len(q))]
+    assert queued == ["green", "indigo", "blue", "black"]
+    assert q.peek_time() == INFINITY
+
+
+def test_calendar_queue_ties():
+    q = CalendarQueue[int]()
+    for value in range(100):
+        q.push(value, 5.0 if value % 2 else 2.0)
+
+    assert [q.pop() for _ in range(len(q))] == [
+        *range(0, 100, 2),
+        *range(1, 100, 2),
+    ]
+
+
+def test_calendar_queue_hold():
+    rng = Random(3)
+    q = CalendarQueue[int]()
+    expected = {}
+    for value in range(1000):
+        expected[value] = rng.expovariate(1.0)
+        q.push(value, expected[value])
+
+    now = 0.0
+    for _ in range(5000):
+        assert (now := q.peek_time()) == min(expected.values())
+        value = q.pop()
+        assert expected.pop(value) == now
+        if rng.random() < 0.3:
+            other = rng.choice(list(expected))
+            expected[other] = now + rng.random()
+            q.update(other, expected[other])
+        expected[value] = now + rng.expovariate(1.0)
+        q.push(value, expected[value])
+
+
+@pytest.mark.parametrize("size", [10, 1000])
+@pytest.mark.parametrize("queue_type", [MapQueue, IndexedQueue, CalendarQueue])
+def test_pop_imminent(queue_type, size):
+    rng = Random(11)
+    q = queue_type()
+    expected = {value: float(rng.randint(1, 4)) for value in range(size)}
+    for value, priority in expected.items():
+        q.push(value, priority)
+
+    while q.peek_time() != INFINITY:
+        time = q.peek_time()
+        imminent = q.pop_imminent()
+        assert sorted(imminent) == sorted(v for v, p in expected.items() if p == time)
+        for value in imminent:
+            del expected[value]
+        # reschedule the imminent values together with a few queued ones
+        changes = {value: time + rng.randint(1, 3) for value in imminent}
+        changes.update((value, time + 0.5) for value in rng.sample(list(expected), 3))
+        if time > 10:
+            changes = {v: INFINITY for v in changes}
+        q.reschedule(changes.items())
+        expected.update(changes)
+
+    assert len(q) == size
+
+
+@pytest.mark.parametrize("buckets", [0, 3, 12])
+def test_calendar_buckets(buckets):
+    with pytest.raises(ValueError, match="power of two"):
+        CalendarQueue[str](buckets=buckets)
@@ -0,0 +1,35 @@
+from pydes.registry import Registry, index
+from pydes.simulation import Simulation
+
+
+def test_registry(trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    registry = Registry(models)
+
+    assert [index(model) for model in models] == [0, 1]
+    assert registry.ids.inverse[1] == policeman.id
+    assert registry.lookup(light.id) is light
+    assert registry[1] is policeman
+    assert registry.register(policeman) == 1
+    assert len(registry) == 2
+
+    # another registry renumbers, registering again restores the index
+    Registry([policeman])
+    assert index(policeman) == 0
+    registry.register(policeman)
+    assert index(policeman) == 1
+
+
+def test_node(trafficlight_model):
+    light, policeman = trafficlight_model()
+    simulation = Simulation(scheduler="indexed")
+    node = simulation.build_node([light])
+
+    assert list(simulation.registry) == [light]
+    assert node.inbox == [{}]
+
+    # the policeman sends to the light, which is numbered without a bag
+    other = simulation.build_node([policeman])
+    assert list(simulation.registry) == [light, policeman]
+    assert other.inbox == [None, {}]
+    assert other.registry is node.registry
@@ -0,0 +1,64 @@
+import pytest
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import OutputChannel
+from pydes.core import INFINITY
+from pydes.replication import t_quantile
+from pydes.simulation import Simulation
+from pydes.statistics import Moments, QuantileSketch, Sink
+
+
+class Arrivals(Atomic):
+    """Sends its exponential interarrival times, `remaining` of them"""
+
+    remaining: int = StateVariable(100)
+    gap: float = StateVariable(0.0)
+    arrival = OutputChannel()
+
+    def time_advance(self):
+        if not self.remaining:
+            return INFINITY
+        self.gap = self.rng.exponential(2.0)
+        return self.gap
+
+    def internal_transition(self):
+        self.remaining -= 1
+
+    def output(self):
+        return {self.arrival: self.gap}
+
+
+def build():
+    arrivals = Arrivals()
+    sink = Sink(
+        name="gaps", statistics={"moments": Moments(), "quantiles": QuantileSketch()}
+    )
+    arrivals.channel("arrival").connect(sink.channel("observe"))
+    return [arrivals, sink]
+
+
+def test_t_quantile():
+    assert t_quantile(0.95, 1) == pytest.approx(12.706, abs=1e-3)
+    assert t_quantile(0.95, 10) == pytest.approx(2.228, abs=1e-3)
+    assert t_quantile(0.99, 29) == pytest.approx(2.756, abs=1e-3)
+    assert t_quantile(0.95, 5000) == pytest.approx(1.960, abs=1e-3)
+
+
+def test_replicate():
+    simulation = Simulation()
+    report = simulation.replicate(build, 8, processes=4)
+    assert len(report) == 8
+    means = report.values("gaps.moments")
+    assert len(set(means)) == 8
+    # seeds are spawned from the root seed, whichever process runs them
+    assert simulation.replicate(build, 8, processes=1).values("gaps.moments") == means
+    assert simulation.replicate(build, 8, seed=1).values("gaps.moments") != means
+
+    low, high = report.interval("gaps.moments")
+    assert low < report.mean("gaps.moments") < high
+    assert low < 2.0 < high
+    pooled = report.merged("gaps.moments")
+    assert pooled.count == 800
+    assert pooled.mean == pytest.approx(report.mean("gaps.moments"))
+    assert report.merged("gaps.quantiles").count == 800
+    assert report.speedup > 0 and report.processes == 4
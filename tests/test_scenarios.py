@@ -0,0 +1,100 @@
+import pytest
+
+from pydes.atomic import Atomic, StateConstant, StateVariable
+from pydes.channel import OutputChannel
+from pydes.core import random
+from pydes.coupled import Coupled
+from pydes.errors import SimulationError
+from pydes.node import Node
+from pydes.scenarios import override
+from pydes.simulation import Simulation
+from pydes.statistics import Moments, Sink
+
+
+class Arrivals(Atomic):
+    """Sends its exponential interarrival times of mean `scale`"""
+
+    scale: float = StateConstant(1.0)
+    gap: float = StateVariable(0.0)
+    arrival = OutputChannel()
+
+    def time_advance(self):
+        self.gap = self.rng.exponential(self.scale)
+        return self.gap
+
+    def output(self):
+        return {self.arrival: self.gap}
+
+
+def build():
+    arrivals = Arrivals()
+    sink = Sink(name="gaps", statistics={"moments": Moments()})
+    arrivals.channel("arrival").connect(sink.channel("observe"))
+    return [arrivals, sink]
+
+
+@pytest.mark.parametrize("method", ["fork", "serialize"])
+def test_fork(method):
+    state = random.bit_generator.state
+    arrivals, sink = models = build()
+    scenarios = [{}, {arrivals: {"scale": 10.0}}, {arrivals: {"scale": 0.1}}]
+    results = Simulation().fork(models, 100.0, scenarios, until=1000.0, method=method)
+
+    same, slower, faster = (result["gaps.moments"] for result in results)
+    assert slower.count < same.count < faster.count
+    assert slower.mean > same.mean > faster.mean
+
+    # the models are left where the scenarios branched off, and without
+    # changes a scenario runs exactly as if it had never branched
+    for until, expected in [(100.0, sink["moments"]), (1000.0, same)]:
+        random.bit_generator.state = state
+        models = build()
+        Simulation().run(models, until=until)
+        assert models[1]["moments"] == expected
+    assert arrivals.scale == 1.0
+
+
+def test_fork_errors():
+    arrivals, sink = models = build()
+    with pytest.raises(SimulationError, match="has no field"):
+        Simulation().fork(models, 10.0, [{arrivals: {"rate": 1.0}}], until=20.0)
+    with pytest.raises(ValueError, match="has no field"):
+        Simulation().fork(
+            models, 10.0, [{arrivals: {"rate": 1.0}}], until=20.0, method="serialize"
+        )
+    node = Node(models)
+    node.initialize()
+    with pytest.raises(ValueError, match="scale"):
+        override(node, {arrivals: {"scale": "slow"}})
+    assert arrivals.scale == 1.0
+    with pytest.raises(ValueError):
+        Simulation(num_processes=2).fork(models, 10.0, [{}])
+
+
+class Labelled(Coupled):
+    label: str = StateConstant("a")
+
+
+def test_override_validators():
+    arrivals, sink = build()
+    coupled = Labelled(components={arrivals, sink})
+    node = Node([coupled])
+    node.initialize()
+    # the model validators, which adopt the components, are not run again
+    override(node, {coupled: {"label": "b"}, arrivals: {"scale": "2.5"}})
+    assert coupled.label == "b"
+    assert arrivals.scale == 2.5
+    assert arrivals.parent is sink.parent is coupled
+
+
+class Broken(Arrivals):
+    def time_advance(self):
+        raise RuntimeError("broken")
+
+
+def test_fork_closes():
+    broken = Broken()
+    with pytest.raises(RuntimeError, match="broken"):
+        Simulation(checked=False).fork([broken], 10.0, [{}])
+    # the node is closed, which checks the model again
+    assert type(broken) is Broken
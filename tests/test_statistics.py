@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from pydes.atomic import Atomic, StateVariable
+from pydes.channel import OutputChannel
+from pydes.codec import Codec
+from pydes.core import INFINITY
+from pydes.simulation import Simulation
+from pydes.statistics import (
+    Histogram,
+    Moments,
+    QuantileSketch,
+    Sink,
+    TimeWeighted,
+    merge,
+)
+
+
+class Levels(Atomic):
+    """Sends the level `levels[i]` at time `i + 1`"""
+
+    levels: list[float] = StateVariable()
+    sent: int = StateVariable(0)
+    level = OutputChannel()
+
+    def time_advance(self):
+        return 1.0 if self.sent < len(self.levels) else INFINITY
+
+    def internal_transition(self):
+        self.sent += 1
+
+    def output(self):
+        return {self.level: self.levels[self.sent]}
+
+
+def test_moments():
+    values = np.random.default_rng(0).normal(5.0, 2.0, 1001)
+    parts = [Moments() for _ in range(3)]
+    for i, value in enumerate(values.tolist()):
+        parts[i % 3].add(value)
+    moments = merge(parts)
+    assert parts[0].count == 334
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.variance == pytest.approx(values.var(ddof=1))
+    assert (moments.min, moments.max) == (values.min(), values.max())
+
+
+def test_histogram():
+    histogram = Histogram(0.0, 10.0, 5)
+    for value in [-1.0, 0.0, 1.9, 2.0, 9.99, 10.0, 15.0]:
+        histogram.add(value)
+    assert histogram.counts == [1, 2, 1, 0, 0, 1, 2]
+    assert histogram.edges == [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+    other = Histogram(0.0, 10.0, 5)
+    other.add(5.0)
+    histogram.merge(other)
+    assert histogram.count == 8
+    with pytest.raises(ValueError):
+        histogram.merge(Histogram(0.0, 10.0, 4))
+
+
+def test_quantile_sketch():
+    values = np.random.default_rng(0).lognormal(0.0, 2.0, 10_000)
+    values[:100] *= -1
+    values[100:150] = 0.0
+    first, second = QuantileSketch(), QuantileSketch()
+    for value in values[::2].tolist():
+        first.add(value)
+    for value in values[1::2].tolist():
+        second.add(value)
+    sketch = merge([first, second])
+    assert sketch.count == len(values)
+    for q in [0.005, 0.0125, 0.1, 0.5, 0.9, 0.99]:
+        expected = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.02, abs=1e-12)
+    # collapsing keeps the high quantiles accurate
+    small = QuantileSketch(max_bins=100)
+    for value in values.tolist():
+        small.add(value)
+    assert len(small.positive) <= 100
+    assert small.quantile(0.99) == pytest.approx(np.quantile(values, 0.99), rel=0.02)
+
+
+def test_sink():
+    levels = Levels(levels=[2.0, 0.0, 4.0, 1.0])
+    sink = Sink(
+        statistics={
+            "moments": Moments(),
+            "level": TimeWeighted(),
+            "histogram": Histogram(0.0, 5.0, 5),
+            "quantiles": QuantileSketch(),
+        }
+    )
+    levels.channel("level").connect(sink.channel("observe"))
+    Simulation().run([levels, sink])
+
+    assert sink["moments"].mean == 1.75
+    assert sink["histogram"].counts == [0, 1, 1, 1, 0, 1, 0]
+    assert sink["quantiles"].quantile(1.0) == pytest.approx(4.0, rel=0.01)
+    level = sink["level"]
+    # 0 until 1, then 2, 0 and 4 for a unit of time each, then 1 until closed
+    level.close(6.0)
+    assert level.duration == 6.0
+    assert level.mean == pytest.approx((2.0 + 4.0 + 2 * 1.0) / 6.0)
+
+    # statistics travel between partitions and snapshots with the sink
+    codec = Codec()
+    statistics = codec.decode(codec.encode(sink)).statistics
+    assert statistics == sink.statistics
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from pydes.node import Node
+from pydes.simulation import Simulation
+from pydes.trace import Kind, Level, TraceWriter, read_trace
+
+
+def test_trace(tmp_path, trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    simulation = Simulation(trace=str(tmp_path), trace_level=Level.PAYLOADS)
+    simulation.run(models, until=1000)
+    trace = read_trace(tmp_path)
+
+    index = simulation.registry.ids
+    assert trace.models[index[light.id]] == (str(light.id), light.name)
+    assert isinstance(trace.time, np.memmap)
+    assert np.all(np.diff(trace.time) >= 0)
+    # the policeman switches the light every 100 and 200
+    switches = trace.select(policeman, Kind.MESSAGE)
+    assert trace.time[switches].tolist() == [200.0, 300.0, 500.0, 600.0, 800.0, 900.0]
+    assert trace.load_payload(switches[0]) == "toManual"
+    assert trace.ports[trace.port[switches[0]]] == (
+        f"{policeman.name}.interrupt",
+        f"{light.name}.interrupt",
+    )
+    externals = trace.select(light, Kind.EXTERNAL)
+    assert trace.time[externals].tolist() == trace.time[switches].tolist()
+    assert len(trace) == len(trace.select(light)) + len(trace.select(policeman))
+
+
+def test_build_node(tmp_path, trafficlight_model):
+    light, policeman = models = trafficlight_model()
+    simulation = Simulation(trace=str(tmp_path))
+    node = simulation.build_node(models)
+    node.initialize()
+    node.run(until=1000)
+    node.close()
+    trace = read_trace(tmp_path, mmap=False)
+    assert trace.time[trace.select(policeman, Kind.MESSAGE)].tolist() == [
+        200.0,
+        300.0,
+        500.0,
+        600.0,
+        800.0,
+        900.0,
+    ]
+
+
+def test_levels(tmp_path, queueing_model):
+    generator, queue, processor, collector = models = queueing_model(jobs=10)
+    node = Node(models)
+    node.trace = writer = TraceWriter(tmp_path, node.registry, Level.OFF, capacity=4)
+    writer.set_level(processor, Level.PAYLOADS)
+    writer.set_level(collector, Level.TRANSITIONS)
+    node.initialize()
+    node.run()
+    node.close()
+    trace = read_trace(tmp_path, mmap=False)
+
+    traced = {node.registry.ids[model.id] for model in [processor, collector]}
+    assert set(trace.model.tolist()) == traced
+    assert set(trace.kind[trace.select(collector)].tolist()) == {Kind.EXTERNAL}
+    # the processor sends each job on and itself back to the queue
+    jobs = trace.select(processor, Kind.MESSAGE)
+    assert len(jobs) == 20
+    # payload offsets are appended across flushes, like the records
+    assert trace.offsets.tolist() == sorted(set(trace.offsets.tolist()))
+    assert len(trace.offsets) == 20
+    # references to models resolve among the simulation's models
+    with pytest.raises(ValueError, match="reference"):
+        trace.load_payload(jobs[1])
+    payloads = [
+        trace.load_payload(row, {model.id: model for model in models}) for row in jobs
+    ]
+    assert payloads[1::2] == [processor] * 10
+    assert payloads[::2] == collector.events
+
+
+def test_partitions(tmp_path, trafficlight_model):
+    sequential, parallel = trafficlight_model(), trafficlight_model()
+    Simulation(trace=str(tmp_path / "sequential")).run(sequential, until=1000)
+    Simulation(num_processes=2, trace=str(tmp_path / "parallel")).run(
+        parallel, until=1000
+    )
+
+    expected = read_trace(tmp_path / "sequential")
+    traces = [
+        read_trace(tmp_path / "parallel" / f"partition-{rank}") for rank in range(2)
+    ]
+    assert sum(len(trace) for trace in traces) == len(expected)
+    # each partition numbers models the same way
+    assert traces[0].models == traces[1].models
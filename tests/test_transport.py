@@ -0,0 +1,80 @@
+import multiprocessing
+import uuid
+
+import pytest
+
+from pydes.transport import RingBuffer
+
+
+@pytest.fixture
+def ring():
+    ring = RingBuffer(capacity=256)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_flush(ring):
+    destination = uuid.uuid4()
+    assert ring.write(destination, 1.5, b"hello", port=3, sequence=7)
+    # nothing is visible before the flush
+    assert list(ring) == []
+
+    ring.flush()
+    [record] = records = list(ring)
+    assert record.destination == destination
+    assert record.timestamp == 1.5
+    assert (record.port, record.sequence, record.negative) == (3, 7, False)
+    assert isinstance(record.payload, memoryview)
+    assert bytes(record.payload) == b"hello"
+    del record, records
+
+    assert list(ring) == []
+
+
+def test_wrap(ring):
+    destination = uuid.uuid4()
+    payload = bytes(60)
+    # records take 112 bytes, so the buffer end is skipped every few writes
+    for i in range(10):
+        assert ring.write(destination, i, payload, sequence=i, negative=i % 2 == 1)
+        ring.flush()
+        [record] = list(ring)
+        assert record.sequence == i
+        assert record.negative == (i % 2 == 1)
+        assert record.payload == payload
+        del record
+
+
+def test_full(ring):
+    destination = uuid.uuid4()
+    assert ring.write(destination, 0, bytes(60))
+    assert ring.write(destination, 0, bytes(60))
+    assert not ring.write(destination, 0, bytes(60))
+    assert not ring.write(destination, 0, bytes(1000))
+    ring.flush()
+
+    assert len(list(ring)) == 2
+    assert ring.write(destination, 0, bytes(60))
+
+
+def produce(name: str, count: int):
+    ring = RingBuffer(capacity=256, name=name)
+    for i in range(count):
+        while not ring.write(uuid.UUID(int=i), i, i.to_bytes(4)):
+            pass
+        ring.flush()
+    ring.close()
+
+
+def test_processes(ring):
+    producer = multiprocessing.get_context("spawn").Process(
+        target=produce, args=(ring.name, 200)
+    )
+    producer.start()
+    received = []
+    while len(received) < 200:
+        received += [int.from_bytes(record.payload) for record in ring]
+    producer.join()
+
+    assert received == list(range(200))